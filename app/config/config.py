@@ -34,6 +34,82 @@ class Settings(BaseSettings):
         AUDIO_DIRECTORY: Thu muc luu file audio da download.
         THUMBNAIL_DIRECTORY: Thu muc luu file thumbnail da download.
         ALLOW_ORIGINS: Danh sach origin duoc phep CORS.
+        DOWNLOAD_WORKERS: So job download chay dong thoi toi da.
+        DOWNLOAD_INTERACTIVE_RESERVED: So worker chi danh cho lane
+            interactive (nguoi dung dang cho phat).
+        DOWNLOAD_BULK_WORKERS: So job lane bulk (import, prefetch) chay
+            dong thoi toi da.
+        DOWNLOAD_QUEUE_MAXSIZE: Suc chua hang doi download trong RAM.
+        DOWNLOAD_QUEUE_POLL_SECONDS: Chu ky quet DB tim bai PENDING
+            chua duoc xep hang (giay).
+        DOWNLOAD_CLAIM_TTL_SECONDS: Bai PROCESSING khong cap nhat qua
+            thoi gian nay duoc coi la worker da chet va claim lai duoc
+            (worker dang chay heartbeat moi 1/3 khoang nay).
+        YTDLP_INFO_CACHE_TTL_SECONDS: Thoi gian giu ket qua extract_info
+            de stage download dung lai (0 = tat cache).
+        YTDLP_INFO_CACHE_MAX_ENTRIES: So video toi da trong cache.
+        PIPELINE_EXECUTOR_WORKERS: So thread cua executor rieng cho cac
+            lenh blocking trong pipeline download (yt-dlp, thumbnail).
+        CONTROL_EXECUTOR_WORKERS: So thread cua executor cho thao tac
+            ngan cua pipeline (heartbeat, chuyen trang thai, ghi spool).
+        THREADPOOL_WORKERS: So thread cho route/dependency dong bo cua
+            Starlette (0 = giu mac dinh cua AnyIO).
+        RATE_LIMIT_*_PER_SECOND: So request moi giay toi tung nhom host
+            (API music.youtube.com, youtube.com, googlevideo, ytimg);
+            0 = khong gioi han.
+        RATE_LIMIT_*_BURST: So request duoc gui lien tiep khi bucket day.
+        RATE_LIMIT_INTERACTIVE_PER_SECOND: Ngan sach rieng (moi nhom
+            host) cho request tu route cua nguoi dung (``/ytmusic/*``,
+            stream); job nen khong dung toi.
+        RATE_LIMIT_INTERACTIVE_BURST: Burst cua ngan sach interactive.
+        RATE_LIMIT_MAX_WAIT_SECONDS: Route dong bo cho toi da bay nhieu
+            giay de co luot; lau hon thi tra 429 kem Retry-After.
+        RATE_LIMIT_REDIS_URL: Redis dung chung bucket giua nhieu worker
+            process (de trong = bucket rieng tung process).
+        DOWNLOAD_RETRY_MAX_ATTEMPTS: So lan download that bai (loi tam
+            thoi) toi da truoc khi danh dau that bai vinh vien.
+        DOWNLOAD_RETRY_BASE_SECONDS: Thoi gian cho truoc lan retry dau.
+        DOWNLOAD_RETRY_MAX_SECONDS: Tran thoi gian cho giua hai lan retry.
+        CIRCUIT_WINDOW_SECONDS: Cua so tinh ti le loi cua circuit breaker.
+        CIRCUIT_MIN_SAMPLES: So ket qua toi thieu truoc khi xet mo breaker.
+        CIRCUIT_FAILURE_RATIO: Ti le loi tam thoi de mo breaker (0-1).
+        CIRCUIT_OPEN_SECONDS: Thoi gian tam dung trich xuat khi breaker mo.
+        RECONCILE_BATCH_SIZE: So ban ghi/file doi soat moi lo khi startup.
+        RECONCILE_BATCH_PAUSE_SECONDS: Thoi gian nghi giua cac lo doi soat.
+        METADATA_PROVIDERS: Thu tu provider lay metadata bai hat, phan
+            cach bang dau phay (ytmusic, ytdlp). yt-dlp luon duoc dung
+            cuoi cung khi con thieu truong.
+        PREFETCH_ENABLED: Bat tai truoc cac bai tiep theo trong watch
+            playlist sau moi lan phat (mac dinh tat).
+        PREFETCH_DEPTH: So bai tiep theo tai truoc moi lan phat.
+        PREFETCH_CLIENT_TRACKS_PER_HOUR: Ngan sach prefetch moi client
+            (user hoac IP) trong 1 gio.
+        PREFETCH_GLOBAL_TRACKS_PER_HOUR: Ngan sach prefetch cua ca server
+            trong 1 gio.
+        PREFETCH_MIN_FREE_MB: Dung prefetch khi dung luong trong cua
+            AUDIO_DIRECTORY duoi nguong nay (MB).
+        AUDIO_QUOTA_BYTES: Dung luong toi da cua audio + thumbnail tren
+            disk (bytes); vuot qua thi xoa bai lau chua phat nhat
+            (0 = khong gioi han).
+        EVICTION_TARGET_RATIO: Sau khi xoa, dung luong xuong duoi
+            ``AUDIO_QUOTA_BYTES * ti le nay``.
+        EVICTION_INTERVAL_SECONDS: Chu ky kiem tra quota (giay).
+        PLAY_TRACKER_FLUSH_SECONDS: Chu ky ghi last_played_at xuong DB.
+        DELIVERY_MODE: Cach gui byte audio: ``app`` (Python tu stream),
+            ``x-accel-redirect`` (nginx) hoac ``x-sendfile`` (Apache) -
+            app chi xac thuc/tim file, reverse proxy gui file va xu ly
+            Range/304.
+        DELIVERY_ACCEL_PREFIX: Location ``internal`` cua nginx tro toi
+            AUDIO_DIRECTORY (dung voi ``x-accel-redirect``).
+        HOT_CACHE_MB: Dung luong RAM cho cache byte audio hot (0 = tat).
+        HOT_CACHE_ADMIT_HITS: So request gan day toi thieu truoc khi
+            nap bai vao cache.
+        HOT_CACHE_MAX_FILE_MB: Bai lon hon muc nay khong duoc cache.
+        MMAP_SERVING_ENABLED: Doc range audio qua mmap dung chung khi ASGI
+            server khong ho tro zero-copy (sendfile). Mac dinh tat: page
+            fault khi gui slice xay ra tren event loop, chi nen bat khi
+            thu vien nam tron trong page cache.
+        MMAP_MIN_FILE_MB: File nho hon muc nay doc bang pread, khong map.
     """
 
     PROJECT_NAME: str = "FastAPI Music API"
@@ -70,5 +146,142 @@ class Settings(BaseSettings):
     )
     ALLOW_ORIGINS: list[str] = []
 
+    # ── Download queue ──
+    DOWNLOAD_WORKERS: int = int(os.getenv("DOWNLOAD_WORKERS", "3"))
+    DOWNLOAD_INTERACTIVE_RESERVED: int = int(
+        os.getenv("DOWNLOAD_INTERACTIVE_RESERVED", "1")
+    )
+    DOWNLOAD_BULK_WORKERS: int = int(os.getenv("DOWNLOAD_BULK_WORKERS", "1"))
+    DOWNLOAD_QUEUE_MAXSIZE: int = int(
+        os.getenv("DOWNLOAD_QUEUE_MAXSIZE", "1000")
+    )
+    DOWNLOAD_QUEUE_POLL_SECONDS: int = int(
+        os.getenv("DOWNLOAD_QUEUE_POLL_SECONDS", "30")
+    )
+    DOWNLOAD_CLAIM_TTL_SECONDS: int = int(
+        os.getenv("DOWNLOAD_CLAIM_TTL_SECONDS", "180")
+    )
+    YTDLP_INFO_CACHE_TTL_SECONDS: int = int(
+        os.getenv("YTDLP_INFO_CACHE_TTL_SECONDS", "3600")
+    )
+    YTDLP_INFO_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("YTDLP_INFO_CACHE_MAX_ENTRIES", "256")
+    )
+
+    # ── Thread pools ──
+    PIPELINE_EXECUTOR_WORKERS: int = int(
+        os.getenv("PIPELINE_EXECUTOR_WORKERS", "4")
+    )
+    CONTROL_EXECUTOR_WORKERS: int = int(
+        os.getenv("CONTROL_EXECUTOR_WORKERS", "2")
+    )
+    THREADPOOL_WORKERS: int = int(os.getenv("THREADPOOL_WORKERS", "40"))
+
+    # ── Outbound rate limits ──
+    RATE_LIMIT_YTMUSIC_PER_SECOND: float = float(
+        os.getenv("RATE_LIMIT_YTMUSIC_PER_SECOND", "5")
+    )
+    RATE_LIMIT_YTMUSIC_BURST: int = int(
+        os.getenv("RATE_LIMIT_YTMUSIC_BURST", "10")
+    )
+    RATE_LIMIT_YOUTUBE_PER_SECOND: float = float(
+        os.getenv("RATE_LIMIT_YOUTUBE_PER_SECOND", "0.5")
+    )
+    RATE_LIMIT_YOUTUBE_BURST: int = int(
+        os.getenv("RATE_LIMIT_YOUTUBE_BURST", "3")
+    )
+    RATE_LIMIT_GOOGLEVIDEO_PER_SECOND: float = float(
+        os.getenv("RATE_LIMIT_GOOGLEVIDEO_PER_SECOND", "2")
+    )
+    RATE_LIMIT_GOOGLEVIDEO_BURST: int = int(
+        os.getenv("RATE_LIMIT_GOOGLEVIDEO_BURST", "4")
+    )
+    RATE_LIMIT_YTIMG_PER_SECOND: float = float(
+        os.getenv("RATE_LIMIT_YTIMG_PER_SECOND", "5")
+    )
+    RATE_LIMIT_YTIMG_BURST: int = int(
+        os.getenv("RATE_LIMIT_YTIMG_BURST", "10")
+    )
+    RATE_LIMIT_INTERACTIVE_PER_SECOND: float = float(
+        os.getenv("RATE_LIMIT_INTERACTIVE_PER_SECOND", "10")
+    )
+    RATE_LIMIT_INTERACTIVE_BURST: int = int(
+        os.getenv("RATE_LIMIT_INTERACTIVE_BURST", "20")
+    )
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = float(
+        os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "2")
+    )
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "")
+
+    # ── Retry & circuit breaker ──
+    DOWNLOAD_RETRY_MAX_ATTEMPTS: int = int(
+        os.getenv("DOWNLOAD_RETRY_MAX_ATTEMPTS", "5")
+    )
+    DOWNLOAD_RETRY_BASE_SECONDS: int = int(
+        os.getenv("DOWNLOAD_RETRY_BASE_SECONDS", "60")
+    )
+    DOWNLOAD_RETRY_MAX_SECONDS: int = int(
+        os.getenv("DOWNLOAD_RETRY_MAX_SECONDS", "3600")
+    )
+    CIRCUIT_WINDOW_SECONDS: int = int(
+        os.getenv("CIRCUIT_WINDOW_SECONDS", "300")
+    )
+    CIRCUIT_MIN_SAMPLES: int = int(os.getenv("CIRCUIT_MIN_SAMPLES", "5"))
+    CIRCUIT_FAILURE_RATIO: float = float(
+        os.getenv("CIRCUIT_FAILURE_RATIO", "0.5")
+    )
+    CIRCUIT_OPEN_SECONDS: int = int(os.getenv("CIRCUIT_OPEN_SECONDS", "300"))
+
+    # ── Startup reconciler ──
+    RECONCILE_BATCH_SIZE: int = int(os.getenv("RECONCILE_BATCH_SIZE", "200"))
+    RECONCILE_BATCH_PAUSE_SECONDS: float = float(
+        os.getenv("RECONCILE_BATCH_PAUSE_SECONDS", "0.5")
+    )
+
+    # ── Metadata providers ──
+    METADATA_PROVIDERS: str = os.getenv("METADATA_PROVIDERS", "ytmusic,ytdlp")
+
+    # ── Prefetch ──
+    PREFETCH_ENABLED: bool = (
+        os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+    )
+    PREFETCH_DEPTH: int = int(os.getenv("PREFETCH_DEPTH", "3"))
+    PREFETCH_CLIENT_TRACKS_PER_HOUR: int = int(
+        os.getenv("PREFETCH_CLIENT_TRACKS_PER_HOUR", "30")
+    )
+    PREFETCH_GLOBAL_TRACKS_PER_HOUR: int = int(
+        os.getenv("PREFETCH_GLOBAL_TRACKS_PER_HOUR", "300")
+    )
+    PREFETCH_MIN_FREE_MB: int = int(os.getenv("PREFETCH_MIN_FREE_MB", "1024"))
+
+    # ── Disk quota / eviction ──
+    AUDIO_QUOTA_BYTES: int = int(os.getenv("AUDIO_QUOTA_BYTES", "0"))
+    EVICTION_TARGET_RATIO: float = float(
+        os.getenv("EVICTION_TARGET_RATIO", "0.9")
+    )
+    EVICTION_INTERVAL_SECONDS: int = int(
+        os.getenv("EVICTION_INTERVAL_SECONDS", "600")
+    )
+    PLAY_TRACKER_FLUSH_SECONDS: int = int(
+        os.getenv("PLAY_TRACKER_FLUSH_SECONDS", "60")
+    )
+
+    # ── Audio delivery (offload sang reverse proxy) ──
+    DELIVERY_MODE: str = os.getenv("DELIVERY_MODE", "app").lower()
+    DELIVERY_ACCEL_PREFIX: str = os.getenv(
+        "DELIVERY_ACCEL_PREFIX", "/_protected/audio/"
+    )
+
+    # ── Hot audio cache (RAM) ──
+    HOT_CACHE_MB: int = int(os.getenv("HOT_CACHE_MB", "0"))
+    HOT_CACHE_ADMIT_HITS: int = int(os.getenv("HOT_CACHE_ADMIT_HITS", "4"))
+    HOT_CACHE_MAX_FILE_MB: int = int(os.getenv("HOT_CACHE_MAX_FILE_MB", "16"))
+
+    # ── mmap range serving ──
+    MMAP_SERVING_ENABLED: bool = (
+        os.getenv("MMAP_SERVING_ENABLED", "false").lower() == "true"
+    )
+    MMAP_MIN_FILE_MB: int = int(os.getenv("MMAP_MIN_FILE_MB", "1"))
+
 
 settings = Settings()
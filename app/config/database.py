@@ -4,7 +4,8 @@ Module nay chua:
 - Khoi tao SQLAlchemy engine (ho tro SQLite va PostgreSQL).
 - SessionLocal factory de tao database session.
 - Dependency ``get_db`` dung trong FastAPI Depends.
-- Ham tien ich: tao bang, kiem tra ket noi, lay thong tin DB.
+- Ham tien ich: tao bang, bo sung cot moi cho bang cu, kiem tra ket
+  noi, lay thong tin DB.
 
 Lien quan:
 - Config: config.py (doc DATABASE_URL)
@@ -16,7 +17,8 @@ import re
 import time
 
 # ── Third-party imports ───────────────────────────────────
-from sqlalchemy import create_engine, text
+from sqlalchemy import Enum as SQLEnum, create_engine, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -144,14 +146,116 @@ def get_db():
 # ── Table management ──────────────────────────────────────
 
 def create_tables():
-    """Tao tat ca cac bang da dang ky trong Base.metadata."""
+    """Tao tat ca cac bang da dang ky trong Base.metadata.
+
+    Sau do bo sung cac cot moi cho bang da ton tai (xem ``upgrade_schema``).
+    """
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
     print(
         f"Database tables created successfully "
         f"using {get_database_type()}"
     )
 
 
+def upgrade_schema() -> list[str]:
+    """Them cac cot va index co trong model nhung chua co trong bang cu.
+
+    ``create_all`` khong sua bang cu, nen cot moi (VD: cot retry cua
+    songs) duoc them bang ``ALTER TABLE ... ADD COLUMN`` sinh tu dinh
+    nghia Column theo dialect dang dung. Cot moi phai nullable hoac co
+    ``server_default`` de ap dung duoc tren bang da co du lieu.
+
+    Returns:
+        Danh sach "bang.cot" / "bang.index" vua duoc them.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {ddl}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(bind=connection)
+                    added.append(f"{table.name}.{index.name}")
+
+    added += _upgrade_enum_values(inspector, existing_tables)
+
+    for name in added:
+        print(f"Database schema upgraded: {name}")
+    return added
+
+
+def _upgrade_enum_values(inspector, existing_tables: set[str]) -> list[str]:
+    """Them gia tri enum moi (VD: ProcessingStatus.EVICTED) vao kieu ENUM native.
+
+    SQLite luu enum dang VARCHAR nen khong can lam gi. PostgreSQL dung
+    ``ALTER TYPE ... ADD VALUE`` (chay ngoai transaction), MySQL dinh
+    nghia lai cot ENUM bang ``MODIFY COLUMN``.
+
+    Returns:
+        Danh sach "kieu.gia_tri" / "bang.cot" vua duoc cap nhat.
+    """
+    added = []
+    enum_columns = [
+        (table, column)
+        for table in Base.metadata.sorted_tables
+        if table.name in existing_tables
+        for column in table.columns
+        if isinstance(column.type, SQLEnum)
+    ]
+    if not enum_columns:
+        return added
+
+    if engine.dialect.name == "postgresql":
+        labels = {e["name"]: set(e["labels"]) for e in inspector.get_enums()}
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            for _, column in enum_columns:
+                name = column.type.name
+                if name not in labels:
+                    continue
+                for value in column.type.enums:
+                    if value not in labels[name]:
+                        connection.execute(text(
+                            f"ALTER TYPE {name} ADD VALUE '{value}'"
+                        ))
+                        labels[name].add(value)
+                        added.append(f"{name}.{value}")
+
+    elif engine.dialect.name == "mysql":
+        with engine.begin() as connection:
+            for table, column in enum_columns:
+                current = {
+                    c["name"]: set(getattr(c["type"], "enums", ()))
+                    for c in inspector.get_columns(table.name)
+                }
+                if set(column.type.enums) <= current.get(column.name, set()):
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} MODIFY COLUMN {ddl}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
 def get_database_type() -> str:
     """Tra ve ten loai database dang su dung (VD: 'sqlite', 'postgresql')."""
     return engine.name
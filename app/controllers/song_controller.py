@@ -16,36 +16,59 @@ import asyncio
 import base64
 import hashlib
 import hmac
+import json
 import mimetypes
 import os
 import random
 import re
 import time
 import unicodedata
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import AsyncGenerator
+from urllib.parse import quote
 
 # ── Third-party imports ───────────────────────────────────
-import aiofiles
 import httpx
 import yt_dlp
-from fastapi import HTTPException, BackgroundTasks, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy import or_
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from unidecode import unidecode
 
 # ── Internal imports ──────────────────────────────────────
 from app.models.song import Song, ProcessingStatus
+from app.models.download_batch import DownloadBatch, DownloadBatchItem
 from app.schemas.base import ApiResponse
 from app.schemas.song import (
     SongInfoResponse, StatusResponse, APIResponse,
     CompletedSongResponse, CompletedSongsListResponse,
-    CompletedSongsQueryParams,
+    CompletedSongsQueryParams, BulkInfoRequest, BulkInfoResponse,
+    BatchStatusResponse, HotCacheStatsResponse, BULK_INFO_MAX_ITEMS,
 )
 from app.services.youtube_service import YouTubeService
+from app.services.download_queue import (
+    download_queue, LANE_BULK, LANE_INTERACTIVE,
+)
+from app.services.download_progress import download_progress
+from app.services.song_events import song_events, TERMINAL_STATUSES
+from app.services.live_downloads import live_downloads
+from app.services.retry_policy import CircuitOpenError
+from app.services.audio_index import audio_index
+from app.services.hot_cache import hot_cache
 from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.storage.paths import file_version, shard_prefix
+from app.internal.rfc.http_range.http_range import (
+    ByteRange, RangeNotSatisfiable, http_date, is_not_modified, make_etag,
+    plan_range,
+)
+from app.internal.utils.file_response import (
+    RangeFileResponse, RangeMemoryResponse,
+)
+from app.internal.utils.mmap_pool import mmap_pool
 
 
 class SongController:
@@ -60,6 +83,13 @@ class SongController:
         - Long-poll download cho co che proxy.
     """
 
+    # URL thuong co the tro toi file moi sau khi tai lai -> cache ngan;
+    # URL kem ?v= (phien ban file) khong bao gio doi noi dung
+    DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+    IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+    # DELIVERY_MODE giao viec gui file cho reverse proxy
+    OFFLOAD_MODES = ("x-accel-redirect", "x-sendfile")
+
     def __init__(self):
         self.youtube_service = YouTubeService()
         
@@ -208,27 +238,29 @@ class SongController:
         self,
         youtube_url: str,
         db: Session,
-        background_tasks: BackgroundTasks,
+        priority: str = LANE_INTERACTIVE,
     ) -> APIResponse:
-        """Lay thong tin bai hat va bat dau download trong background.
+        """Lay thong tin bai hat va dua vao hang doi download.
 
         Flow xu ly:
             1. Trich xuat video ID tu URL.
             2. Kiem tra ban ghi da ton tai trong DB.
             3. Neu song da COMPLETED -> tra ve ngay.
-            4. Neu chua -> lay metadata tu YouTube, tao ban ghi,
-               khoi dong background task download.
+            4. Neu chua -> lay metadata tu YouTube, tao ban ghi PENDING,
+               dua job vao download_queue (worker pool gioi han).
 
         Args:
             youtube_url: URL YouTube hop le.
             db: Database session.
-            background_tasks: FastAPI background task runner.
+            priority: Lane uu tien cua job download.
 
         Returns:
             APIResponse chua metadata bai hat.
 
         Raises:
             HTTPException 400: URL khong hop le hoac loi YouTube.
+            HTTPException 503: YouTube dang loi hang loat (circuit
+                breaker mo), kem header Retry-After.
         """
         try:
             video_id = self.youtube_service.extract_video_id(youtube_url)
@@ -261,6 +293,18 @@ class SongController:
             if not existing_song:
                 existing_song = db.query(Song).filter(Song.id == video_info['id']).first()
             
+            if existing_song and self.youtube_service.is_placeholder(
+                existing_song.id, existing_song.title, existing_song.duration
+            ):
+                # Ban ghi tao boi bulk-info -> dien metadata that vua lay
+                existing_song.title = video_info['title']
+                existing_song.artist = video_info['artist']
+                existing_song.thumbnail_url = video_info['thumbnail_url']
+                existing_song.duration = video_info['duration']
+                existing_song.duration_formatted = video_info['duration_formatted']
+                existing_song.keywords = ','.join(video_info['keywords'])
+                db.commit()
+
             if existing_song:
                 response_data = SongInfoResponse(
                     id=existing_song.id,
@@ -274,13 +318,25 @@ class SongController:
                     created_at=existing_song.created_at
                 )
                 
-                # Chua hoan thanh -> restart download
-                if existing_song.status != ProcessingStatus.COMPLETED:
-                    background_tasks.add_task(
-                        self.youtube_service.download_audio_and_thumbnail,
-                        existing_song.id,
-                        youtube_url,
-                        db
+                # Chua hoan thanh -> dua lai vao hang doi download.
+                # Bai PROCESSING da co worker giu claim, khong xep them;
+                # bai loi vinh vien (video rieng tu, da xoa) khong thu lai;
+                # bai FAILED chua toi next_retry_at thi cho backoff.
+                retry_due = (
+                    existing_song.next_retry_at is None
+                    or existing_song.next_retry_at <= datetime.utcnow()
+                )
+                if (
+                    existing_song.status in (
+                        ProcessingStatus.PENDING, ProcessingStatus.FAILED,
+                        ProcessingStatus.EVICTED,
+                    )
+                    and not existing_song.permanent_failure
+                    and (existing_song.status != ProcessingStatus.FAILED
+                         or retry_due)
+                ):
+                    download_queue.enqueue(
+                        existing_song.id, youtube_url, lane=priority,
                     )
             else:
                 new_song = Song(
@@ -311,25 +367,243 @@ class SongController:
                     created_at=new_song.created_at
                 )
                 
-
-                background_tasks.add_task(
-                    self.youtube_service.download_audio_and_thumbnail,
-                    new_song.id,
-                    youtube_url,
-                    db
+                download_queue.enqueue(
+                    new_song.id, youtube_url, lane=priority,
                 )
             
             return ApiResponse.ok(data=response_data.model_dump(), message="get info video success")
-            
+
+        except CircuitOpenError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=e.message,
+                headers={"Retry-After": str(int(e.retry_after) + 1)},
+            )
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to get video info: {str(e)}")
     
-    def get_song_status(self, song_id: str, db: Session) -> APIResponse:
+    async def bulk_get_song_info(
+        self, request_data: BulkInfoRequest, db: Session
+    ) -> APIResponse:
+        """Tao ban ghi hang loat cho danh sach URL/playlist va xep hang download.
+
+        Flow xu ly:
+            1. Mo rong playlist (tham so ``playlist`` hoac URL chi co
+               ``list=``) bang mot lan trich xuat flat moi playlist.
+            2. Trich xuat video ID tu URL, bo trung lap (giu thu tu).
+            3. Mot truy van IN lay cac bai da co trong DB.
+            4. Tao ban ghi PENDING cho bai moi, batch va cac item trong
+               cung mot transaction. Bai tu playlist co metadata that;
+               bai tu URL le dung metadata tam, duoc thay khi download.
+            5. Xep bai chua hoan thanh vao lane bulk; so job chay dong
+               thoi do worker pool cua download_queue gioi han.
+
+        Args:
+            request_data: Danh sach URL va/hoac playlist.
+            db: Database session.
+
+        Returns:
+            APIResponse chua BulkInfoResponse (batch_id de poll tien do).
+
+        Raises:
+            HTTPException 400: Khong co video hop le, playlist loi hoac
+                vuot qua ``BULK_INFO_MAX_ITEMS``.
+            HTTPException 503: Circuit breaker dang mo.
+        """
+        playlist_ids = []
+        video_urls = []
+        invalid = []
+
+        if request_data.playlist:
+            playlist_id = self.youtube_service.extract_playlist_id(
+                request_data.playlist
+            )
+            if not playlist_id:
+                raise HTTPException(status_code=400, detail="Playlist khong hop le")
+            playlist_ids.append(playlist_id)
+
+        for url in request_data.urls:
+            video_id = self.youtube_service.extract_video_id(url)
+            playlist_id = self.youtube_service.extract_playlist_id(url)
+            if video_id:
+                video_urls.append((video_id, url))
+            elif playlist_id and 'list=' in url:
+                playlist_ids.append(playlist_id)
+            else:
+                invalid.append(url)
+
+        # video_id -> metadata, giu thu tu xuat hien dau tien
+        videos: dict[str, dict] = {}
+        try:
+            for playlist_id in dict.fromkeys(playlist_ids):
+                entries = await self.youtube_service.get_playlist_entries(
+                    playlist_id, limit=BULK_INFO_MAX_ITEMS,
+                )
+                for info in entries:
+                    videos.setdefault(info['id'], info)
+        except CircuitOpenError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=e.message,
+                headers={"Retry-After": str(int(e.retry_after) + 1)},
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to expand playlist: {str(e)}")
+
+        for video_id, url in video_urls:
+            if video_id not in videos:
+                videos[video_id] = self.youtube_service.placeholder_video_info(video_id)
+
+        if not videos:
+            raise HTTPException(status_code=400, detail="Khong co video hop le")
+        if len(videos) > BULK_INFO_MAX_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Toi da {BULK_INFO_MAX_ITEMS} bai moi batch",
+            )
+
+        existing, new_songs = self._insert_missing_songs(db, videos)
+
+        batch = DownloadBatch(
+            id=str(uuid.uuid4()),
+            source=','.join(dict.fromkeys(playlist_ids)) or None,
+            total=len(videos),
+        )
+        db.add(batch)
+        db.add_all([
+            DownloadBatchItem(batch_id=batch.id, song_id=video_id, position=i)
+            for i, video_id in enumerate(videos)
+        ])
+        db.commit()
+
+        # Chi xep bai can download; bai PROCESSING da co worker giu claim
+        for video_id, info in videos.items():
+            song = existing.get(video_id)
+            if song is not None and (
+                song.status in (
+                    ProcessingStatus.COMPLETED, ProcessingStatus.PROCESSING,
+                )
+                or song.permanent_failure
+            ):
+                continue
+            url = song.original_url if song is not None else info['original_url']
+            download_queue.enqueue(video_id, url, lane=LANE_BULK)
+
+        response_data = BulkInfoResponse(
+            batch_id=batch.id,
+            total=len(videos),
+            created=len(new_songs),
+            existing=len(existing),
+            invalid=invalid,
+        )
+        return ApiResponse.ok(data=response_data.model_dump(), message="Batch created")
+
+    def _insert_missing_songs(
+        self, db: Session, videos: dict[str, dict], attempts: int = 3
+    ) -> tuple[dict[str, Song], list[Song]]:
+        """Tao ban ghi PENDING cho cac video chua co trong DB.
+
+        Kiem tra roi insert khong nguyen tu: request ``/info`` hoac
+        bulk-info khac co the vua tao cung bai. Khi do commit bao
+        IntegrityError -> rollback, doc lai va chi insert phan con thieu.
+
+        Returns:
+            Tuple (bai da co truoc: id -> Song, bai vua tao).
+
+        Raises:
+            HTTPException 409: Van xung dot sau ``attempts`` lan thu.
+        """
+        for _ in range(attempts):
+            existing = {
+                song.id: song
+                for song in db.query(Song).filter(Song.id.in_(list(videos)))
+            }
+            new_songs = [
+                Song(
+                    id=info['id'],
+                    title=info['title'],
+                    artist=info['artist'],
+                    thumbnail_url=info['thumbnail_url'],
+                    duration=info['duration'],
+                    duration_formatted=info['duration_formatted'],
+                    keywords=','.join(info['keywords']),
+                    original_url=info['original_url'],
+                    status=ProcessingStatus.PENDING,
+                )
+                for video_id, info in videos.items()
+                if video_id not in existing
+            ]
+            if not new_songs:
+                return existing, new_songs
+            db.add_all(new_songs)
+            try:
+                db.commit()
+                return existing, new_songs
+            except IntegrityError:
+                db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Bai hat dang duoc tao dong thoi, vui long thu lai",
+        )
+
+    def get_batch_status(self, batch_id: str, db: Session) -> APIResponse:
+        """Tong hop tien do cua mot batch bang mot truy van GROUP BY.
+
+        Args:
+            batch_id: ID batch tra ve tu bulk-info.
+            db: Database session.
+
+        Returns:
+            APIResponse chua BatchStatusResponse.
+
+        Raises:
+            HTTPException 404: Batch khong ton tai.
+        """
+        batch = db.query(DownloadBatch).filter(DownloadBatch.id == batch_id).first()
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+
+        rows = (
+            db.query(Song.status, Song.permanent_failure, func.count())
+            .select_from(DownloadBatchItem)
+            .join(Song, Song.id == DownloadBatchItem.song_id)
+            .filter(DownloadBatchItem.batch_id == batch_id)
+            .group_by(Song.status, Song.permanent_failure)
+            .all()
+        )
+        counts = {status: 0 for status in ProcessingStatus}
+        for status, permanent_failure, count in rows:
+            # Bai FAILED con cho retry tu dong van tinh la pending; bai
+            # da bi evict tung hoan thanh nen tinh la completed
+            if status == ProcessingStatus.FAILED and not permanent_failure:
+                status = ProcessingStatus.PENDING
+            elif status == ProcessingStatus.EVICTED:
+                status = ProcessingStatus.COMPLETED
+            counts[status] += count
+
+        completed = counts[ProcessingStatus.COMPLETED]
+        in_flight = (
+            counts[ProcessingStatus.PENDING]
+            + counts[ProcessingStatus.PROCESSING]
+        )
+        response_data = BatchStatusResponse(
+            batch_id=batch.id,
+            total=batch.total,
+            pending=counts[ProcessingStatus.PENDING],
+            processing=counts[ProcessingStatus.PROCESSING],
+            completed=completed,
+            failed=counts[ProcessingStatus.FAILED],
+            progress=completed / batch.total if batch.total else 1.0,
+            done=in_flight == 0,
+            created_at=batch.created_at,
+        )
+        return ApiResponse.ok(data=response_data.model_dump(), message="Batch status retrieved")
+
+    def get_song_status(self, song_id: str) -> APIResponse:
         """Lay trang thai xu ly hien tai cua bai hat.
 
         Args:
             song_id: YouTube video ID.
-            db: Database session.
 
         Returns:
             APIResponse chua trang thai va progress.
@@ -337,7 +611,41 @@ class SongController:
         Raises:
             HTTPException 404: Bai hat khong ton tai.
         """
-        song = db.query(Song).filter(Song.id == song_id).first()
+        status_data = self._build_status(song_id)
+        return ApiResponse.ok(data=status_data.model_dump(), message="Status retrieved successfully")
+
+    def get_hot_cache_stats(self) -> APIResponse:
+        """Lay so lieu hot audio cache (hit/miss, byte) de chon HOT_CACHE_MB.
+
+        Returns:
+            APIResponse chua HotCacheStatsResponse.
+        """
+        stats = HotCacheStatsResponse(**hot_cache.stats())
+        return ApiResponse.ok(data=stats.model_dump(), message="Hot cache stats retrieved successfully")
+
+    def _build_status(self, song_id: str) -> StatusResponse:
+        """Tao StatusResponse cho bai hat.
+
+        Job dang chay trong process nay duoc doc tu progress store
+        (bytes da tai, stage) ma khong truy van DB. Cac truong hop con
+        lai moi mo session ngan de doc ban ghi.
+
+        Raises:
+            HTTPException 404: Bai hat khong ton tai.
+        """
+        entry = download_progress.get(song_id)
+        if entry is not None:
+            return StatusResponse(
+                id=song_id,
+                status=ProcessingStatus.PROCESSING.value,
+                progress=entry["progress"],
+                stage=entry["stage"],
+                downloaded_bytes=entry["downloaded_bytes"],
+                total_bytes=entry["total_bytes"],
+                updated_at=entry["updated_at"],
+            )
+
+        song = self._load_song(song_id)
         
         if not song:
             raise HTTPException(status_code=404, detail="Song not found")
@@ -346,46 +654,192 @@ class SongController:
         if song.status == ProcessingStatus.PENDING:
             progress = 0.0
         elif song.status == ProcessingStatus.PROCESSING:
-            # Uoc luong 50% vi khong co progress chi tiet tu yt-dlp
+            # Job chay o process khac -> khong co tien do chi tiet, uoc luong 50%
             progress = 0.5
         elif song.status == ProcessingStatus.COMPLETED:
             progress = 1.0
-        elif song.status == ProcessingStatus.FAILED:
+        elif song.status in (ProcessingStatus.FAILED, ProcessingStatus.EVICTED):
             progress = 0.0
         
-        status_data = StatusResponse(
+        return StatusResponse(
             id=song.id,
-            status=song.status,
+            status=song.status.value,
             progress=progress,
             error_message=song.error_message,
+            attempts=song.attempts,
+            next_retry_at=song.next_retry_at,
+            permanent_failure=song.permanent_failure,
             audio_filename=song.audio_filename,
             thumbnail_filename=song.thumbnail_filename,
             updated_at=song.updated_at
         )
-        
-        return ApiResponse.ok(data=status_data.model_dump(), message="Status retrieved successfully")
+
+    def _is_stale_claim(self, song: Song) -> bool:
+        """True neu bai PROCESSING khong con heartbeat (worker da chet)."""
+        if song.status != ProcessingStatus.PROCESSING:
+            return False
+        stale_before = datetime.utcnow() - timedelta(
+            seconds=settings.DOWNLOAD_CLAIM_TTL_SECONDS
+        )
+        return song.updated_at < stale_before
+
+    @staticmethod
+    def _retry_in(song: Song) -> float | None:
+        """So giay toi lan retry tu dong cua bai FAILED (<= 0: da toi han).
+
+        None neu bai khong con duoc retry (loi vinh vien).
+        """
+        if song.permanent_failure:
+            return None
+        if song.next_retry_at is None:
+            return 0.0
+        return (song.next_retry_at - datetime.utcnow()).total_seconds()
+
+    def _requeue_missing_file(self, song: Song) -> Song:
+        """Tra bai COMPLETED mat file ve PENDING va xep lane interactive.
+
+        UPDATE co dieu kien ``audio_filename`` cu: neu pipeline vua ghi
+        file moi thi khong dong vao.
+
+        Returns:
+            Ban ghi doc lai sau khi cap nhat.
+        """
+        with SessionLocal() as db:
+            updated = db.query(Song).filter(
+                Song.id == song.id,
+                Song.status == ProcessingStatus.COMPLETED,
+                Song.audio_filename == song.audio_filename,
+            ).update(
+                {
+                    Song.status: ProcessingStatus.PENDING,
+                    Song.audio_filename: None,
+                    Song.completed_at: None,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        if updated:
+            print(f"[STREAM] File cua {song.id} khong con, tai lai")
+            audio_index.discard(song.id)
+            hot_cache.discard(song.id)
+            download_queue.enqueue(
+                song.id, song.original_url, lane=LANE_INTERACTIVE,
+            )
+        return self._load_song(song.id) or song
+
+    def _load_song(self, song_id: str) -> Song | None:
+        """Doc ban ghi Song bang session ngan (khong giu connection)."""
+        with SessionLocal() as db:
+            return db.query(Song).filter(Song.id == song_id).first()
+
+    async def stream_song_events(
+        self, song_id: str, request: Request
+    ) -> StreamingResponse:
+        """Day trang thai xu ly bai hat ve client qua Server-Sent Events.
+
+        Gui ngay trang thai hien tai, sau do moi lan pipeline chuyen
+        trang thai (tien do, completed, failed) thi gui them mot event.
+        Ket thuc stream khi bai hat COMPLETED/FAILED hoac client ngat.
+
+        Khi khong co event trong ``SSE_KEEPALIVE_SECONDS`` thi gui comment
+        keep-alive va kiem tra lai trang thai (job co the chay o worker
+        process khac nen event khong toi duoc process nay).
+
+        Args:
+            song_id: YouTube video ID.
+            request: HTTP request (de phat hien client ngat ket noi).
+
+        Returns:
+            StreamingResponse media_type text/event-stream.
+
+        Raises:
+            HTTPException 404: Bai hat khong ton tai.
+        """
+        SSE_KEEPALIVE_SECONDS = 15
+
+        # Subscribe truoc khi doc snapshot de khong lo event o giua
+        queue = song_events.subscribe(song_id)
+        try:
+            snapshot = self._build_status(song_id).model_dump(mode="json")
+        except Exception:
+            song_events.unsubscribe(song_id, queue)
+            raise
+
+        def format_event(data: dict) -> str:
+            return f"event: status\ndata: {json.dumps(data, default=str)}\n\n"
+
+        async def event_stream():
+            try:
+                yield format_event(snapshot)
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+
+                while not await request.is_disconnected():
+                    try:
+                        event = await asyncio.wait_for(
+                            queue.get(), SSE_KEEPALIVE_SECONDS
+                        )
+                    except asyncio.TimeoutError:
+                        current = self._build_status(song_id).model_dump(mode="json")
+                        if current["status"] in TERMINAL_STATUSES:
+                            yield format_event(current)
+                            return
+                        yield ": keep-alive\n\n"
+                        continue
+
+                    yield format_event(event)
+                    if event.get("status") in TERMINAL_STATUSES:
+                        return
+            finally:
+                song_events.unsubscribe(song_id, queue)
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                # Tat buffering cua nginx de event toi client ngay
+                "X-Accel-Buffering": "no",
+            },
+        )
         
     async def get_audio_file(self, song_id: str, db: Session):
         """Lay duong dan file audio da download de phuc vu streaming.
 
-        Thu nhieu pattern tim file: ten chinh xac tu DB,
-        them .m4a extension, glob theo song_id.
+        Tra cuu ``audio_index`` truoc (khong truy van DB, khong cham disk).
+        Neu chua co trong chi muc thi doc DB va thu nhieu pattern tim file:
+        ten chinh xac tu DB, them .m4a extension, glob theo song_id trong
+        thu muc shard cua bai; file tim duoc duoc dua vao chi muc.
+
+        Bai EVICTED (file da bi xoa de giu quota) duoc xep lai vao lane
+        interactive va tra ve None de caller cho nhu proxy-download.
 
         Args:
             song_id: YouTube video ID.
             db: Database session.
 
         Returns:
-            Dict chua file_path, file_size, safe_filename.
+            Dict chua file_path, file_size, mtime, safe_filename; None neu bai
+            dang duoc tai lai sau khi bi evict.
 
         Raises:
             HTTPException 400: Bai hat chua hoan thanh.
             HTTPException 404: Bai hat hoac file khong ton tai.
         """
+        entry = audio_index.get(song_id)
+        if entry is not None:
+            return self._audio_file_data(entry)
+
         song = db.query(Song).filter(Song.id == song_id).first()
         
         if not song:
             raise HTTPException(status_code=404, detail="Song not found")
+
+        if song.status == ProcessingStatus.EVICTED:
+            download_queue.enqueue(
+                song_id, song.original_url, lane=LANE_INTERACTIVE,
+            )
+            return None
         
         if song.status != ProcessingStatus.COMPLETED:
             raise HTTPException(
@@ -404,7 +858,7 @@ class SongController:
         if not song.audio_filename.endswith('.m4a'):
             possible_paths.append(audio_dir / f"{song.audio_filename}.m4a")
 
-        for audio_file in audio_dir.glob(f"{song_id}_*.m4a"):
+        for audio_file in (audio_dir / shard_prefix(song_id)).glob(f"{song_id}_*.m4a"):
             if audio_file.is_file():
                 possible_paths.append(audio_file)
 
@@ -413,23 +867,79 @@ class SongController:
                 audio_dir / song.audio_filename.replace('.m4a', '')
             )
 
-        file_path = None
         for path in possible_paths:
-            if path.exists() and path.is_file():
-                file_path = path
-                break
-        
-        if not file_path:
-            raise HTTPException(status_code=404, detail="Audio file not found on server")
-        
-        file_size = file_path.stat().st_size
-        safe_filename = self.sanitize_filename(song.title)
-        
+            if path.is_file():
+                entry = audio_index.put(song_id, path, song.title)
+                if entry is not None:
+                    return self._audio_file_data(entry)
+
+        raise HTTPException(status_code=404, detail="Audio file not found on server")
+
+    def _audio_file_data(self, entry) -> dict:
+        safe_filename = self.sanitize_filename(entry.title)
         return {
-            "file_path": file_path,
-            "file_size": file_size,
+            "file_path": entry.path,
+            "file_size": entry.size,
+            "mtime": entry.mtime,
             "safe_filename": f"{safe_filename}.m4a"
         }
+
+    async def stream_audio_file(
+        self, song_id: str, request: Request, db: Session,
+        download: bool = False, version: str | None = None,
+    ):
+        """Stream file audio da download (Range), tu tai lai neu bi evict.
+
+        File trong chi muc co the vua bi xoa/di chuyen (evict, tool
+        migrate_layout): khi mo file that bai thi bo entry va tim lai
+        theo duong cham mot lan.
+
+        Args:
+            song_id: YouTube video ID.
+            request: HTTP request (doc Range, If-None-Match... header).
+            db: Database session.
+            download: True de tai file, False de phat inline.
+            version: Phien ban file trong URL (``?v=``); khop file hien
+                tai thi cho client cache vinh vien (immutable).
+
+        Returns:
+            Response audio (200/206/304) voi Content-Disposition tuong ung.
+
+        Raises:
+            HTTPException 400/404: Bai chua hoan thanh hoac mat file.
+        """
+        for _ in range(2):
+            file_data = await self.get_audio_file(song_id, db)
+            if file_data is None:
+                # File da bi xoa de giu quota -> cho pipeline tai lai
+                return await self.proxy_download_audio(song_id, request)
+            try:
+                response = await self.stream_file_with_range(
+                    request,
+                    str(file_data["file_path"]),
+                    file_size=file_data["file_size"],
+                    mtime=file_data["mtime"],
+                    etag_key=song_id,
+                    cache_control=self._cache_control(
+                        file_data["file_path"], version
+                    ),
+                )
+            except FileNotFoundError:
+                audio_index.discard(song_id)
+                continue
+
+            disposition = "attachment" if download else "inline"
+            response.headers["Content-Disposition"] = (
+                f'{disposition}; filename="{file_data["safe_filename"]}"'
+            )
+            return response
+
+        raise HTTPException(status_code=404, detail="Audio file not found on server")
+
+    def _cache_control(self, file_path: Path, version: str | None) -> str:
+        if version and version == file_version(file_path.name):
+            return self.IMMUTABLE_CACHE_CONTROL
+        return self.DEFAULT_CACHE_CONTROL
     
     async def get_thumbnail_file(self, song_id: str, db: Session):
         """Lay file thumbnail tu disk hoac proxy tu YouTube.
@@ -505,22 +1015,59 @@ class SongController:
         
         raise HTTPException(status_code=404, detail="Thumbnail not available")
     
-    async def file_streamer(
-        self, file_path: Path, chunk_size: int = 262144
-    ) -> AsyncGenerator[bytes, None]:
-        """Stream file theo tung chunk (async generator).
+    async def stream_thumbnail(
+        self, song_id: str, request: Request, db: Session,
+        version: str | None = None,
+    ) -> Response:
+        """Tra thumbnail: file tren disk (co validator/304) hoac proxy.
 
         Args:
-            file_path: Duong dan file can stream.
-            chunk_size: Kich thuoc moi chunk (bytes). Mac dinh 256KB.
+            song_id: YouTube video ID.
+            request: HTTP request (doc If-None-Match, If-Modified-Since).
+            db: Database session.
+            version: Phien ban file trong URL (``?v=``), nhu audio.
+
+        Returns:
+            Response anh (200/304).
 
-        Yields:
-            Tung chunk bytes cua file.
+        Raises:
+            HTTPException 404: Khong co thumbnail.
         """
-        async with aiofiles.open(file_path, 'rb') as file:
-            while chunk := await file.read(chunk_size):
-                yield chunk
-    
+        thumbnail_data = await self.get_thumbnail_file(song_id, db)
+        disposition = f'inline; filename="{thumbnail_data["safe_filename"]}"'
+
+        # Proxy tu YouTube (chua co file tren server)
+        if thumbnail_data.get("proxy"):
+            return Response(
+                content=thumbnail_data["content"],
+                media_type=thumbnail_data["media_type"],
+                headers={
+                    "Content-Disposition": disposition,
+                    "Cache-Control": self.DEFAULT_CACHE_CONTROL,
+                },
+            )
+
+        file_path = thumbnail_data["file_path"]
+        stat = file_path.stat()
+        etag = make_etag(song_id, stat.st_size, stat.st_mtime)
+        headers = {
+            "Cache-Control": self._cache_control(file_path, version),
+            "ETag": etag,
+            "Last-Modified": http_date(stat.st_mtime),
+        }
+        if is_not_modified(request.headers, etag, stat.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        headers["Content-Length"] = str(stat.st_size)
+        headers["Content-Disposition"] = disposition
+        return RangeFileResponse(
+            str(file_path),
+            [ByteRange(0, stat.st_size - 1)] if stat.st_size else [],
+            headers=headers,
+            media_type=thumbnail_data["media_type"],
+            file_size=stat.st_size,
+        )
+
     async def get_completed_songs(
         self,
         db: Session,
@@ -606,8 +1153,13 @@ class SongController:
             )
 
             for song in completed_songs:
+                # ?v= (phien ban file) cho phep client cache vinh vien
                 audio_url = f"{base_url}/api/songs/download/{song.id}"
+                if song.audio_filename:
+                    audio_url += f"?v={file_version(song.audio_filename)}"
                 thumbnail_url = f"{base_url}/api/songs/thumbnail/{song.id}"
+                if song.thumbnail_filename:
+                    thumbnail_url += f"?v={file_version(song.thumbnail_filename)}"
 
                 keywords = [k.strip() for k in song.keywords.split(',') if k.strip()] if song.keywords else []
                 
@@ -747,130 +1299,287 @@ class SongController:
         return 0
 
 
-    async def proxy_download_audio(
-        self, song_id: str, request: Request, db: Session
-    ):
-        """Long-poll download: cho background task xong roi stream ve FE.
+    async def proxy_download_audio(self, song_id: str, request: Request):
+        """Long-poll download: cho job download xong roi stream ve FE.
 
         Flow xu ly:
-            1. Neu song da COMPLETED va file ton tai -> serve tu disk.
-            2. Neu chua -> poll DB moi 2s cho background task hoan thanh.
-            3. Timeout sau 3 phut (180s).
-
-        Loi ich: FE chi can 1 HTTP request duy nhat, nhan blob audio
-        hoan chinh (.m4a da qua FFmpeg), luu vao IndexedDB.
+            1. Neu bai con PENDING (hoac EVICTED: file da bi xoa de giu
+               quota) -> day job len lane interactive cua download_queue
+               de khong phai cho sau job import/prefetch.
+            2. Neu song da COMPLETED va file ton tai -> serve tu disk.
+            3. Neu pipeline trong process nay dang ghi file raw -> tee mode:
+               stream byte ngay khi chung duoc ghi, dung khi writer bao EOF.
+            4. Neu chua -> subscribe ``song_events`` va cho su kien tu
+               pipeline (bat dau ghi, completed, failed), khong poll DB.
+            5. Cu moi ``DB_RECHECK_SECONDS`` doc lai DB mot lan bang session
+               ngan, phong khi job chay o worker process khac.
+            6. Neu bai PROCESSING nhung claim da het han (process cu chet)
+               -> xep lai vao lane interactive de worker khac claim.
+            7. Bai FAILED con retry duoc -> xep lai lane interactive khi
+               toi ``next_retry_at`` (cho neu con trong thoi han); chi
+               tra 502 khi loi vinh vien hoac lan retry qua xa.
+            8. Bai COMPLETED nhung file mat/bi cat -> tra ve PENDING va
+               tai lai ngay, khong cho het thoi han.
+            9. Timeout sau 3 phut (180s).
+
+        Loi ich: FE chi can 1 HTTP request duy nhat, nhan blob audio va
+        luu vao IndexedDB; byte dau tien toi sau vai giay thay vi sau
+        download + remux. Request dang cho khong giu connection nao
+        trong pool.
+
+        Tee mode tra ve file raw (thuong la m4a DASH) voi status 200,
+        khong co Content-Length va khong ho tro Range. Ban .m4a hoan
+        chinh van duoc tao cho cac range request ve sau.
 
         Khong tu goi yt-dlp vi se gay dual download -> YouTube chan bot.
 
         Args:
             song_id: YouTube video ID.
             request: HTTP request.
-            db: Database session.
 
         Returns:
             StreamingResponse audio.
 
         Raises:
             HTTPException 404: Bai hat khong ton tai.
-            HTTPException 502: Download that bai.
+            HTTPException 502: Download that bai vinh vien, hoac lan retry
+                tiep theo nam ngoai thoi han cho (kem Retry-After).
             HTTPException 504: Timeout sau 3 phut.
         """
-        song = db.query(Song).filter(Song.id == song_id).first()
-        
-        if not song:
-            raise HTTPException(status_code=404, detail="Song not found")
-        
-
-        if song.status == ProcessingStatus.COMPLETED and song.audio_filename:
-            audio_dir = Path(settings.AUDIO_DIRECTORY)
-            file_path = audio_dir / song.audio_filename
-            
-            if file_path.exists() and file_path.stat().st_size > 1024:
-                return await self.stream_file_with_range(request, str(file_path))
-        
         MAX_WAIT_SECONDS = 180
-        POLL_INTERVAL = 2
-        waited = 0
-        
-        while waited < MAX_WAIT_SECONDS:
-            await asyncio.sleep(POLL_INTERVAL)
-            waited += POLL_INTERVAL
-            
+        DB_RECHECK_SECONDS = 15
 
-            db.expire(song)
-            db.refresh(song)
-            
-            if song.status == ProcessingStatus.COMPLETED and song.audio_filename:
-                audio_dir = Path(settings.AUDIO_DIRECTORY)
-                file_path = audio_dir / song.audio_filename
-                
-                if file_path.exists() and file_path.stat().st_size > 1024:
-                    return await self.stream_file_with_range(request, str(file_path))
-            
-            elif song.status == ProcessingStatus.FAILED:
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"Download thất bại: {song.error_message or 'Lỗi không xác định'}"
+        entry = audio_index.get(song_id)
+        if entry is not None:
+            try:
+                return await self.stream_file_with_range(
+                    request, str(entry.path),
+                    file_size=entry.size, mtime=entry.mtime,
+                    etag_key=song_id,
                 )
-        
+            except FileNotFoundError:
+                audio_index.discard(song_id)
+
+        queue = song_events.subscribe(song_id)
+        try:
+            song = self._load_song(song_id)
+            if not song:
+                raise HTTPException(status_code=404, detail="Song not found")
+
+            # Nguoi dung dang cho phat -> day job len lane interactive
+            if song.status in (ProcessingStatus.PENDING, ProcessingStatus.EVICTED):
+                download_queue.enqueue(
+                    song_id, song.original_url, lane=LANE_INTERACTIVE,
+                )
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + MAX_WAIT_SECONDS
+
+            while True:
+                # Lan retry cua bai FAILED con bao lau nua (None = khong cho)
+                retry_in = None
+                if song.status == ProcessingStatus.COMPLETED and song.audio_filename:
+                    file_path = Path(settings.AUDIO_DIRECTORY) / song.audio_filename
+                    if file_path.exists() and file_path.stat().st_size > 1024:
+                        return await self.stream_file_with_range(
+                            request, str(file_path), etag_key=song_id,
+                        )
+                    # DB noi COMPLETED nhung file mat -> tai lai ngay
+                    song = self._requeue_missing_file(song)
+
+                elif song.status == ProcessingStatus.FAILED:
+                    retry_in = self._retry_in(song)
+                    if song.permanent_failure or retry_in is None or (
+                        retry_in > deadline - loop.time()
+                    ):
+                        headers = None
+                        if retry_in is not None and not song.permanent_failure:
+                            headers = {"Retry-After": str(int(retry_in) + 1)}
+                        raise HTTPException(
+                            status_code=502,
+                            detail=f"Download thất bại: {song.error_message or 'Lỗi không xác định'}",
+                            headers=headers,
+                        )
+                    if retry_in <= 0:
+                        # Nguoi dung dang cho -> retry o lane interactive
+                        download_queue.enqueue(
+                            song_id, song.original_url, lane=LANE_INTERACTIVE,
+                        )
+
+                live = live_downloads.get(song_id)
+                if live is None and self._is_stale_claim(song):
+                    # Process giu claim da chet -> xep lai thay vi cho het 3 phut
+                    download_queue.enqueue(
+                        song_id, song.original_url, lane=LANE_INTERACTIVE,
+                    )
+                if live is not None and live.available:
+                    return StreamingResponse(
+                        live_downloads.follow(live),
+                        media_type=live.media_type,
+                        headers={
+                            "Cache-Control": "no-store",
+                            "X-Accel-Buffering": "no",
+                        },
+                    )
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                # Thuc day ca khi pipeline bao tien do de kiem tra tee mode;
+                # chi doc lai DB khi het thoi gian hoac job da ket thuc
+                timeout = min(DB_RECHECK_SECONDS, remaining)
+                if retry_in is not None and retry_in > 0:
+                    # Doc lai DB dung luc toi han retry de xep hang
+                    timeout = min(timeout, retry_in)
+                event = await song_events.wait_for(
+                    queue,
+                    statuses=(ProcessingStatus.PROCESSING.value, *TERMINAL_STATUSES),
+                    timeout=timeout,
+                )
+                if event is None or event["status"] in TERMINAL_STATUSES:
+                    song = self._load_song(song_id) or song
+        finally:
+            song_events.unsubscribe(song_id, queue)
 
         raise HTTPException(
             status_code=504,
-            detail="Timeout: background task chưa hoàn thành sau 3 phút"
+            detail="Timeout: job download chưa hoàn thành sau 3 phút"
         )
 
 
     async def stream_file_with_range(
         self, request: Request, file_path: str,
         chunk_size: int = 262144,
-    ):
-        """Stream file voi ho tro HTTP Range request.
-
-        Ho tro partial content (206) cho HTML5 audio seeking.
-        Neu khong co Range header, tra ve toan bo file (200).
+        file_size: int | None = None,
+        mtime: float | None = None,
+        etag_key: str = "",
+        cache_control: str = DEFAULT_CACHE_CONTROL,
+    ) -> Response:
+        """Stream file voi ho tro HTTP Range request (RFC 7233).
+
+        Ho tro range dong, range mo (``bytes=500-``), suffix range
+        (``bytes=-65536``, player mobile doc moov atom cuoi file), nhieu
+        range (``multipart/byteranges``) va ``If-Range``. Khong co Range
+        header (hoac Range sai cu phap / If-Range khong khop) thi tra ve
+        toan bo file (200).
+
+        Body gui bang ``RangeFileResponse``: slice cua mapping dung chung
+        (``mmap_pool``, file lon) hoac ``os.pread`` tren threadpool - day
+        la duong thuc te duoi uvicorn. Zero-copy (sendfile) chi co khi
+        ASGI server cai dat extension ``zerocopysend``/``pathsend`` (uvicorn
+        thi khong) hoac khi offload qua ``DELIVERY_MODE``. Bai hot
+        (``hot_cache``) duoc tra thang tu RAM. File duoc mo ngay (truoc khi tra
+        response) de caller bat duoc FileNotFoundError khi file vua bi xoa.
+
+        ``If-None-Match`` / ``If-Modified-Since`` khop ETag/Last-Modified
+        hien tai -> tra 304 ngay, khong mo file.
+
+        Voi ``DELIVERY_MODE`` offload, chi tra header X-Accel-Redirect /
+        X-Sendfile; reverse proxy gui file va tu xu ly Range/304.
 
         Args:
-            request: HTTP request (doc Range header).
+            request: HTTP request (doc Range, If-Range header).
             file_path: Duong dan file tren disk.
-            chunk_size: Kich thuoc moi chunk. Mac dinh 256KB.
+            chunk_size: Kich thuoc moi lan doc/gui o che do pread/mmap.
+                Mac dinh 256KB.
+            file_size: Kich thuoc da biet (tu chi muc); None -> stat file.
+            mtime: Thoi diem sua file da biet (tu chi muc); None -> stat file.
+            etag_key: Dinh danh file (song_id): dua vao ETag va la khoa
+                cua hot cache.
+            cache_control: Gia tri header Cache-Control.
 
         Returns:
-            StreamingResponse voi Content-Range header.
+            RangeFileResponse voi Content-Range, ETag, Last-Modified
+            header; Response 304; hoac Response offload rong.
 
         Raises:
-            HTTPException 416: Range khong hop le.
+            FileNotFoundError: File khong con tren disk.
+            HTTPException 416: Khong range nao nam trong file.
         """
-        file_size = os.path.getsize(file_path)
-        range_header = request.headers.get('range')
-        start = 0
-        end = file_size - 1
-
-        if range_header:
-
-            bytes_range = range_header.replace("bytes=", "").split("-")
-            if bytes_range[0]:
-                start = int(bytes_range[0])
-            if len(bytes_range) > 1 and bytes_range[1]:
-                end = int(bytes_range[1])
-            if start > end or end >= file_size:
-                raise HTTPException(status_code=416, detail="Requested Range Not Satisfiable")
-
-        async def file_iterator():
-            with open(file_path, "rb") as f:
-                f.seek(start)
-                bytes_to_read = end - start + 1
-                while bytes_to_read > 0:
-                    chunk = f.read(min(chunk_size, bytes_to_read))
-                    if not chunk:
-                        break
-                    yield chunk
-                    bytes_to_read -= len(chunk)
+        if settings.DELIVERY_MODE in self.OFFLOAD_MODES:
+            return self._offload_response(file_path, cache_control)
+
+        if file_size is None or mtime is None:
+            stat = os.stat(file_path)
+            file_size, mtime = stat.st_size, stat.st_mtime
+
+        etag = make_etag(etag_key, file_size, mtime)
+        validators = {
+            "Cache-Control": cache_control,
+            "ETag": etag,
+            "Last-Modified": http_date(mtime),
+        }
+        if is_not_modified(request.headers, etag, mtime):
+            return Response(status_code=304, headers=validators)
+
+        try:
+            plan = plan_range(
+                request.headers, file_size, "audio/mpeg",
+                etag=etag, last_modified=mtime,
+            )
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested Range Not Satisfiable",
+                headers={"Content-Range": f"bytes */{file_size}"},
+            )
 
         headers = {
-            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            **plan.headers,
+            **validators,
             "Accept-Ranges": "bytes",
-            "Content-Length": str(end - start + 1),
-            "Cache-Control": "public, max-age=3600"
         }
-        status_code = 206 if range_header else 200
-        return StreamingResponse(file_iterator(), status_code=status_code, headers=headers, media_type="audio/mpeg")
\ No newline at end of file
+        if etag_key:
+            first = next(
+                (seg for seg in plan.segments if isinstance(seg, ByteRange)), None
+            )
+            data = hot_cache.lookup(
+                etag_key, file_path, file_size, mtime,
+                int(plan.headers["Content-Length"]),
+                # Seek/doc moov atom khong phai luot phat moi
+                starts_play=first is not None and first.start == 0,
+                client=request.client.host if request.client else None,
+            )
+            if data is not None:
+                return RangeMemoryResponse(
+                    data, plan.segments,
+                    status_code=plan.status_code,
+                    headers=headers,
+                    media_type="audio/mpeg",
+                )
+
+        return RangeFileResponse(
+            file_path, plan.segments,
+            status_code=plan.status_code,
+            headers=headers,
+            media_type="audio/mpeg",
+            file_size=file_size,
+            chunk_size=chunk_size,
+            mtime=mtime,
+            mmap_pool=mmap_pool,
+        )
+
+    def _offload_response(self, file_path: str, cache_control: str) -> Response:
+        """Response rong kem header de nginx/Apache tu gui file audio.
+
+        Proxy chi giu lai mot so header cua app (Content-Type,
+        Content-Disposition, Cache-Control...) va tu tinh ETag,
+        Last-Modified, Range cho file.
+
+        Raises:
+            FileNotFoundError: File khong con tren disk.
+        """
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(file_path)
+
+        if settings.DELIVERY_MODE == "x-sendfile":
+            headers = {"X-Sendfile": os.path.abspath(file_path)}
+        else:
+            relpath = Path(os.path.relpath(file_path, settings.AUDIO_DIRECTORY))
+            location = settings.DELIVERY_ACCEL_PREFIX.rstrip("/")
+            headers = {
+                "X-Accel-Redirect": f"{location}/{quote(relpath.as_posix())}",
+            }
+        headers["Cache-Control"] = cache_control
+        return Response(headers=headers, media_type="audio/mpeg")
\ No newline at end of file
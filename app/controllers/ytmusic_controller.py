@@ -13,17 +13,27 @@ Lien quan:
 from fastapi import HTTPException
 
 # ── Internal imports ──────────────────────────────────────
+from app.services.rate_limiter import RateLimitExceeded
 from app.services.ytmusic_service import YTMusicService
 
 # Instance dung chung — YTMusicService la stateless
 yt_service = YTMusicService()
 
 
+def _too_many_requests(e: RateLimitExceeded) -> HTTPException:
+    """Het luot request toi YouTube Music -> 429 kem Retry-After."""
+    return HTTPException(
+        status_code=429,
+        detail=e.message,
+        headers={"Retry-After": str(int(e.retry_after) + 1)},
+    )
+
+
 class YTMusicController:
     """Dieu phoi request tu route xuong YTMusicService.
 
     Moi method boc service call trong try/except de chuyen
-    exception thanh HTTP 500 response.
+    exception thanh HTTP 500 response (429 khi het luot rate limit).
     """
 
     def get_search_suggestions(self, query: str):
@@ -37,6 +47,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_search_suggestions(query)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -51,6 +63,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_related_songs(browseId)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -65,6 +79,8 @@ class YTMusicController:
         """
         try:
             return yt_service.stream_audio(song_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -83,6 +99,8 @@ class YTMusicController:
         """
         try:
             return yt_service.search(query, filter, limit)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -97,6 +115,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_song(song_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -111,6 +131,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_album(album_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -125,6 +147,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_playlist(playlist_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -139,6 +163,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_artist(artist_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -153,6 +179,8 @@ class YTMusicController:
         """
         try:
             return yt_service.get_lyrics(song_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -170,6 +198,8 @@ class YTMusicController:
             return yt_service.get_top_songs(
                 limit=limit, country=country
             )
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -184,5 +214,7 @@ class YTMusicController:
         """
         try:
             return yt_service.get_playlist_with_song(song_id)
+        except RateLimitExceeded as e:
+            raise _too_many_requests(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
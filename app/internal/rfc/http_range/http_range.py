@@ -0,0 +1,311 @@
+"""Xu ly HTTP Range request theo RFC 7233 cho file tren disk.
+
+Module nay chua:
+- ``parse_range``: doc header ``Range`` (range dong, range mo
+  ``bytes=500-``, suffix range ``bytes=-65536``, nhieu range).
+- ``coalesce``: gop cac range chong nhau hoac cach nhau mot khoang nho
+  hon chi phi gui them mot part multipart.
+- ``if_range_allows``: kiem tra ``If-Range`` (ETag manh hoac HTTP-date).
+- ``plan_range``: quyet dinh status (200/206), header va danh sach
+  segment (bytes co dinh hoac doan file) cua body, ke ca
+  ``multipart/byteranges``.
+- ``make_etag`` / ``http_date``: validator cua file (song_id + size +
+  mtime).
+- ``is_not_modified``: kiem tra ``If-None-Match`` / ``If-Modified-Since``
+  (RFC 7232) de tra 304 ma khong mo file.
+
+Header Range sai cu phap hoac khong phai don vi ``bytes`` bi bo qua
+(tra ve ca file) thay vi bao loi. Range dung cu phap nhung khong doan
+nao nam trong file thi raise ``RangeNotSatisfiable`` (416).
+
+Lien quan:
+- Response:   app/internal/utils/file_response.py (gui segment)
+- Controller: app/controllers/song_controller.py (stream_file_with_range)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Mapping, NamedTuple, Optional, Tuple, Union
+
+# So byte-range-spec toi da doc tu mot header (chong header qua dai)
+MAX_RANGE_SPECS = 100
+# So part toi da sau khi gop; nhieu hon thi tra ca file
+MAX_RANGES = 16
+# Khoang trong toi da giua hai range van gop lam mot (~ header mot part)
+COALESCE_GAP = 80
+
+
+class ByteRange(NamedTuple):
+    """Doan byte ``[start, end]`` (bao gom ca hai dau)."""
+
+    start: int
+    end: int
+
+
+# Segment cua body: bytes gui nguyen van hoac doan file can doc
+Segment = Union[bytes, ByteRange]
+
+
+class RangeNotSatisfiable(Exception):
+    """Khong range nao trong header nam trong file (HTTP 416).
+
+    Attributes:
+        size: Kich thuoc file (cho header ``Content-Range: bytes */size``).
+    """
+
+    def __init__(self, size: int) -> None:
+        super().__init__(f"Requested Range Not Satisfiable (size={size})")
+        self.size = size
+
+
+class RangePlan:
+    """Ket qua ``plan_range``: cach tra loi mot request.
+
+    Attributes:
+        status_code: 200 (ca file) hoac 206 (mot/nhieu range).
+        headers: Content-Length, Content-Range hoac Content-Type
+            multipart tuong ung.
+        segments: Noi dung body theo thu tu gui.
+    """
+
+    def __init__(
+        self, status_code: int, headers: dict, segments: List[Segment]
+    ) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.segments = segments
+
+
+# ── Validators ────────────────────────────────────────────
+
+def make_etag(key: str, size: int, mtime: float) -> str:
+    """ETag manh cua file ``key`` suy ra tu kich thuoc va mtime (micro giay)."""
+    return f'"{key}-{size:x}-{int(mtime * 1_000_000):x}"'
+
+
+def http_date(timestamp: float) -> str:
+    """Dinh dang HTTP-date (IMF-fixdate), VD: ``Sun, 06 Nov 1994 08:49:37 GMT``."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def if_range_allows(
+    if_range: Optional[str], etag: Optional[str], last_modified: Optional[float]
+) -> bool:
+    """Kiem tra ``If-Range``: True neu van duoc tra range.
+
+    ETag phai so sanh manh (ETag yeu ``W/`` khong bao gio khop). Ngay
+    phai trung dung giay voi Last-Modified hien tai.
+    """
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and not etag.startswith("W/") and if_range == etag
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_range)
+    except (TypeError, ValueError):
+        return False
+    return int(since.timestamp()) == int(last_modified)
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str], etag: str, last_modified: float
+) -> bool:
+    """Kiem tra request GET co dieu kien: True neu tra 304 duoc.
+
+    ``If-None-Match`` so sanh yeu (bo ``W/``) va duoc uu tien; chi khi
+    khong co no moi xet ``If-Modified-Since``.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _opaque_tag(etag)
+        return any(
+            _opaque_tag(tag.strip()) == current
+            for tag in if_none_match.split(",")
+        )
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return int(last_modified) <= since.timestamp()
+
+
+# ── Parsing ───────────────────────────────────────────────
+
+def _is_digits(value: str, allow_empty: bool = False) -> bool:
+    """Chi gom chu so ASCII (``str.isdigit`` nhan ca ky tu nhu "²")."""
+    if not value:
+        return allow_empty
+    return value.isascii() and value.isdigit()
+
+
+def parse_range(header: str, size: int) -> Optional[List[ByteRange]]:
+    """Doc header ``Range`` thanh danh sach doan byte trong file.
+
+    Args:
+        header: Gia tri header ``Range``.
+        size: Kich thuoc file.
+
+    Returns:
+        Cac doan thoa man (chua gop), theo thu tu trong header; None neu
+        header sai cu phap, khong phai ``bytes`` hoac qua nhieu range
+        (caller tra ve ca file).
+
+    Raises:
+        RangeNotSatisfiable: Header hop le nhung khong doan nao nam
+            trong file.
+    """
+    unit, sep, spec = header.partition("=")
+    if not sep or unit.strip().lower() != "bytes":
+        return None
+
+    items = [item.strip() for item in spec.split(",")]
+    items = [item for item in items if item]
+    if not items or len(items) > MAX_RANGE_SPECS:
+        return None
+
+    ranges = []
+    for item in items:
+        first, dash, last = item.partition("-")
+        first, last = first.strip(), last.strip()
+        if not dash or not _is_digits(first, True) or not _is_digits(last, True):
+            return None
+
+        if not first:
+            # Suffix range: N byte cuoi file
+            if not last:
+                return None
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append(ByteRange(max(0, size - length), size - 1))
+            continue
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            end = int(last) if last else size - 1
+            ranges.append(ByteRange(start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable(size)
+    return ranges
+
+
+def coalesce(ranges: List[ByteRange], gap: int = COALESCE_GAP) -> List[ByteRange]:
+    """Gop cac doan chong nhau/sat nhau (sap xep tang dan theo start)."""
+    merged: List[ByteRange] = []
+    for current in sorted(ranges):
+        if merged and current.start <= merged[-1].end + 1 + gap:
+            last = merged[-1]
+            merged[-1] = ByteRange(last.start, max(last.end, current.end))
+        else:
+            merged.append(current)
+    return merged
+
+
+# ── Planning ──────────────────────────────────────────────
+
+def content_range(byte_range: ByteRange, size: int) -> str:
+    """Gia tri header Content-Range, VD: ``bytes 0-99/5000``."""
+    return f"bytes {byte_range.start}-{byte_range.end}/{size}"
+
+
+def _multipart(
+    ranges: List[ByteRange], size: int, content_type: str
+) -> Tuple[str, List[Segment], int]:
+    boundary = uuid.uuid4().hex
+    segments: List[Segment] = []
+    length = 0
+    for index, byte_range in enumerate(ranges):
+        # CRLF truoc delimiter thuoc ve delimiter (tru part dau tien)
+        prefix = "\r\n" if index else ""
+        head = (
+            f"{prefix}--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: {content_range(byte_range, size)}\r\n\r\n"
+        ).encode("latin-1")
+        segments += [head, byte_range]
+        length += len(head) + byte_range.end - byte_range.start + 1
+    tail = f"\r\n--{boundary}--\r\n".encode("latin-1")
+    segments.append(tail)
+    return boundary, segments, length + len(tail)
+
+
+def plan_range(
+    request_headers: Mapping[str, str],
+    size: int,
+    content_type: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[float] = None,
+) -> RangePlan:
+    """Quyet dinh cach tra loi request doc file co the kem ``Range``.
+
+    Args:
+        request_headers: Header cua request (doc Range, If-Range).
+        size: Kich thuoc file.
+        content_type: Content-Type cua file (dung trong tung part).
+        etag: ETag hien tai cua file (cho If-Range).
+        last_modified: mtime hien tai cua file (cho If-Range).
+
+    Returns:
+        RangePlan 200 (ca file) hoac 206 (mot range / multipart).
+
+    Raises:
+        RangeNotSatisfiable: Khong range nao nam trong file.
+    """
+    full = RangePlan(
+        200,
+        {"Content-Length": str(size)},
+        [ByteRange(0, size - 1)] if size > 0 else [],
+    )
+    if size > 0:
+        # Giu Content-Range ca voi 200 nhu truoc (player cu dua vao no)
+        full.headers["Content-Range"] = content_range(ByteRange(0, size - 1), size)
+
+    header = request_headers.get("range")
+    if not header or not if_range_allows(
+        request_headers.get("if-range"), etag, last_modified
+    ):
+        return full
+
+    ranges = parse_range(header, size)
+    if ranges is None:
+        return full
+    ranges = coalesce(ranges)
+    if len(ranges) > MAX_RANGES:
+        return full
+
+    if len(ranges) == 1:
+        byte_range = ranges[0]
+        return RangePlan(
+            206,
+            {
+                "Content-Range": content_range(byte_range, size),
+                "Content-Length": str(byte_range.end - byte_range.start + 1),
+            },
+            [byte_range],
+        )
+
+    boundary, segments, length = _multipart(ranges, size, content_type)
+    return RangePlan(
+        206,
+        {
+            "Content-Type": f"multipart/byteranges; boundary={boundary}",
+            "Content-Length": str(length),
+        },
+        segments,
+    )
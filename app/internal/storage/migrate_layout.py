@@ -0,0 +1,134 @@
+"""Chuyen file audio/thumbnail nam phang sang bo cuc thu muc shard.
+
+Chay truc tuyen (server van phuc vu) bang:
+
+    python -m app.internal.storage.migrate_layout [--batch-size 200]
+        [--pause 0.2] [--dry-run]
+
+Moi file duoc chuyen theo thu tu an toan cho reader dang chay:
+    1. Tao hard link (hoac ban sao neu khong link duoc) tai vi tri shard.
+    2. UPDATE cot filename co dieu kien gia tri cu: neu pipeline vua ghi
+       file moi cho bai thi bo qua va xoa ban link.
+    3. Xoa file cu. Reader da mo file cu van doc tiep binh thuong.
+
+Chay lai nhieu lan khong sao: file da o vi tri shard duoc bo qua.
+
+Lien quan:
+- Paths:      app/internal/storage/paths.py
+- Reconciler: app/services/reconciler.py (don file mo coi con sot)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.storage.paths import sharded_relpath
+from app.models.song import Song
+
+
+def _move_into_shard(base_dir: Path, old: str, new: str) -> bool:
+    """Tao file tai vi tri shard (link/copy), tra ve False neu file cu mat."""
+    src, dst = base_dir / old, base_dir / new
+    if not src.is_file():
+        return False
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if not dst.exists():
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+        # Link/ban sao mang mtime cu -> reconciler coi la file mo coi qua
+        # han grace; lam moi mtime de no bo qua trong luc dang chuyen
+        os.utime(dst)
+    return True
+
+
+def migrate_batch(after_id: str, batch_size: int, dry_run: bool = False):
+    """Chuyen file cua mot lo bai hat (duyet theo keyset tren Song.id).
+
+    Returns:
+        Tuple (id cuoi cua lo hoac None neu het, so file da chuyen).
+    """
+    columns = (
+        (Song.audio_filename, Path(settings.AUDIO_DIRECTORY)),
+        (Song.thumbnail_filename, Path(settings.THUMBNAIL_DIRECTORY)),
+    )
+    moved = 0
+
+    with SessionLocal() as db:
+        rows = (
+            db.query(Song.id, Song.audio_filename, Song.thumbnail_filename)
+            .filter(Song.id > after_id)
+            .order_by(Song.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return None, 0
+
+        for song_id, *filenames in rows:
+            for (column, base_dir), old in zip(columns, filenames):
+                if not old:
+                    continue
+                new = sharded_relpath(song_id, old)
+                if new == old:
+                    continue
+                if dry_run:
+                    print(f"[LAYOUT] {old} -> {new}")
+                    moved += 1
+                    continue
+                if not _move_into_shard(base_dir, old, new):
+                    continue
+
+                updated = db.query(Song).filter(
+                    Song.id == song_id, column == old,
+                ).update({column: new}, synchronize_session=False)
+                db.commit()
+
+                if updated:
+                    (base_dir / old).unlink(missing_ok=True)
+                    moved += 1
+                else:
+                    (base_dir / new).unlink(missing_ok=True)
+
+    next_id = rows[-1][0] if len(rows) == batch_size else None
+    return next_id, moved
+
+
+def migrate_layout(
+    batch_size: int = 200, pause: float = 0.2, dry_run: bool = False
+) -> int:
+    """Chuyen toan bo thu vien sang bo cuc shard.
+
+    Returns:
+        So file da chuyen (hoac se chuyen neu ``dry_run``).
+    """
+    total = 0
+    last_id = ""
+    while last_id is not None:
+        last_id, moved = migrate_batch(last_id, batch_size, dry_run)
+        total += moved
+        if moved:
+            print(f"[LAYOUT] Da chuyen {total} file")
+        if last_id is not None:
+            time.sleep(pause)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Chuyen file audio/thumbnail sang thu muc shard"
+    )
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.2)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    count = migrate_layout(args.batch_size, args.pause, args.dry_run)
+    print(f"[LAYOUT] Hoan tat: {count} file")
@@ -0,0 +1,55 @@
+"""Bo cuc thu muc shard cho file audio va thumbnail.
+
+Module nay chua:
+- ``shard_prefix``: thu muc con 2 cap (``ab/cd``) suy ra tu song ID.
+- ``audio_relpath`` / ``thumbnail_relpath``: duong dan tuong doi (so voi
+  AUDIO_DIRECTORY / THUMBNAIL_DIRECTORY) cua file moi, luu vao cot
+  ``audio_filename`` / ``thumbnail_filename``.
+- ``sharded_relpath``: vi tri shard cua mot file cu nam phang.
+- ``file_version``: phien ban noi dung cua file (cho URL ``?v=``).
+
+Moi thu muc la chi chua file cua mot phan 65536 thu vien, nen tra cuu
+mot file chi doc mot thu muc nho thay vi quet ca thu vien. Tien to lay
+tu hash hex cua ID (khong lay ky tu dau cua ID) de phan bo deu va khong
+trung thu muc tren he thong file khong phan biet hoa thuong.
+
+Lien quan:
+- Service:    app/services/youtube_service.py (ghi file moi)
+- Controller: app/controllers/song_controller.py (tim file)
+- Tool:       app/internal/storage/migrate_layout.py (chuyen file cu)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import hashlib
+from pathlib import PurePosixPath
+
+
+def shard_prefix(song_id: str) -> str:
+    """Thu muc shard cua bai hat, VD: "3f/a2"."""
+    digest = hashlib.md5(song_id.encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+def audio_relpath(song_id: str, timestamp: int, suffix: str = ".m4a") -> str:
+    """Duong dan tuong doi cua file audio moi: ``ab/cd/{id}_{ts}.m4a``."""
+    return f"{shard_prefix(song_id)}/{song_id}_{timestamp}{suffix}"
+
+
+def thumbnail_relpath(song_id: str, timestamp: int, extension: str) -> str:
+    """Duong dan tuong doi cua file thumbnail moi: ``ab/cd/{id}_{ts}.jpg``."""
+    return f"{shard_prefix(song_id)}/{song_id}_{timestamp}{extension}"
+
+
+def sharded_relpath(song_id: str, filename: str) -> str:
+    """Vi tri shard cua ``filename`` (giu nguyen ten file)."""
+    return f"{shard_prefix(song_id)}/{PurePosixPath(filename).name}"
+
+
+def file_version(filename: str) -> str:
+    """Phien ban noi dung cua file: ten file bo phan mo rong.
+
+    Ten file moi chua timestamp luc tai va khong bao gio bi ghi de bang
+    noi dung khac (tai lai -> ten moi), nen URL kem ``?v=`` nay co the
+    cache vinh vien.
+    """
+    return PurePosixPath(filename).stem
@@ -0,0 +1,120 @@
+"""Thread pool rieng cho pipeline download, tach khoi threadpool cua request.
+
+Module nay chua:
+- ``get_pipeline_executor``: ThreadPoolExecutor danh cho cac lenh
+  blocking cua pipeline (yt-dlp Python API, tai thumbnail bang requests).
+- ``run_in_pipeline``: chay mot ham blocking tren executor do tu coroutine.
+- ``get_control_executor`` / ``run_in_control``: executor nho rieng cho
+  thao tac ngan phai dung hen (heartbeat claim, chuyen trang thai trong
+  DB, ghi chunk vao file spool).
+- ``configure_threadpool``: dat kich thuoc threadpool AnyIO ma Starlette
+  dung cho route ``def`` va dependency dong bo.
+- ``shutdown_executors``: dong executor khi tat ung dung.
+
+Default executor cua asyncio va threadpool AnyIO dung chung voi cac route
+dong bo (``/ytmusic/*``, favorites...). Neu pipeline chay tren do, vai job
+download dong thoi co the chiem het thread va lam cac route khac phai cho.
+
+Tuong tu, vai lenh yt-dlp cham co the chiem het pipeline executor; neu
+heartbeat phai xep hang sau chung thi claim het han va worker khac claim
+lai bai dang tai. Vi vay heartbeat/ghi spool chay tren control executor.
+Khong ham nao duoc ngu cho (rate limit...) tren ca hai executor: xin luot
+bang ``await rate_limiter.acquire`` truoc khi dua viec sang.
+
+Lien quan:
+- Service:    app/services/youtube_service.py (run_in_pipeline)
+- Entrypoint: main.py (configure_threadpool, shutdown_executors)
+- Config:     app/config/config.py (PIPELINE_EXECUTOR_WORKERS,
+  CONTROL_EXECUTOR_WORKERS, THREADPOOL_WORKERS)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+# ── Third-party imports ───────────────────────────────────
+import anyio.to_thread
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+
+T = TypeVar("T")
+
+
+_pipeline_executor: Optional[ThreadPoolExecutor] = None
+_control_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_pipeline_executor() -> ThreadPoolExecutor:
+    """Lay (tao lan dau) executor cua pipeline download."""
+    global _pipeline_executor
+    if _pipeline_executor is None:
+        _pipeline_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.PIPELINE_EXECUTOR_WORKERS),
+            thread_name_prefix="pipeline",
+        )
+    return _pipeline_executor
+
+
+async def run_in_pipeline(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Chay ham blocking tren executor cua pipeline va cho ket qua.
+
+    Args:
+        func: Ham dong bo can chay.
+        *args: Tham so vi tri cho ``func``.
+        **kwargs: Tham so keyword cho ``func``.
+
+    Returns:
+        Gia tri ``func`` tra ve.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_pipeline_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def get_control_executor() -> ThreadPoolExecutor:
+    """Lay (tao lan dau) executor cho thao tac ngan cua pipeline."""
+    global _control_executor
+    if _control_executor is None:
+        _control_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.CONTROL_EXECUTOR_WORKERS),
+            thread_name_prefix="control",
+        )
+    return _control_executor
+
+
+async def run_in_control(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Nhu ``run_in_pipeline`` nhung tren control executor.
+
+    Chi dung cho thao tac ngan, khong ngu cho (UPDATE mot dong, ghi mot
+    chunk), de khong bao gio phai xep hang sau yt-dlp.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_control_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def configure_threadpool() -> None:
+    """Dat so thread toi da cho route/dependency dong bo cua Starlette.
+
+    Phai goi tu event loop (lifespan startup). Gia tri <= 0 giu mac
+    dinh cua AnyIO (40 thread).
+    """
+    if settings.THREADPOOL_WORKERS > 0:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = settings.THREADPOOL_WORKERS
+
+
+def shutdown_executors() -> None:
+    """Dong pipeline/control executor, huy cac job chua bat dau chay."""
+    global _pipeline_executor, _control_executor
+    if _pipeline_executor is not None:
+        _pipeline_executor.shutdown(wait=False, cancel_futures=True)
+        _pipeline_executor = None
+    if _control_executor is not None:
+        _control_executor.shutdown(wait=False, cancel_futures=True)
+        _control_executor = None
@@ -0,0 +1,266 @@
+"""Response phuc vu cac doan byte cua file tren disk, khong chan event loop.
+
+Module nay chua:
+- ``RangeFileResponse``: gui danh sach segment (bytes co dinh hoac doan
+  ``ByteRange`` cua file da mo san) theo ``RangePlan`` cua
+  app/internal/rfc/http_range.
+- ``RangeMemoryResponse``: nhu tren nhung doan byte lay tu noi dung da
+  nam trong RAM (hot cache) bang ``memoryview`` slice, khong syscall.
+
+Thu tu cach gui doan file, tuy ASGI server ho tro extension nao:
+    1. ``http.response.zerocopysend``: dua file descriptor cho server goi
+       ``sendfile`` (kernel copy thang file -> socket, khong qua Python).
+    2. ``http.response.pathsend``: server tu mo va gui ca file (chi dung
+       khi body la toan bo file).
+    3. ``mmap_pool`` (neu caller truyen vao, pool bat va file du lon): gui
+       ``memoryview`` slice cua mapping dung chung, khong tao ``bytes``
+       moi cho moi chunk. Page cua moi chunk duoc nap tren threadpool
+       truoc khi gui de page fault khong chan event loop.
+    4. Con lai: doc bang ``os.pread`` tren threadpool cua AnyIO theo tung
+       chunk. Moi chunk mot syscall, khong seek, khong lam event loop
+       phai cho disk.
+
+Uvicorn (server cua repo: main.py, gunicorn UvicornWorker) khong cung cap
+extension 1 va 2, nen khi chay bang uvicorn body luon di qua buoc 3/4:
+moi byte van duoc copy qua Python, KHONG co zero-copy. Nhanh 1/2 chi co
+tac dung voi ASGI server co cai dat cac extension nay; muon kernel gui
+file thang ma van dung uvicorn thi dung ``DELIVERY_MODE`` offload
+(nginx X-Accel-Redirect / Apache X-Sendfile).
+
+File duoc mo ngay khi tao response de caller bat duoc
+FileNotFoundError (file vua bi evict/di chuyen) truoc khi gui header.
+File descriptor dong khi gui xong hoac khi client ngat ket noi.
+
+Lien quan:
+- Range:      app/internal/rfc/http_range/http_range.py (RangePlan)
+- mmap:       app/internal/utils/mmap_pool.py
+- Controller: app/controllers/song_controller.py (stream_file_with_range)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import mmap
+import os
+from typing import BinaryIO, List, Mapping, Optional
+
+# ── Third-party imports ───────────────────────────────────
+import anyio.to_thread
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# ── Internal imports ──────────────────────────────────────
+from app.internal.rfc.http_range.http_range import Segment
+from app.internal.utils.mmap_pool import MmapPool
+
+
+def _prefault(view: memoryview, start: int, stop: int) -> None:
+    """Doc mot byte moi page cua ``view[start:stop]`` de nap vao RAM.
+
+    Chay tren threadpool truoc khi gui slice: neu khong, page fault (doc
+    disk) xay ra khi server copy slice vao socket, tuc la tren event loop.
+    """
+    bytes(view[start:stop:mmap.PAGESIZE])
+    if stop > start:
+        view[stop - 1]
+
+
+def _read_at(f: BinaryIO, size: int, offset: int) -> bytes:
+    """Doc ``size`` bytes tai ``offset`` (pread; seek + read neu OS khong co)."""
+    if hasattr(os, "pread"):
+        return os.pread(f.fileno(), size, offset)
+    f.seek(offset)
+    return f.read(size)
+
+
+class RangeFileResponse(Response):
+    """Gui body gom cac segment: bytes nguyen van hoac doan cua mot file.
+
+    Header (Content-Range, Content-Length...) do caller quyet dinh;
+    response chi lo phan body.
+
+    Attributes:
+        path: Duong dan file.
+        segments: Noi dung body theo thu tu gui.
+        file_size: Kich thuoc file.
+        mtime: mtime cua file (khoa mapping trong ``mmap_pool``).
+        mmap_pool: Pool mmap dung khi server khong co extension
+            zero-copy (uvicorn), None = pread.
+        chunk_size: Kich thuoc moi lan doc/gui o che do fallback.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        segments: List[Segment],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        file_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        mtime: Optional[float] = None,
+        mmap_pool: Optional[MmapPool] = None,
+    ) -> None:
+        self.file = open(path, "rb")
+        self.path = path
+        self.segments = segments
+        if file_size is None or mtime is None:
+            stat = os.fstat(self.file.fileno())
+            file_size, mtime = stat.st_size, stat.st_mtime
+        self.file_size = file_size
+        self.mtime = mtime
+        self.mmap_pool = mmap_pool
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            if ("http.response.pathsend" in extensions
+                    and "http.response.zerocopysend" not in extensions
+                    and self._is_whole_file()):
+                # Extension pathsend yeu cau duong dan tuyet doi; self.path
+                # giu nguyen vi la key cua mmap_pool
+                await send({
+                    "type": "http.response.pathsend",
+                    "path": os.path.abspath(self.path),
+                })
+                return
+
+            zerocopy = "http.response.zerocopysend" in extensions
+            if not zerocopy and self.mmap_pool is not None:
+                mapped = self.mmap_pool.acquire(
+                    self.path, self.file_size, self.mtime, self.file,
+                )
+                if mapped is not None:
+                    try:
+                        await self._send_mapped(send, mapped.view)
+                    finally:
+                        self.mmap_pool.release(mapped)
+                    return
+
+            for segment in self.segments:
+                if isinstance(segment, bytes):
+                    await send({
+                        "type": "http.response.body",
+                        "body": segment,
+                        "more_body": True,
+                    })
+                elif zerocopy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": self.file,
+                        "offset": segment.start,
+                        "count": segment.end - segment.start + 1,
+                        "more_body": True,
+                    })
+                else:
+                    await self._send_chunks(send, segment.start, segment.end)
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            self.file.close()
+
+    async def _send_mapped(self, send: Send, view: memoryview) -> None:
+        for segment in self.segments:
+            if isinstance(segment, bytes):
+                await send({
+                    "type": "http.response.body",
+                    "body": segment,
+                    "more_body": True,
+                })
+                continue
+            for offset in range(segment.start, segment.end + 1, self.chunk_size):
+                stop = min(offset + self.chunk_size, segment.end + 1)
+                await anyio.to_thread.run_sync(_prefault, view, offset, stop)
+                await send({
+                    "type": "http.response.body",
+                    "body": view[offset:stop],
+                    "more_body": True,
+                })
+        await send({"type": "http.response.body", "body": b""})
+
+    def _is_whole_file(self) -> bool:
+        if len(self.segments) != 1 or isinstance(self.segments[0], bytes):
+            return False
+        segment = self.segments[0]
+        return segment.start == 0 and segment.end == self.file_size - 1
+
+    async def _send_chunks(self, send: Send, start: int, end: int) -> None:
+        offset = start
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(
+                _read_at, self.file, min(self.chunk_size, remaining), offset,
+            )
+            if not chunk:
+                # File bi cat ngan giua chung -> ket thuc doan som
+                return
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": True,
+            })
+
+
+class RangeMemoryResponse(Response):
+    """Gui body gom cac segment, doan byte cat tu noi dung trong RAM.
+
+    Moi doan duoc gui thanh cac slice ``chunk_size`` (khong copy) de
+    backpressure cua server van co tac dung voi file lon.
+
+    Attributes:
+        data: Toan bo noi dung file.
+        segments: Noi dung body theo thu tu gui.
+        chunk_size: Kich thuoc moi lan gui.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        data: memoryview,
+        segments: List[Segment],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+    ) -> None:
+        self.data = data
+        self.segments = segments
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        for segment in self.segments:
+            if isinstance(segment, bytes):
+                await send({
+                    "type": "http.response.body",
+                    "body": segment,
+                    "more_body": True,
+                })
+                continue
+            for offset in range(segment.start, segment.end + 1, self.chunk_size):
+                stop = min(offset + self.chunk_size, segment.end + 1)
+                await send({
+                    "type": "http.response.body",
+                    "body": self.data[offset:stop],
+                    "more_body": True,
+                })
+        await send({"type": "http.response.body", "body": b""})
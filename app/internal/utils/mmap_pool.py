@@ -0,0 +1,159 @@
+"""Pool mmap dung chung cho cac request doc cung mot file audio.
+
+Module nay chua:
+- MappedFile: mot mapping chi doc cua file kem bo dem tham chieu.
+- MmapPool: cap/thu hoi mapping theo (path, size, mtime). Nhieu request
+  (seek lien tuc, nhieu listener cung bai) dung chung mot mapping; range
+  response cat ``memoryview`` slice tu mapping thay vi tao ``bytes`` moi
+  cho moi 256KB doc tu disk.
+- Instance ``mmap_pool`` dung chung toan ung dung.
+
+Mapping het nguoi dung duoc giu lai trong danh sach idle (LRU) de request
+ke tiep dung lai. Mapping chi bi dong khi khong con request nao giu; neu
+transport cua server van giu slice chua gui xong (BufferError) thi hoan
+dong toi lan don dep sau.
+
+Dung cho server khong co ``sendfile`` (VD: TLS terminate ngay trong ASGI
+server). Mac dinh tat (MMAP_SERVING_ENABLED): server copy slice vao socket
+tren event loop, page chua nam trong page cache se gay page fault o do;
+RangeFileResponse nap truoc page cua moi chunk tren threadpool, nhung
+chi nen bat khi phan lon thu vien da nam trong page cache. File audio chi duoc thay bang ``os.replace``, khong bao gio bi
+cat ngan tai cho, nen truy cap mapping khong gap SIGBUS.
+
+Lien quan:
+- Response: app/internal/utils/file_response.py (RangeFileResponse)
+- Service:  app/services/evictor.py, reconciler.py (bo mapping cua file
+            bi xoa)
+- Config:   app/config/config.py (MMAP_SERVING_ENABLED, MMAP_MIN_FILE_MB)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import mmap
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+
+MappingKey = Tuple[str, int, float]
+
+
+class MappedFile:
+    """Mapping chi doc cua mot file.
+
+    Attributes:
+        key: (path, size, mtime) cua file luc map.
+        view: memoryview cua ca mapping (cat slice tu day).
+        refs: So response dang dung mapping.
+    """
+
+    __slots__ = ("key", "mm", "view", "refs")
+
+    def __init__(self, key: MappingKey, mm: mmap.mmap) -> None:
+        self.key = key
+        self.mm = mm
+        self.view = memoryview(mm)
+        self.refs = 0
+
+
+class MmapPool:
+    """Cap mapping dung chung, dem tham chieu, dong khi het nguoi dung.
+
+    Attributes:
+        enabled: Tat thi ``acquire`` luon tra None (doc bang pread).
+        min_bytes: File nho hon muc nay khong map (pread du re).
+        max_idle: So mapping khong ai dung toi da duoc giu lai.
+    """
+
+    def __init__(
+        self, enabled: bool = True, min_bytes: int = 0, max_idle: int = 32
+    ) -> None:
+        self.enabled = enabled
+        self.min_bytes = max(1, min_bytes)
+        self.max_idle = max(0, max_idle)
+        self._mapped: Dict[MappingKey, MappedFile] = {}
+        self._idle: "OrderedDict[MappingKey, None]" = OrderedDict()
+        self._closing: List[MappedFile] = []
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, path: str, size: int, mtime: float, file: BinaryIO
+    ) -> Optional[MappedFile]:
+        """Lay mapping cua file (map moi tu ``file`` neu chua co).
+
+        Returns:
+            MappedFile (caller phai ``release``), hoac None neu pool tat,
+            file qua nho hoac khong map duoc.
+        """
+        if not self.enabled or size < self.min_bytes:
+            return None
+
+        key = (path, size, mtime)
+        with self._lock:
+            self._sweep()
+            mapped = self._mapped.get(key)
+            if mapped is None:
+                try:
+                    mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    return None
+                if len(mm) != size:
+                    mm.close()
+                    return None
+                mapped = MappedFile(key, mm)
+                self._mapped[key] = mapped
+            mapped.refs += 1
+            self._idle.pop(key, None)
+            return mapped
+
+    def release(self, mapped: MappedFile) -> None:
+        """Tra mapping; het nguoi dung thi dua vao danh sach idle."""
+        with self._lock:
+            mapped.refs -= 1
+            if mapped.refs > 0:
+                return
+            if self._mapped.get(mapped.key) is not mapped:
+                # Da bi discard khi dang dung -> dong luon
+                self._close(mapped)
+                return
+            self._idle[mapped.key] = None
+            while len(self._idle) > self.max_idle:
+                key, _ = self._idle.popitem(last=False)
+                self._close(self._mapped.pop(key))
+
+    def discard(self, path: str) -> None:
+        """Bo cac mapping cua ``path`` (file bi xoa/thay the).
+
+        Mapping con mo giu inode cua file da xoa, disk khong duoc giai
+        phong cho toi khi dong.
+        """
+        with self._lock:
+            for key in [key for key in self._mapped if key[0] == path]:
+                mapped = self._mapped.pop(key)
+                self._idle.pop(key, None)
+                if mapped.refs == 0:
+                    self._close(mapped)
+
+    def _close(self, mapped: MappedFile) -> None:
+        mapped.view.release()
+        try:
+            mapped.mm.close()
+        except BufferError:
+            # Transport van giu slice chua gui xong -> dong o lan sau
+            self._closing.append(mapped)
+
+    def _sweep(self) -> None:
+        pending, self._closing = self._closing, []
+        for mapped in pending:
+            try:
+                mapped.mm.close()
+            except BufferError:
+                self._closing.append(mapped)
+
+
+# ── Module-level instances ────────────────────────────────
+mmap_pool = MmapPool(
+    enabled=settings.MMAP_SERVING_ENABLED,
+    min_bytes=settings.MMAP_MIN_FILE_MB * 1024 * 1024,
+)
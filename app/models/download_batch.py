@@ -0,0 +1,63 @@
+"""Mo hinh du lieu cho mot lan import bai hat hang loat.
+
+Module nay chua:
+- Model DownloadBatch: mot yeu cau bulk-info (danh sach URL hoac
+  playlist) voi tong so bai.
+- Model DownloadBatchItem: lien ket batch voi tung bai hat.
+
+Tien do cua batch khong luu rieng ma tinh tu status cua cac bai hat
+thanh vien, nen luon khop voi bang ``songs``.
+
+Lien quan:
+- Controller: app/controllers/song_controller.py (bulk_get_song_info)
+- Model:      app/models/song.py
+"""
+
+# ── Standard library imports ──────────────────────────────
+from datetime import datetime
+
+# ── Third-party imports ───────────────────────────────────
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.database import Base
+
+
+class DownloadBatch(Base):
+    """Bang luu cac lan import hang loat.
+
+    Attributes:
+        id: UUID cua batch, tra ve cho client de poll tien do.
+        source: Playlist ID neu import tu playlist, None neu tu danh
+            sach URL.
+        total: So bai hat (khong trung lap) trong batch.
+    """
+
+    __tablename__ = "download_batches"
+
+    id = Column(String(36), primary_key=True)
+    source = Column(Text, nullable=True)
+    total = Column(Integer, default=0, nullable=False)
+    created_at = Column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+
+class DownloadBatchItem(Base):
+    """Bang trung gian giua DownloadBatch va Song.
+
+    Attributes:
+        batch_id: ID batch.
+        song_id: YouTube video ID.
+        position: Thu tu bai trong danh sach gui len.
+    """
+
+    __tablename__ = "download_batch_items"
+
+    batch_id = Column(
+        String(36),
+        ForeignKey("download_batches.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    song_id = Column(String(50), primary_key=True)
+    position = Column(Integer, default=0, nullable=False)
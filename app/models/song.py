@@ -16,8 +16,8 @@ from datetime import datetime
 
 # ── Third-party imports ───────────────────────────────────
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Text,
-    Enum as SQLEnum, Index,
+    Column, String, Integer, DateTime, Text, Boolean,
+    Enum as SQLEnum, Index, false,
 )
 
 # ── Internal imports ──────────────────────────────────────
@@ -30,6 +30,7 @@ class ProcessingStatus(enum.Enum):
     Thu tu chuyen trang thai hop le:
         PENDING -> PROCESSING -> COMPLETED
         PENDING -> PROCESSING -> FAILED
+        COMPLETED -> EVICTED -> PROCESSING -> COMPLETED
     """
 
     PENDING = "pending"
@@ -42,7 +43,17 @@ class ProcessingStatus(enum.Enum):
     """Download va convert thanh cong, file san sang phuc vu."""
 
     FAILED = "failed"
-    """Download hoac convert that bai, xem error_message."""
+    """Download hoac convert that bai, xem error_message.
+
+    Loi tam thoi duoc retry tu dong khi toi ``next_retry_at``; loi vinh
+    vien (video rieng tu, da bi xoa...) co ``permanent_failure = True``.
+    """
+
+    EVICTED = "evicted"
+    """File audio/thumbnail da bi xoa de giu dung luong duoi quota.
+
+    Metadata van giu nguyen; bai duoc tai lai khi co request phat tiep.
+    """
 
 
 class Song(Base):
@@ -58,6 +69,17 @@ class Song(Base):
         status: Trang thai xu ly hien tai cua bai hat.
         audio_filename: Ten file audio da download (null khi chua xong).
         thumbnail_filename: Ten file thumbnail (null khi chua xong).
+        attempts: So lan download that bai lien tiep.
+        next_retry_at: Thoi diem retry tu dong tiep theo (null neu
+            khong can retry).
+        permanent_failure: True neu loi khong the khac phuc bang retry.
+        last_played_at: Lan phat gan nhat (ghi theo lo, dung cho LRU
+            eviction).
+        claim_token: Token cua worker dang giu claim PROCESSING; ket qua
+            chi duoc ghi khi token con khop (claim chua bi worker khac
+            lay lai).
+        prefetched: Bai do prefetcher tao (khong ai yeu cau); chua phat
+            lan nao thi bi evict truoc moi bai khac.
     """
 
     __tablename__ = "songs"
@@ -84,6 +106,13 @@ class Song(Base):
 
     error_message = Column(Text, nullable=True)
 
+    # Retry tu dong — server_default de ALTER TABLE duoc tren bang cu
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    next_retry_at = Column(DateTime, nullable=True)
+    permanent_failure = Column(
+        Boolean, default=False, server_default=false(), nullable=False,
+    )
+
     created_at = Column(
         DateTime, default=datetime.utcnow, nullable=False
     )
@@ -94,6 +123,11 @@ class Song(Base):
         nullable=False,
     )
     completed_at = Column(DateTime, nullable=True)
+    last_played_at = Column(DateTime, nullable=True)
+    claim_token = Column(String(32), nullable=True)
+    prefetched = Column(
+        Boolean, default=False, server_default=false(), nullable=False,
+    )
 
     __table_args__ = (
         Index('idx_songs_status', 'status'),
@@ -101,4 +135,7 @@ class Song(Base):
         Index(
             'idx_songs_status_completed_at', 'status', 'completed_at'
         ),
+        Index(
+            'idx_songs_status_next_retry_at', 'status', 'next_retry_at'
+        ),
     )
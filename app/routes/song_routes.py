@@ -3,8 +3,10 @@
 Module nay chua:
 - Endpoint nhan dien bai hat tu file audio (ACRCloud).
 - Endpoint lay thong tin va bat dau download tu YouTube.
+- Endpoint import hang loat (danh sach URL/playlist) va poll tien do batch.
 - Endpoint streaming/download file audio da xu ly.
-- Endpoint proxy download truc tiep tu YouTube.
+- Endpoint proxy download (cho job download xong roi tra audio).
+- Endpoint SSE day trang thai xu ly bai hat.
 - Endpoint lay thumbnail va danh sach bai hat hoan thanh.
 
 Lien quan:
@@ -18,16 +20,19 @@ from typing import Annotated
 
 # ── Third-party imports ───────────────────────────────────
 from fastapi import (
-    APIRouter, Depends, BackgroundTasks,
-    Response, Query, Request, File, UploadFile,
+    APIRouter, Depends,
+    Query, Request, File, UploadFile,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 # ── Internal imports ──────────────────────────────────────
 from app.config.database import get_db
-from app.schemas.song import SongInfoRequest, APIResponse
+from app.schemas.song import SongInfoRequest, BulkInfoRequest, APIResponse
 from app.controllers.song_controller import SongController
+from app.internal.rfc.jwt.jwt import decode_token
+from app.services.prefetcher import prefetcher
+from app.services.play_tracker import play_tracker
 
 
 # ── Router / Dependencies ─────────────────────────────────
@@ -46,6 +51,26 @@ SongControllerDep = Annotated[
     SongController, Depends(get_song_controller)
 ]
 
+optional_security = HTTPBearer(auto_error=False)
+
+
+def get_client_key(
+    request: Request,
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(optional_security)
+    ],
+) -> str:
+    """Khoa ngan sach prefetch cua client: user ID neu co JWT hop le, neu khong la IP."""
+    if credentials:
+        try:
+            return f"user:{decode_token(credentials.credentials).sub}"
+        except Exception:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+ClientKeyDep = Annotated[str, Depends(get_client_key)]
+
 
 # ── Endpoints ─────────────────────────────────────────────
 
@@ -70,18 +95,16 @@ async def identify_song(
 @router.post("/info", response_model=APIResponse)
 async def get_song_info(
     request_data: SongInfoRequest,
-    background_tasks: BackgroundTasks,
     db: DBDep,
     controller: SongControllerDep,
 ):
-    """Lay thong tin bai hat va bat dau download trong background.
+    """Lay thong tin bai hat va dua vao hang doi download.
 
     Neu bai hat da ton tai va hoan thanh trong DB, tra ve ngay
     ma khong can download lai.
 
     Args:
-        request_data: Chua youtube_url can xu ly.
-        background_tasks: FastAPI background task de download async.
+        request_data: Chua youtube_url can xu ly va lane uu tien.
         db: Database session.
         controller: Controller xu ly nghiep vu.
 
@@ -91,27 +114,83 @@ async def get_song_info(
     return await controller.get_song_info(
         request_data.youtube_url,
         db,
-        background_tasks,
+        priority=request_data.priority,
     )
 
 
+@router.post("/bulk-info", response_model=APIResponse)
+async def bulk_get_song_info(
+    request_data: BulkInfoRequest,
+    db: DBDep,
+    controller: SongControllerDep,
+):
+    """Import hang loat bai hat tu danh sach URL va/hoac playlist.
+
+    Bai moi duoc tao trong mot transaction va xep vao lane bulk; bai da
+    co trong DB khong bi tao lai.
+
+    Args:
+        request_data: Danh sach URL va/hoac playlist ID/URL.
+        db: Database session.
+        controller: Controller xu ly nghiep vu.
+
+    Returns:
+        batch_id cung so bai moi/da co va cac URL khong hop le.
+    """
+    return await controller.bulk_get_song_info(request_data, db)
+
+
+@router.get("/bulk-info/{batch_id}", response_model=APIResponse)
+def get_batch_status(
+    batch_id: str,
+    db: DBDep,
+    controller: SongControllerDep,
+):
+    """Lay tien do tong hop cua mot batch import.
+
+    Args:
+        batch_id: ID batch tra ve tu POST /bulk-info.
+        db: Database session.
+        controller: Controller xu ly nghiep vu.
+
+    Returns:
+        So bai pending/processing/completed/failed va ti le hoan thanh.
+    """
+    return controller.get_batch_status(batch_id, db)
+
+
 @router.get("/status/{song_id}", response_model=APIResponse)
 def get_song_status(
     song_id: str,
-    db: DBDep,
     controller: SongControllerDep,
 ):
     """Lay trang thai xu ly hien tai cua bai hat.
 
+    Khong dung DBDep: job dang chay duoc doc tu progress store trong RAM,
+    controller chi mo session khi can doc ban ghi tu DB.
+
     Args:
         song_id: YouTube video ID.
-        db: Database session.
         controller: Controller xu ly nghiep vu.
 
     Returns:
-        Trang thai (pending/processing/completed/failed) va metadata.
+        Trang thai (pending/processing/completed/failed), progress,
+        stage va so bytes da tai (neu dang download).
     """
-    return controller.get_song_status(song_id, db)
+    return controller.get_song_status(song_id)
+
+
+@router.get("/hot-cache/stats", response_model=APIResponse)
+def get_hot_cache_stats(controller: SongControllerDep):
+    """Lay so lieu hot audio cache (hit/miss, byte) de chon HOT_CACHE_MB.
+
+    Args:
+        controller: Controller xu ly nghiep vu.
+
+    Returns:
+        Dung luong dang dung, so bai, hit/miss va so lan nap/day ra.
+    """
+    return controller.get_hot_cache_stats()
 
 
 @router.get("/download/{song_id}")
@@ -120,37 +199,45 @@ async def download_song(
     request: Request,
     db: DBDep,
     controller: SongControllerDep,
+    client_key: ClientKeyDep,
     download: Annotated[
         bool,
         Query(description="True de download, False de streaming"),
     ] = False,
+    v: Annotated[
+        str | None,
+        Query(description="Phien ban file (tu audio_url); khop -> cache immutable"),
+    ] = None,
 ):
     """Stream hoac download file audio da xu ly.
 
-    Ho tro HTTP Range request cho HTML5 audio seeking.
+    Ho tro HTTP Range request cho HTML5 audio seeking. Bai da bi
+    evict (xoa file de giu quota) duoc tai lai trong suot: request cho
+    nhu proxy-download.
 
     Args:
         song_id: YouTube video ID.
         request: HTTP request (can thiet cho Range header).
         db: Database session.
         controller: Controller xu ly nghiep vu.
+        client_key: Khoa ngan sach prefetch cua client.
         download: True de download file, False de streaming inline.
+        v: Phien ban file trong URL (``?v=``).
 
     Returns:
-        StreamingResponse voi header Content-Disposition tuong ung.
+        Response audio (200/206, hoac 304 neu client da co ban hien tai)
+        voi header Content-Disposition tuong ung.
 
     Raises:
         HTTP 404: Bai hat khong ton tai hoac chua hoan thanh.
     """
-    file_data = await controller.get_audio_file(song_id, db)
-    disposition = "attachment" if download else "inline"
-    response = await controller.stream_file_with_range(
-        request,
-        str(file_data["file_path"]),
-    )
-    response.headers["Content-Disposition"] = (
-        f'{disposition}; filename="{file_data["safe_filename"]}"'
+    response = await controller.stream_audio_file(
+        song_id, request, db, download=download, version=v,
     )
+
+    # Ghi nhan lan phat (theo lo) va tai truoc cac bai tiep theo (neu bat)
+    play_tracker.record(song_id)
+    prefetcher.schedule(song_id, client_key)
     return response
 
 
@@ -158,72 +245,83 @@ async def download_song(
 async def proxy_download(
     song_id: str,
     request: Request,
-    db: DBDep,
     controller: SongControllerDep,
+    client_key: ClientKeyDep,
 ):
-    """Proxy download audio tu YouTube ve frontend ngay lap tuc.
+    """Cho job download hoan thanh roi tra audio ve frontend.
 
     Neu file da co tren server (completed) thi serve tu disk.
-    Neu chua thi proxy truc tiep tu YouTube — frontend khong can
-    cho backend xu ly xong.
+    Neu chua thi cho su kien completed tu pipeline (toi da 3 phut).
+
+    Khong dung DBDep de request dang cho khong giu connection trong
+    pool; controller tu mo session ngan khi can.
 
     Args:
         song_id: YouTube video ID.
         request: HTTP request.
-        db: Database session.
         controller: Controller xu ly nghiep vu.
+        client_key: Khoa ngan sach prefetch cua client.
 
     Returns:
         StreamingResponse audio.
     """
-    return await controller.proxy_download_audio(song_id, request, db)
+    response = await controller.proxy_download_audio(song_id, request)
+    play_tracker.record(song_id)
+    prefetcher.schedule(song_id, client_key)
+    return response
+
+
+@router.get("/events/{song_id}")
+async def song_events_stream(
+    song_id: str,
+    request: Request,
+    controller: SongControllerDep,
+):
+    """Subscribe trang thai xu ly bai hat qua Server-Sent Events.
+
+    Thay the viec poll /status: server day event moi khi pipeline
+    chuyen trang thai (tien do, completed, failed) va dong stream
+    khi bai hat xu ly xong.
+
+    Args:
+        song_id: YouTube video ID.
+        request: HTTP request (phat hien client ngat ket noi).
+        controller: Controller xu ly nghiep vu.
+
+    Returns:
+        StreamingResponse text/event-stream.
+    """
+    return await controller.stream_song_events(song_id, request)
 
 
 @router.get("/thumbnail/{song_id}")
 async def get_thumbnail(
     song_id: str,
+    request: Request,
     db: DBDep,
     controller: SongControllerDep,
+    v: Annotated[
+        str | None,
+        Query(description="Phien ban file (tu thumbnail_url); khop -> cache immutable"),
+    ] = None,
 ):
     """Lay thumbnail bai hat tu server hoac proxy tu YouTube.
 
-    Neu file thumbnail da download thanh cong thi stream tu disk.
+    Neu file thumbnail da download thanh cong thi tra tu disk kem
+    ETag/Last-Modified (304 khi client da co ban hien tai).
     Neu chua thi proxy truc tiep tu YouTube URL goc.
 
     Args:
         song_id: YouTube video ID.
+        request: HTTP request (doc If-None-Match, If-Modified-Since).
         db: Database session.
         controller: Controller xu ly nghiep vu.
+        v: Phien ban file trong URL (``?v=``).
 
     Returns:
-        Response hoac StreamingResponse chua anh thumbnail.
+        Response chua anh thumbnail.
     """
-    thumbnail_data = await controller.get_thumbnail_file(song_id, db)
-
-    # Proxy tu YouTube (chua co file tren server)
-    if thumbnail_data.get("proxy"):
-        return Response(
-            content=thumbnail_data["content"],
-            media_type=thumbnail_data["media_type"],
-            headers={
-                'Content-Disposition': (
-                    f'inline; filename='
-                    f'"{thumbnail_data["safe_filename"]}"'
-                ),
-                'Cache-Control': 'public, max-age=3600',
-            },
-        )
-
-    return StreamingResponse(
-        controller.file_streamer(thumbnail_data["file_path"]),
-        media_type=thumbnail_data["media_type"],
-        headers={
-            'Content-Disposition': (
-                f'inline; filename='
-                f'"{thumbnail_data["safe_filename"]}"'
-            ),
-        },
-    )
+    return await controller.stream_thumbnail(song_id, request, db, version=v)
 
 
 @router.get("/completed", response_model=APIResponse)
@@ -14,6 +14,7 @@ Lien quan:
 # ── Standard library imports ──────────────────────────────
 from datetime import datetime
 from enum import Enum
+from typing import Literal
 
 # ── Third-party imports ───────────────────────────────────
 from pydantic import BaseModel, Field, field_validator
@@ -29,6 +30,7 @@ class ProcessingStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    EVICTED = "evicted"
 
 
 class SongInfoRequest(BaseModel):
@@ -36,9 +38,105 @@ class SongInfoRequest(BaseModel):
 
     Attributes:
         youtube_url: URL YouTube hop le cua bai hat can xu ly.
+        priority: Lane uu tien cua job download. Mac dinh
+            "interactive" (player dang cho phat); tac vu nen dung
+            "normal" hoac "bulk".
     """
 
     youtube_url: str
+    priority: Literal["interactive", "normal", "bulk"] = "interactive"
+
+
+# So bai toi da cua mot yeu cau bulk-info (URL hoac video trong playlist)
+BULK_INFO_MAX_ITEMS = 500
+
+
+class BulkInfoRequest(BaseModel):
+    """Du lieu dau vao khi import hang loat bai hat.
+
+    Attributes:
+        urls: Danh sach URL YouTube (video, hoac URL co tham so
+            ``list=`` se duoc mo rong thanh cac video trong playlist).
+        playlist: Playlist ID hoac URL playlist YouTube.
+    """
+
+    urls: list[str] = Field(default_factory=list, max_length=BULK_INFO_MAX_ITEMS)
+    playlist: str | None = None
+
+
+class BulkInfoResponse(BaseModel):
+    """Ket qua tao batch import hang loat.
+
+    Attributes:
+        batch_id: ID batch dung de poll tien do.
+        total: So bai (khong trung lap) trong batch.
+        created: So bai moi duoc tao ban ghi.
+        existing: So bai da co san trong DB.
+        invalid: Cac URL khong nhan dien duoc video ID.
+    """
+
+    batch_id: str
+    total: int
+    created: int
+    existing: int
+    invalid: list[str]
+
+
+class BatchStatusResponse(BaseModel):
+    """Tien do tong hop cua mot batch import.
+
+    Attributes:
+        batch_id: ID batch.
+        total: So bai trong batch.
+        pending: So bai dang cho download (ke ca bai loi dang cho
+            retry tu dong).
+        processing: So bai dang download.
+        completed: So bai da hoan thanh.
+        failed: So bai loi vinh vien, khong retry nua.
+        progress: Ti le bai da hoan thanh, tu 0.0 den 1.0.
+        done: True khi khong con bai nao pending/processing.
+        created_at: Thoi diem tao batch.
+    """
+
+    batch_id: str
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    progress: float
+    done: bool
+    created_at: datetime
+
+
+class HotCacheStatsResponse(BaseModel):
+    """So lieu cua hot audio cache trong RAM.
+
+    Attributes:
+        enabled: Cache co dang bat (HOT_CACHE_MB > 0).
+        budget_bytes: Dung luong toi da.
+        used_bytes: Dung luong dang dung.
+        entries: So bai dang nam trong cache.
+        hits: So request duoc tra tu RAM.
+        misses: So request phai doc disk.
+        hit_ratio: hits / (hits + misses).
+        hit_bytes: Tong byte da tra tu RAM.
+        admissions: So lan nap bai vao cache.
+        rejections: So lan khong nap vi cac bai trong cache hot hon.
+        evictions: So bai bi day ra de nhuong cho.
+    """
+
+    enabled: bool
+    budget_bytes: int
+    used_bytes: int
+    entries: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    hit_bytes: int
+    admissions: int
+    rejections: int
+    evictions: int
 
 
 class SongInfoResponse(BaseModel):
@@ -72,9 +170,17 @@ class StatusResponse(BaseModel):
 
     Attributes:
         id: YouTube video ID.
-        status: Trang thai xu ly (pending/processing/completed/failed).
+        status: Trang thai xu ly (pending/processing/completed/failed/
+            evicted).
         progress: Tien do xu ly tu 0.0 den 1.0 (nullable).
+        stage: Buoc dang chay cua pipeline (downloading/converting/
+            thumbnail), chi co khi dang xu ly.
+        downloaded_bytes: So bytes audio da tai (nullable).
+        total_bytes: Tong bytes audio can tai (nullable).
         error_message: Thong bao loi neu status = failed.
+        attempts: So lan download that bai lien tiep (nullable).
+        next_retry_at: Thoi diem retry tu dong neu status = failed.
+        permanent_failure: True neu loi vinh vien, khong retry nua.
         audio_filename: Ten file audio da download.
         thumbnail_filename: Ten file thumbnail da download.
         updated_at: Thoi diem cap nhat trang thai gan nhat.
@@ -83,7 +189,13 @@ class StatusResponse(BaseModel):
     id: str
     status: ProcessingStatus
     progress: float | None = None
+    stage: str | None = None
+    downloaded_bytes: int | None = None
+    total_bytes: int | None = None
     error_message: str | None = None
+    attempts: int | None = None
+    next_retry_at: datetime | None = None
+    permanent_failure: bool | None = None
     audio_filename: str | None = None
     thumbnail_filename: str | None = None
     updated_at: datetime
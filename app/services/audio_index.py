@@ -0,0 +1,148 @@
+"""Chi muc trong RAM: song_id -> file audio (duong dan, kich thuoc, mtime).
+
+Module nay chua:
+- IndexedFile: thong tin file audio da hoan thanh cua mot bai hat.
+- AudioIndex: dict song_id -> IndexedFile, nap mot lan khi startup tu
+  cac bai COMPLETED, cap nhat khi pipeline tai xong va xoa khi bai bi
+  evict hoac mat file. Endpoint download tra cuu bang mot lan doc dict,
+  khong truy van DB, khong glob hay stat file.
+- Instance ``audio_index`` dung chung toan ung dung.
+
+Chi muc chi dung trong mot process. File bi di chuyen tu ben ngoai
+(VD: tool migrate_layout) duoc phat hien khi mo file that bai; caller
+``discard`` roi tim lai theo duong cham.
+
+Lien quan:
+- Controller: app/controllers/song_controller.py (get_audio_file)
+- Service:    youtube_service.py (put), evictor.py, reconciler.py (discard)
+- Entrypoint: main.py (nap khi startup)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.utils.executors import run_in_pipeline
+from app.models.song import ProcessingStatus, Song
+
+
+class IndexedFile:
+    """File audio da hoan thanh cua mot bai hat.
+
+    Attributes:
+        path: Duong dan tuyet doi tren disk.
+        size: Kich thuoc file (bytes).
+        mtime: Thoi diem sua file (epoch giay).
+        title: Tieu de bai hat (dat ten file khi download).
+    """
+
+    __slots__ = ("path", "size", "mtime", "title")
+
+    def __init__(self, path: Path, size: int, mtime: float, title: str) -> None:
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.title = title
+
+
+class AudioIndex:
+    """Chi muc song_id -> IndexedFile an toan voi nhieu thread."""
+
+    LOAD_BATCH_SIZE = 500
+
+    def __init__(self) -> None:
+        self.audio_dir = Path(settings.AUDIO_DIRECTORY)
+        self._entries: Dict[str, IndexedFile] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ── Lifecycle ─────────────────────────────────────────
+
+    def start(self) -> None:
+        """Nap chi muc trong nen (request den truoc khi nap xong di duong cham)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._load())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _load(self) -> None:
+        loaded = 0
+        last_id = ""
+        try:
+            while last_id is not None:
+                last_id, count = await run_in_pipeline(self._load_batch, last_id)
+                loaded += count
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[INDEX] Nap chi muc audio that bai: {e}")
+        print(f"[INDEX] Da nap {loaded} file audio vao chi muc")
+
+    def _load_batch(self, after_id: str) -> tuple[Optional[str], int]:
+        with SessionLocal() as db:
+            rows = (
+                db.query(Song.id, Song.audio_filename, Song.title)
+                .filter(
+                    Song.status == ProcessingStatus.COMPLETED,
+                    Song.audio_filename.isnot(None),
+                    Song.id > after_id,
+                )
+                .order_by(Song.id.asc())
+                .limit(self.LOAD_BATCH_SIZE)
+                .all()
+            )
+
+        count = 0
+        for song_id, filename, title in rows:
+            # Khong ghi de entry pipeline vua them trong luc dang nap
+            if song_id in self._entries:
+                continue
+            if self.put(song_id, self.audio_dir / filename, title) is not None:
+                count += 1
+
+        next_id = rows[-1][0] if len(rows) == self.LOAD_BATCH_SIZE else None
+        return next_id, count
+
+    # ── Lookup / update ───────────────────────────────────
+
+    def get(self, song_id: str) -> Optional[IndexedFile]:
+        """Tra cuu file audio cua bai hat (None neu chua co trong chi muc)."""
+        return self._entries.get(song_id)
+
+    def put(self, song_id: str, path: Path, title: str) -> Optional[IndexedFile]:
+        """Them/cap nhat file cua bai hat (stat file mot lan).
+
+        Returns:
+            Entry vua them, hoac None neu file khong ton tai.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.discard(song_id)
+            return None
+        entry = IndexedFile(path, stat.st_size, stat.st_mtime, title)
+        with self._lock:
+            self._entries[song_id] = entry
+        return entry
+
+    def discard(self, song_id: str) -> None:
+        """Bo bai hat khoi chi muc (bi evict, mat file, tai lai)."""
+        with self._lock:
+            self._entries.pop(song_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ── Module-level instances ────────────────────────────────
+audio_index = AudioIndex()
@@ -0,0 +1,165 @@
+"""Theo doi tien do download bai hat trong RAM.
+
+Module nay chua:
+- DownloadProgressStore: luu tien do (stage, bytes da tai, tong bytes)
+  cua cac job dang chay, duoc cap nhat tu yt-dlp progress_hooks va tung
+  buoc cua pipeline (convert ffmpeg, thumbnail).
+- Instance ``download_progress`` dung chung toan ung dung.
+
+Store chi ton tai trong process dang chay pipeline, nen endpoint status
+doc duoc tien do ma khong can truy van DB. Khi khong co ban ghi (job da
+xong hoac chay o process khac) thi endpoint fallback ve DB.
+
+Moi lan doi stage hoac tien do tang them ``PUBLISH_STEP`` thi store
+publish su kien "processing" len ``song_events`` cho client SSE.
+
+Lien quan:
+- Service:    youtube_service.py (ghi tien do)
+- Service:    song_events.py (publish tien do)
+- Controller: app/controllers/song_controller.py (get_song_status)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# ── Internal imports ──────────────────────────────────────
+from app.services.song_events import song_events
+
+
+class DownloadProgressStore:
+    """Luu tien do cac job download dang chay, an toan voi nhieu thread.
+
+    yt-dlp goi progress hook tu thread cua executor, con endpoint status
+    doc tu event loop, nen moi thao tac deu giu ``_lock``.
+
+    Tien do tong (0.0 -> 1.0) duoc chia theo stage:
+        - downloading: 0.0 -> 0.9 theo ti le bytes da tai.
+        - converting:  0.9 (ffmpeg remux, khong bao tien do chi tiet).
+        - thumbnail:   0.95.
+    """
+
+    STAGE_BASE = {
+        "queued": 0.0,
+        "downloading": 0.0,
+        "converting": 0.9,
+        "thumbnail": 0.95,
+    }
+    DOWNLOAD_WEIGHT = 0.9
+    # Chi publish su kien khi tien do tang it nhat 5% de khong spam client
+    PUBLISH_STEP = 0.05
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, song_id: str) -> None:
+        """Tao ban ghi tien do moi khi pipeline bat dau xu ly bai hat."""
+        with self._lock:
+            self._entries[song_id] = {
+                "stage": "queued",
+                "downloaded_bytes": 0,
+                "total_bytes": None,
+                "progress": 0.0,
+                "updated_at": datetime.utcnow(),
+            }
+
+    def update_download(
+        self,
+        song_id: str,
+        downloaded_bytes: int,
+        total_bytes: Optional[int],
+    ) -> None:
+        """Cap nhat so bytes da tai trong stage downloading.
+
+        Args:
+            song_id: ID bai hat.
+            downloaded_bytes: So bytes da tai.
+            total_bytes: Tong bytes (nullable neu server khong bao).
+        """
+        with self._lock:
+            entry = self._entries.get(song_id)
+            if entry is None:
+                return
+
+            entry["stage"] = "downloading"
+            entry["downloaded_bytes"] = downloaded_bytes
+            entry["total_bytes"] = total_bytes
+            if total_bytes:
+                ratio = min(downloaded_bytes / total_bytes, 1.0)
+                entry["progress"] = round(ratio * self.DOWNLOAD_WEIGHT, 3)
+            entry["updated_at"] = datetime.utcnow()
+
+            should_publish = (
+                entry["progress"] - entry.get("published_progress", 0.0)
+                >= self.PUBLISH_STEP
+            )
+            if should_publish:
+                entry["published_progress"] = entry["progress"]
+                snapshot = dict(entry)
+
+        if should_publish:
+            self._publish(song_id, snapshot)
+
+    def set_stage(self, song_id: str, stage: str) -> None:
+        """Chuyen job sang stage moi (converting, thumbnail...)."""
+        with self._lock:
+            entry = self._entries.get(song_id)
+            if entry is None:
+                return
+
+            entry["stage"] = stage
+            entry["progress"] = max(
+                entry["progress"], self.STAGE_BASE.get(stage, 0.0)
+            )
+            entry["updated_at"] = datetime.utcnow()
+            entry["published_progress"] = entry["progress"]
+            snapshot = dict(entry)
+
+        self._publish(song_id, snapshot)
+
+    def finish(self, song_id: str) -> None:
+        """Xoa ban ghi khi job ket thuc (thanh cong hoac that bai)."""
+        with self._lock:
+            self._entries.pop(song_id, None)
+
+    def get(self, song_id: str) -> Optional[Dict[str, Any]]:
+        """Lay ban sao tien do hien tai, hoac None neu job khong chay."""
+        with self._lock:
+            entry = self._entries.get(song_id)
+            return dict(entry) if entry is not None else None
+
+    def _publish(self, song_id: str, entry: Dict[str, Any]) -> None:
+        """Publish tien do hien tai len event bus (ngoai lock)."""
+        song_events.publish(
+            song_id,
+            status="processing",
+            progress=entry["progress"],
+            stage=entry["stage"],
+            downloaded_bytes=entry["downloaded_bytes"],
+            total_bytes=entry["total_bytes"],
+        )
+
+    def make_hook(self, song_id: str):
+        """Tao yt-dlp progress hook ghi tien do cho ``song_id``.
+
+        Returns:
+            Callable nhan dict trang thai tu yt-dlp.
+        """
+        def _hook(d: Dict[str, Any]) -> None:
+            if d.get("status") not in ("downloading", "finished"):
+                return
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            downloaded = d.get("downloaded_bytes") or 0
+            if d.get("status") == "finished" and total:
+                downloaded = total
+            self.update_download(
+                song_id, int(downloaded), int(total) if total else None
+            )
+
+        return _hook
+
+
+# ── Module-level instances ────────────────────────────────
+download_progress = DownloadProgressStore()
@@ -0,0 +1,320 @@
+"""Hang doi download bai hat voi worker pool gioi han va lane uu tien.
+
+Module nay chua:
+- DownloadQueue: scheduler chay mot so worker asyncio co dinh, lay job
+  tu cac lane trong RAM va goi pipeline download cua YouTubeService.
+- Cac lane uu tien: ``LANE_INTERACTIVE`` (nguoi dung dang cho phat),
+  ``LANE_NORMAL`` va ``LANE_BULK`` (import hang loat, prefetch).
+- Instance ``download_queue`` dung chung toan ung dung.
+
+Hang doi ben vung chinh la bang ``songs``: moi bai co status PENDING la
+mot job chua xu ly. Hang doi trong RAM chi la bo dem, neu day hoac mat
+khi restart thi job van con trong DB va duoc nap lai khi startup hoac
+o lan quet dinh ky tiep theo.
+
+Lien quan:
+- Service:    youtube_service.py (download_audio_and_thumbnail)
+- Service:    retry_policy.py (circuit breaker, lich retry)
+- Controller: app/controllers/song_controller.py (enqueue)
+- Entrypoint: main.py (start/stop trong lifespan)
+- Config:     app/config/config.py (DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+
+# ── Third-party imports ───────────────────────────────────
+from sqlalchemy import and_, or_
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.utils.executors import run_in_pipeline
+from app.models.song import ProcessingStatus, Song
+from app.services.retry_policy import circuit_breaker
+from app.services.youtube_service import YouTubeService
+
+
+# Lane theo thu tu uu tien giam dan
+LANE_INTERACTIVE = "interactive"
+LANE_NORMAL = "normal"
+LANE_BULK = "bulk"
+LANES = (LANE_INTERACTIVE, LANE_NORMAL, LANE_BULK)
+
+
+class DownloadQueue:
+    """Scheduler download voi so worker gioi han va lane uu tien.
+
+    Chiu trach nhiem:
+        - Nhan job (song_id, url, lane) tu controller, bo qua job trung
+          lap dang cho trong hang doi.
+        - Chay toi da ``concurrency`` pipeline yt-dlp + ffmpeg cung luc,
+          giu CPU, disk va bandwidth on dinh khi traffic tang dot bien.
+        - Worker ranh luon lay job o lane uu tien cao nhat con cho va
+          chua vuot han muc cua lane do. Lane normal va bulk cong lai
+          chay toi da ``concurrency - interactive_reserved`` job (de
+          ``interactive_reserved`` worker chi danh cho lane interactive),
+          rieng lane bulk toi da ``bulk_workers`` job, nen nguoi dung dang
+          cho phat khong phai xep sau mot dot import lon.
+        - Job dang cho o lane thap duoc day len lane cao khi nguoi dung
+          yeu cau bai do (``enqueue`` voi lane cao hon).
+        - Khi startup: nap lai bai PENDING va bai PROCESSING da qua han
+          claim (bi ngat giua chung) vao hang doi.
+        - Quet DB dinh ky de nhan cac bai PENDING bi tran hang doi va
+          cac bai FAILED (loi tam thoi) da den ``next_retry_at``.
+        - Worker cho circuit breaker cho qua truoc khi lay job, nen khi
+          YouTube chan hang loat thi moi job tam dung thay vi that bai,
+          va worker dang cho khong giu job hay slot cua lane nao.
+
+    Job dang chay khong bi ngat; uu tien chi ap dung cho job dang cho.
+    Moi job chi duoc dua vao hang doi mot lan trong process (``_queued``);
+    giua nhieu process, worker phai claim ban ghi truoc khi download nen
+    moi video chi duoc tai mot lan.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 3,
+        maxsize: int = 1000,
+        poll_interval: int = 30,
+        interactive_reserved: int = 1,
+        bulk_workers: int = 1,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+
+        # Han muc so job chay dong thoi cua tung lane; normal + bulk cong
+        # lai khong vuot ``shared_limit``
+        shared = max(1, self.concurrency - max(0, interactive_reserved))
+        self.shared_limit = shared
+        self.lane_limits = {
+            LANE_INTERACTIVE: self.concurrency,
+            LANE_NORMAL: shared,
+            LANE_BULK: max(1, min(bulk_workers, shared)),
+        }
+
+        self._lanes: Optional[dict[str, deque]] = None
+        self._waiting: dict[str, str] = {}
+        self._running: dict[str, int] = {lane: 0 for lane in LANES}
+        self._queued: set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._youtube_service: Optional[YouTubeService] = None
+
+    @property
+    def started(self) -> bool:
+        """True neu worker pool dang chay."""
+        return self._lanes is not None
+
+    # ── Lifecycle ─────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Khoi dong worker pool, khoi phuc job va vong quet dinh ky.
+
+        Goi mot lan trong lifespan startup cua FastAPI.
+        """
+        if self.started:
+            return
+
+        self._lanes = {lane: deque() for lane in LANES}
+        self._wakeup = asyncio.Event()
+        self._youtube_service = YouTubeService()
+
+        self._tasks = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.concurrency)
+        ]
+
+        recovered = await self.recover_pending()
+        print(
+            f"[QUEUE] Started {self.concurrency} download workers, "
+            f"recovered {recovered} pending songs"
+        )
+
+        if self.poll_interval > 0:
+            self._tasks.append(asyncio.create_task(self._poll_loop()))
+
+    async def stop(self) -> None:
+        """Dung toan bo worker. Job dang do se duoc khoi phuc o lan startup sau."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        self._tasks = []
+        self._lanes = None
+        self._waiting.clear()
+        self._running = {lane: 0 for lane in LANES}
+        self._queued.clear()
+
+    # ── Enqueue ───────────────────────────────────────────
+
+    def enqueue(self, song_id: str, url: str, lane: str = LANE_NORMAL) -> bool:
+        """Dua mot bai hat vao hang doi download.
+
+        Neu bai dang cho o lane thap hon thi duoc chuyen len ``lane``
+        (giu thu tu den trong lane moi).
+
+        Args:
+            song_id: ID bai hat trong database (status PENDING).
+            url: URL YouTube can download.
+            lane: Lane uu tien (``LANE_INTERACTIVE``, ``LANE_NORMAL``,
+                ``LANE_BULK``).
+
+        Returns:
+            True neu job duoc them vao hang doi hoac duoc day len lane
+            cao hon. False neu job da co san (hoac dang chay), hang doi
+            day, hoac worker chua chay — khi do ban ghi PENDING se duoc
+            nap lai o lan quet sau.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Lane khong hop le: {lane}")
+        if not self.started:
+            return False
+
+        if song_id in self._queued:
+            current = self._waiting.get(song_id)
+            if current is None or LANES.index(lane) >= LANES.index(current):
+                return False
+            job = next(j for j in self._lanes[current] if j[0] == song_id)
+            self._lanes[current].remove(job)
+            self._lanes[lane].append(job)
+            self._waiting[song_id] = lane
+            self._wakeup.set()
+            return True
+
+        if len(self._waiting) >= self.maxsize:
+            return False
+
+        self._lanes[lane].append((song_id, url))
+        self._waiting[song_id] = lane
+        self._queued.add(song_id)
+        self._wakeup.set()
+        return True
+
+    async def recover_pending(self) -> int:
+        """Nap lai cac bai chua hoan thanh tu DB vao hang doi.
+
+        Gom bai PENDING, bai FAILED do loi tam thoi da den han retry va
+        bai PROCESSING da qua han claim (worker cu bi tat giua chung).
+        Bai PROCESSING con han thuoc ve worker khac dang chay nen khong
+        dong vao; viec claim lai do ``YouTubeService.claim_song`` quyet
+        dinh mot cach nguyen tu.
+
+        Khong co client nao dang cho cac bai nay (VD: phan du cua mot
+        batch bulk-info) nen chung vao lane bulk; player can bai nao thi
+        proxy-download se day bai do len lane interactive.
+
+        Truy van DB chay trong executor (khong chan event loop khi DB
+        cham), ket qua duoc enqueue lai tren loop.
+
+        Returns:
+            So bai hat duoc them vao hang doi.
+        """
+        rows = await run_in_pipeline(self._load_recoverable)
+
+        added = 0
+        for song_id, url in rows:
+            if self.enqueue(song_id, url, lane=LANE_BULK):
+                added += 1
+        return added
+
+    def _load_recoverable(self) -> list[tuple[str, str]]:
+        """Doc (song_id, url) cac bai can nap lai, cu nhat truoc."""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(
+            seconds=settings.DOWNLOAD_CLAIM_TTL_SECONDS
+        )
+
+        with SessionLocal() as db:
+            rows = (
+                db.query(Song.id, Song.original_url)
+                .filter(
+                    or_(
+                        Song.status == ProcessingStatus.PENDING,
+                        and_(
+                            Song.status == ProcessingStatus.FAILED,
+                            Song.permanent_failure.is_(False),
+                            Song.next_retry_at <= now,
+                        ),
+                        and_(
+                            Song.status == ProcessingStatus.PROCESSING,
+                            Song.updated_at < stale_before,
+                        ),
+                    )
+                )
+                .order_by(Song.created_at.asc())
+                .limit(self.maxsize)
+                .all()
+            )
+        return [(song_id, url) for song_id, url in rows]
+
+    # ── Workers ───────────────────────────────────────────
+
+    def _next_job(self) -> Optional[tuple[str, str, str]]:
+        """Lay job o lane uu tien cao nhat con cho va chua het han muc."""
+        shared_running = self._running[LANE_NORMAL] + self._running[LANE_BULK]
+        for lane in LANES:
+            jobs = self._lanes[lane]
+            if not jobs or self._running[lane] >= self.lane_limits[lane]:
+                continue
+            # Slot danh rieng cho interactive khong bao gio bi lane khac lay
+            if lane != LANE_INTERACTIVE and shared_running >= self.shared_limit:
+                continue
+            song_id, url = jobs.popleft()
+            self._waiting.pop(song_id, None)
+            return lane, song_id, url
+        return None
+
+    async def _worker(self, index: int) -> None:
+        """Vong lap worker: lay job va chay pipeline download."""
+        while True:
+            # Cho breaker truoc khi lay job: worker bi chan khong giu job
+            # hay slot cua lane nao
+            await circuit_breaker.wait_until_ready()
+            job = self._next_job()
+            if job is None:
+                # Khong co await giua _next_job va clear nen khong lo
+                # bo sot tin hieu tu enqueue
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            lane, song_id, url = job
+            # Khong co await tu wait_until_ready toi day nen allow() luon
+            # cho qua; half-open thi job nay la request thu
+            circuit_breaker.allow()
+            self._running[lane] += 1
+            try:
+                await self._youtube_service.download_audio_and_thumbnail(
+                    song_id, url
+                )
+            except Exception as e:
+                print(f"[QUEUE] Worker {index} loi khi xu ly {song_id}: {e}")
+            finally:
+                self._running[lane] -= 1
+                self._queued.discard(song_id)
+                # Lane vua nha slot -> danh thuc worker dang cho han muc
+                self._wakeup.set()
+
+    async def _poll_loop(self) -> None:
+        """Quet DB dinh ky de nap bai PENDING, den han retry hoac het han claim."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.recover_pending()
+            except Exception as e:
+                print(f"[QUEUE] Quet bai PENDING that bai: {e}")
+
+
+# ── Module-level instances ────────────────────────────────
+download_queue = DownloadQueue(
+    concurrency=settings.DOWNLOAD_WORKERS,
+    maxsize=settings.DOWNLOAD_QUEUE_MAXSIZE,
+    poll_interval=settings.DOWNLOAD_QUEUE_POLL_SECONDS,
+    interactive_reserved=settings.DOWNLOAD_INTERACTIVE_RESERVED,
+    bulk_workers=settings.DOWNLOAD_BULK_WORKERS,
+)
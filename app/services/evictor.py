@@ -0,0 +1,307 @@
+"""Giu dung luong thu vien audio duoi quota bang LRU eviction.
+
+Module nay chua:
+- AudioEvictor: vong nen do tong dung luong AUDIO_DIRECTORY +
+  THUMBNAIL_DIRECTORY; khi vuot ``AUDIO_QUOTA_BYTES`` thi xoa file cua
+  cac bai lau chua phat nhat toi khi xuong duoi ``quota * target_ratio``.
+  Bai bi xoa chuyen sang EVICTED (giu metadata) va duoc tai lai khi co
+  request phat tiep.
+- Instance ``evictor`` dung chung toan ung dung.
+
+Dung luong duoc theo doi tang dan: ``record_added`` cong kich thuoc file
+moi tai, eviction tru phan da giai phong. Chi quet toan bo thu muc
+(os.walk) theo chu ky ``interval``, khi chua co so lieu, hoac khi so lieu
+theo doi vuot quota (xac nhan truoc khi xoa) - moi lan tai xong khong phai
+stat ca thu vien.
+
+Thu tu xoa theo ``last_played_at`` (bai chua phat lan nao tinh theo
+``completed_at``). Bai moi phat/hoan thanh trong ``GRACE_SECONDS`` khong
+bi xoa. Ngoai le: bai prefetch chua phat lan nao (``prefetched``) bi xoa
+truoc tat ca va khong duoc grace - khong ai yeu cau chung. DB duoc cap nhat truoc khi xoa file: neu process chet giua
+chung, reconciler se don file khong con ban ghi nao tro toi.
+
+Lien quan:
+- Service: play_tracker.py (last_played_at), reconciler.py,
+           audio_index.py (bo bai bi evict khoi chi muc)
+- Config:  app/config/config.py (AUDIO_QUOTA_BYTES, EVICTION_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+# ── Third-party imports ───────────────────────────────────
+from sqlalchemy import and_, case, func, or_
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.utils.executors import run_in_pipeline
+from app.internal.utils.mmap_pool import mmap_pool
+from app.models.song import ProcessingStatus, Song
+from app.services.audio_index import audio_index
+from app.services.hot_cache import hot_cache
+from app.services.play_tracker import play_tracker
+
+
+class AudioEvictor:
+    """Xoa file audio/thumbnail it dung nhat khi vuot quota.
+
+    Attributes:
+        quota_bytes: Dung luong toi da (0 = tat eviction).
+        target_ratio: Sau khi xoa, dung luong xuong duoi
+            ``quota_bytes * target_ratio`` de khong phai xoa lien tuc.
+        interval: Chu ky kiem tra dung luong (giay).
+        batch_size: So bai xet moi lan truy van.
+    """
+
+    GRACE_SECONDS = 3600
+
+    def __init__(
+        self,
+        quota_bytes: int = 0,
+        target_ratio: float = 0.9,
+        interval: int = 600,
+        batch_size: int = 200,
+    ) -> None:
+        self.quota_bytes = quota_bytes
+        self.target_ratio = min(1.0, max(0.0, target_ratio))
+        self.interval = max(1, interval)
+        self.batch_size = max(1, batch_size)
+        self.audio_dir = Path(settings.AUDIO_DIRECTORY)
+        self.thumbnail_dir = Path(settings.THUMBNAIL_DIRECTORY)
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Dung luong theo doi tang dan (None = chua quet lan nao)
+        self._usage: Optional[int] = None
+        self._force_scan = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.quota_bytes > 0
+
+    # ── Lifecycle ─────────────────────────────────────────
+
+    def start(self) -> None:
+        """Khoi chay vong kiem tra quota nen (neu co quota)."""
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+            # Quet ngay de co so lieu dung luong (prefetch can no)
+            self.kick(rescan=True)
+
+    async def stop(self) -> None:
+        """Dung vong kiem tra quota."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._wakeup = None
+
+    def kick(self, rescan: bool = False) -> None:
+        """Yeu cau kiem tra quota ngay.
+
+        Args:
+            rescan: Quet lai disk thay vi dung so lieu theo doi
+                (VD: disk day - so lieu co the da lech).
+        """
+        if self._wakeup is not None:
+            self._force_scan = self._force_scan or rescan
+            self._wakeup.set()
+
+    def has_headroom(self) -> bool:
+        """True neu con cho cho bai khong ai yeu cau (prefetch).
+
+        Dung luong phai duoi muc sau eviction (``quota * target_ratio``)
+        de file tai truoc khong bao gio kich hoat eviction. Chua quet lan
+        nao thi coi nhu khong con cho.
+        """
+        if not self.enabled:
+            return True
+        return (self._usage is not None
+                and self._usage < self.quota_bytes * self.target_ratio)
+
+    def record_added(self, *paths: Optional[Path]) -> None:
+        """Cong kich thuoc file vua tai vao dung luong, vuot quota thi kick."""
+        if not self.enabled:
+            return
+        if self._usage is not None:
+            self._usage += sum(self._file_size(p) for p in paths)
+        if self._usage is None or self._usage > self.quota_bytes:
+            self.kick()
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_scan = loop.time() + self.interval
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    timeout=max(0.0, next_scan - loop.time()),
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # Deadline co dinh: kick lien tuc khong day lui lan quet dinh ky
+            rescan = self._force_scan or loop.time() >= next_scan
+            self._force_scan = False
+            if rescan:
+                next_scan = loop.time() + self.interval
+            try:
+                await self.run_once(rescan=rescan)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[EVICT] Kiem tra quota that bai: {e}")
+
+    # ── Eviction ──────────────────────────────────────────
+
+    async def run_once(self, rescan: bool = True) -> int:
+        """Xoa bai lanh nhat toi khi dung luong xuong duoi muc tieu.
+
+        Args:
+            rescan: False thi dung so lieu theo doi; chi quet disk khi
+                chua co so lieu hoac so lieu vuot quota.
+
+        Returns:
+            So bai da chuyen sang EVICTED.
+        """
+        if not self.enabled:
+            return 0
+
+        if (not rescan and self._usage is not None
+                and self._usage <= self.quota_bytes):
+            return 0
+
+        usage = await run_in_pipeline(self._disk_usage)
+        self._usage = usage
+        if usage <= self.quota_bytes:
+            return 0
+
+        # last_played_at moi nhat phai nam trong DB truoc khi chon bai
+        await play_tracker.flush()
+
+        target = int(self.quota_bytes * self.target_ratio)
+        evicted = freed = 0
+        while usage - freed > target:
+            count, size = await run_in_pipeline(
+                self._evict_batch, usage - freed - target
+            )
+            if count == 0:
+                break
+            evicted += count
+            freed += size
+            self._usage = max(0, usage - freed)
+
+        print(
+            f"[EVICT] usage={usage} quota={self.quota_bytes} "
+            f"evicted={evicted} freed={freed}"
+        )
+        return evicted
+
+    def _disk_usage(self) -> int:
+        total = 0
+        for directory in (self.audio_dir, self.thumbnail_dir):
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    try:
+                        total += os.stat(os.path.join(root, name)).st_size
+                    except FileNotFoundError:
+                        continue
+        return total
+
+    def _file_size(self, path: Optional[Path]) -> int:
+        try:
+            return path.stat().st_size if path is not None else 0
+        except FileNotFoundError:
+            return 0
+
+    def _evict_batch(self, need_bytes: int) -> tuple[int, int]:
+        """Chon bai lanh nhat du giai phong ``need_bytes`` va xoa file.
+
+        Returns:
+            Tuple (so bai da evict, so bytes da giai phong).
+        """
+        recency = func.coalesce(Song.last_played_at, Song.completed_at)
+        protected_after = datetime.utcnow() - timedelta(seconds=self.GRACE_SECONDS)
+        # Prefetch chua phat: completed_at moi khong co nghia la vua dung
+        prefetch_only = and_(
+            Song.prefetched.is_(True), Song.last_played_at.is_(None),
+        )
+
+        with SessionLocal() as db:
+            rows = (
+                db.query(
+                    Song.id, Song.audio_filename, Song.thumbnail_filename,
+                    Song.last_played_at,
+                )
+                .filter(
+                    Song.status == ProcessingStatus.COMPLETED,
+                    or_(prefetch_only, recency < protected_after),
+                )
+                .order_by(case((prefetch_only, 0), else_=1), recency.asc())
+                .limit(self.batch_size)
+                .all()
+            )
+
+            victims = []
+            selected = 0
+            for song_id, audio, thumbnail, last_played_at in rows:
+                paths = [
+                    self.audio_dir / audio if audio else None,
+                    self.thumbnail_dir / thumbnail if thumbnail else None,
+                ]
+                victims.append((song_id, last_played_at, paths))
+                selected += sum(self._file_size(p) for p in paths)
+                if selected >= need_bytes:
+                    break
+
+            evicted = []
+            for song_id, last_played_at, paths in victims:
+                # Dieu kien last_played_at: bai vua duoc phat lai
+                # (flush sau khi doc) thi giu nguyen
+                updated = db.query(Song).filter(
+                    Song.id == song_id,
+                    Song.status == ProcessingStatus.COMPLETED,
+                    (Song.last_played_at == last_played_at)
+                    if last_played_at is not None
+                    else Song.last_played_at.is_(None),
+                ).update(
+                    {
+                        Song.status: ProcessingStatus.EVICTED,
+                        Song.audio_filename: None,
+                        Song.thumbnail_filename: None,
+                        Song.completed_at: None,
+                    },
+                    synchronize_session=False,
+                )
+                if updated:
+                    audio_index.discard(song_id)
+                    hot_cache.discard(song_id)
+                    evicted.append(paths)
+            db.commit()
+
+        freed = 0
+        for paths in evicted:
+            for path in paths:
+                size = self._file_size(path)
+                if path is not None:
+                    path.unlink(missing_ok=True)
+                    # Mapping con mo giu inode -> disk chua duoc giai phong
+                    mmap_pool.discard(str(path))
+                freed += size
+        return len(evicted), freed
+
+
+# ── Module-level instances ────────────────────────────────
+evictor = AudioEvictor(
+    quota_bytes=settings.AUDIO_QUOTA_BYTES,
+    target_ratio=settings.EVICTION_TARGET_RATIO,
+    interval=settings.EVICTION_INTERVAL_SECONDS,
+)
@@ -0,0 +1,110 @@
+"""Cache ket qua yt-dlp extract_info theo video ID.
+
+Module nay chua:
+- ExtractionCache: luu info dict (kem danh sach formats) sau khi
+  ``get_video_info`` trich xuat, de stage download dung lai qua
+  ``YoutubeDL.process_ie_result`` thay vi trich xuat lan hai.
+- Instance ``extraction_cache`` dung chung toan ung dung.
+
+URL cua cac format YouTube chi song trong mot khoang thoi gian (tham so
+``expire`` tren URL), nen moi entry het han som hon giua TTL cau hinh
+va thoi diem URL het han.
+
+Lien quan:
+- Service: youtube_service.py (ghi khi get_video_info, doc khi download)
+- Config:  app/config/config.py (YTDLP_INFO_CACHE_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+
+
+class ExtractionCache:
+    """Cache LRU cac info dict cua yt-dlp, co han theo URL format.
+
+    Truy cap tu event loop va tu thread cua executor nen moi thao tac
+    deu giu ``_lock``. Info dict tra ve la ban sao sau vi yt-dlp sua
+    truc tiep dict trong qua trinh chon format.
+    """
+
+    # Bo bot thoi gian truoc khi URL format het han de download kip xong
+    EXPIRE_MARGIN_SECONDS = 300
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 256) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, video_id: str, info: Dict[str, Any]) -> None:
+        """Luu info dict cua ``video_id`` neu cache dang bat.
+
+        Args:
+            video_id: YouTube video ID.
+            info: Ket qua ``extract_info(download=False)``.
+        """
+        if self.ttl_seconds <= 0 or not info.get("formats"):
+            return
+
+        expires_at = time.time() + self.ttl_seconds
+        url_expire = self._format_url_expiry(info)
+        if url_expire:
+            expires_at = min(expires_at, url_expire - self.EXPIRE_MARGIN_SECONDS)
+        if expires_at <= time.time():
+            return
+
+        with self._lock:
+            self._entries[video_id] = (expires_at, info)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Lay ban sao info dict con han cua ``video_id``.
+
+        Returns:
+            Info dict, hoac None neu khong co hoac da het han.
+        """
+        with self._lock:
+            item = self._entries.get(video_id)
+            if item is None:
+                return None
+            expires_at, info = item
+            if expires_at <= time.time():
+                del self._entries[video_id]
+                return None
+            self._entries.move_to_end(video_id)
+
+        return copy.deepcopy(info)
+
+    def discard(self, video_id: str) -> None:
+        """Xoa entry (VD: download bang info cache bi loi 403)."""
+        with self._lock:
+            self._entries.pop(video_id, None)
+
+    def _format_url_expiry(self, info: Dict[str, Any]) -> Optional[float]:
+        """Doc tham so ``expire`` som nhat tren URL cac format audio."""
+        expiries = []
+        for fmt in info.get("formats") or []:
+            url = fmt.get("url")
+            if not url or fmt.get("acodec") in (None, "none"):
+                continue
+            values = parse_qs(urlparse(url).query).get("expire")
+            if values and values[0].isdigit():
+                expiries.append(float(values[0]))
+        return min(expiries) if expiries else None
+
+
+# ── Module-level instances ────────────────────────────────
+extraction_cache = ExtractionCache(
+    ttl_seconds=settings.YTDLP_INFO_CACHE_TTL_SECONDS,
+    max_entries=settings.YTDLP_INFO_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,276 @@
+"""Cache byte audio trong RAM cho cac bai dang duoc nghe nhieu nhat.
+
+Module nay chua:
+- CachedAudio: noi dung mot file audio kem size/mtime de kiem tra cu.
+- HotAudioCache: cache gioi han theo tong so byte. Chi nap bai khi so
+  request gan day dat nguong (admission theo tan suat) va chi day bai
+  cu ra khi bai moi duoc nghe nhieu hon (TinyLFU tren thu tu LRU), nen
+  vai bai nghe mot lan khong quet sach cac bai hot. Range request cua
+  bai da nap duoc tra bang ``memoryview`` slice, khong syscall nao.
+- Instance ``hot_cache`` dung chung toan ung dung.
+
+Tan suat dem theo luot phat, khong theo request: player gui nhieu Range
+request cho mot lan nghe (seek, doc moov atom, tai tung doan), nen chi
+request bat dau tu byte 0 moi duoc dem, va moi client chi duoc dem mot
+lan cho moi bai trong ``PLAY_DEDUPE_SECONDS``.
+
+Tan suat dem trong RAM va duoc chia doi dinh ky (aging) de bai het hot
+nhuong cho cho bai moi. File duoc doc tren threadpool sau khi request
+hien tai da duoc phuc vu tu disk; request khong bao gio cho viec nap.
+
+Lien quan:
+- Controller: app/controllers/song_controller.py (stream_file_with_range)
+- Response:   app/internal/utils/file_response.py (RangeMemoryResponse)
+- Service:    evictor.py, reconciler.py (bo bai bi xoa khoi cache)
+- Config:     app/config/config.py (HOT_CACHE_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+# ── Third-party imports ───────────────────────────────────
+import anyio.to_thread
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+
+
+class CachedAudio:
+    """Noi dung file audio da nap vao RAM.
+
+    Attributes:
+        data: Toan bo file (chi doc).
+        size: Kich thuoc file luc nap.
+        mtime: mtime cua file luc nap.
+    """
+
+    __slots__ = ("data", "size", "mtime")
+
+    def __init__(self, data: memoryview, size: int, mtime: float) -> None:
+        self.data = data
+        self.size = size
+        self.mtime = mtime
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class HotAudioCache:
+    """Cache LRU/LFU theo byte cho file audio hot.
+
+    Attributes:
+        budget_bytes: Tong dung luong toi da (0 = tat cache).
+        admit_hits: So request toi thieu truoc khi nap bai vao cache.
+        max_file_bytes: Bai lon hon muc nay khong bao gio duoc nap.
+    """
+
+    # Chia doi tan suat sau moi chung nay lan ghi nhan
+    AGING_INTERVAL = 10_000
+    # So bai toi da duoc dem tan suat (vuot thi aging som)
+    MAX_TRACKED = 8192
+    # Request bat dau luot phat cua cung client + bai trong khoang nay
+    # chi tinh mot lan (VD: probe ``bytes=0-1`` roi ``bytes=0-``)
+    PLAY_DEDUPE_SECONDS = 60
+
+    def __init__(
+        self,
+        budget_bytes: int = 0,
+        admit_hits: int = 4,
+        max_file_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        self.budget_bytes = max(0, budget_bytes)
+        self.admit_hits = max(1, admit_hits)
+        self.max_file_bytes = max_file_bytes
+
+        self._entries: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._frequency: Dict[str, int] = {}
+        self._recent_plays: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._records = 0
+        self._used = 0
+        self._loading: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.hit_bytes = 0
+        self.admissions = 0
+        self.rejections = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    # ── Lookup ────────────────────────────────────────────
+
+    def lookup(
+        self,
+        song_id: str,
+        path: str,
+        size: int,
+        mtime: float,
+        nbytes: int,
+        starts_play: bool = True,
+        client: Optional[str] = None,
+    ) -> Optional[memoryview]:
+        """Tra noi dung file neu bai dang trong cache (va con moi).
+
+        Bai miss du tan suat duoc nap nen cho cac request sau.
+
+        Args:
+            song_id: YouTube video ID.
+            path: Duong dan file (de nap khi miss).
+            size: Kich thuoc file hien tai.
+            mtime: mtime file hien tai.
+            nbytes: So byte request nay se gui (thong ke).
+            starts_play: Request doc tu byte 0 (bat dau luot phat);
+                False (seek, range giua file) thi khong dem tan suat.
+            client: Dinh danh client (VD: IP) de dem moi luot phat mot lan.
+
+        Returns:
+            memoryview toan bo file, hoac None neu miss.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if starts_play and self._is_new_play(song_id, client):
+                frequency = self._touch(song_id)
+            else:
+                frequency = self._frequency.get(song_id, 0)
+            entry = self._entries.get(song_id)
+            if entry is not None and entry.size == size and entry.mtime == mtime:
+                self._entries.move_to_end(song_id)
+                self.hits += 1
+                self.hit_bytes += nbytes
+                return entry.data
+            if entry is not None:
+                # File da doi (tai lai) -> ban trong RAM da cu
+                self._remove(song_id)
+            self.misses += 1
+            should_load = (
+                frequency >= self.admit_hits
+                and 0 < size <= min(self.max_file_bytes, self.budget_bytes)
+                and song_id not in self._loading
+            )
+            if should_load:
+                self._loading.add(song_id)
+
+        if should_load:
+            task = asyncio.create_task(self._load(song_id, path, size, mtime))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return None
+
+    def discard(self, song_id: str) -> None:
+        """Bo bai khoi cache (file bi evict/xoa)."""
+        with self._lock:
+            self._remove(song_id)
+
+    def stats(self) -> dict:
+        """So lieu de chon HOT_CACHE_MB: hit/miss, byte, nap/day ra."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "budget_bytes": self.budget_bytes,
+                "used_bytes": self._used,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "hit_bytes": self.hit_bytes,
+                "admissions": self.admissions,
+                "rejections": self.rejections,
+                "evictions": self.evictions,
+            }
+
+    # ── Admission / eviction ──────────────────────────────
+
+    async def _load(self, song_id: str, path: str, size: int, mtime: float) -> None:
+        try:
+            data = await anyio.to_thread.run_sync(_read_file, path)
+        except OSError:
+            data = None
+        finally:
+            with self._lock:
+                self._loading.discard(song_id)
+        if data is None or len(data) != size:
+            return
+
+        with self._lock:
+            self._remove(song_id)
+            if not self._make_room(song_id, size):
+                self.rejections += 1
+                return
+            self._entries[song_id] = CachedAudio(memoryview(data), size, mtime)
+            self._used += size
+            self.admissions += 1
+
+    def _make_room(self, candidate: str, size: int) -> bool:
+        """Day bai LRU ra toi khi du cho, neu chung it hot hon ``candidate``."""
+        candidate_frequency = self._frequency.get(candidate, 0)
+        victims = []
+        freed = 0
+        for song_id, entry in self._entries.items():
+            if self._used - freed + size <= self.budget_bytes:
+                break
+            if self._frequency.get(song_id, 0) > candidate_frequency:
+                return False
+            victims.append(song_id)
+            freed += entry.size
+        if self._used - freed + size > self.budget_bytes:
+            return False
+
+        for song_id in victims:
+            self._remove(song_id)
+            self.evictions += 1
+        return True
+
+    def _remove(self, song_id: str) -> None:
+        entry = self._entries.pop(song_id, None)
+        if entry is not None:
+            self._used -= entry.size
+
+    def _is_new_play(self, song_id: str, client: Optional[str]) -> bool:
+        if client is None:
+            return True
+        key = (client, song_id)
+        now = time.monotonic()
+        played_at = self._recent_plays.get(key)
+        if played_at is not None and now - played_at < self.PLAY_DEDUPE_SECONDS:
+            return False
+        self._recent_plays[key] = now
+        self._recent_plays.move_to_end(key)
+        while len(self._recent_plays) > self.MAX_TRACKED:
+            self._recent_plays.popitem(last=False)
+        return True
+
+    def _touch(self, song_id: str) -> int:
+        frequency = self._frequency.get(song_id, 0) + 1
+        self._frequency[song_id] = frequency
+        self._records += 1
+        if (self._records >= self.AGING_INTERVAL
+                or len(self._frequency) > self.MAX_TRACKED):
+            self._frequency = {
+                key: count // 2
+                for key, count in self._frequency.items()
+                if count > 1
+            }
+            self._records = 0
+        return frequency
+
+
+# ── Module-level instances ────────────────────────────────
+hot_cache = HotAudioCache(
+    budget_bytes=settings.HOT_CACHE_MB * 1024 * 1024,
+    admit_hits=settings.HOT_CACHE_ADMIT_HITS,
+    max_file_bytes=settings.HOT_CACHE_MAX_FILE_MB * 1024 * 1024,
+)
@@ -0,0 +1,222 @@
+"""Theo doi audio dang duoc download de stream song song (tee mode).
+
+Module nay chua:
+- LiveDownload: trang thai mot download dang chay. Du lieu raw nam trong
+  file spool ma pipeline yt-dlp -> ffmpeg tee vao, hoac trong file dang
+  lon cua yt-dlp (che do fallback khong co ffmpeg). RAM khong giu ban sao
+  nao, reader doc file theo toc do cua minh.
+- LiveDownloadRegistry: pipeline dang ky download khi yt-dlp bat dau ghi,
+  proxy-download doc theo (follow) trong luc du lieu con dang lon va
+  dung lai khi writer bao EOF.
+- Instance ``live_downloads`` dung chung toan ung dung.
+
+Nho vay client nhan byte dau tien sau vai giay thay vi cho download +
+remux xong. File .m4a hoan chinh van duoc tao sau do cho range request.
+
+Lien quan:
+- Service:    youtube_service.py (dang ky file, bao EOF)
+- Controller: app/controllers/song_controller.py (proxy_download_audio)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import mimetypes
+from pathlib import Path
+from typing import Any, AsyncGenerator, BinaryIO, Dict, Optional
+
+# ── Third-party imports ───────────────────────────────────
+import aiofiles
+
+
+class LiveDownload:
+    """Trang thai mot download raw dang duoc yt-dlp ghi.
+
+    Attributes:
+        path: Duong dan file dang lon (file raw cua yt-dlp hoac file spool
+            pipeline tee du lieu vao).
+        ext: Extension cua format yt-dlp da chon (m4a, webm...).
+        spool: File spool dang ghi (None neu yt-dlp tu ghi ``path``).
+        received: So byte raw da ghi vao spool.
+        readers: So reader dang follow; spool bi ``discard`` chi duoc xoa
+            khi reader cuoi cung dung.
+        finished: True khi writer da ghi xong toan bo du lieu.
+        failed: True khi download loi giua chung.
+        discarded: True khi pipeline khong con can file spool.
+    """
+
+    # Magic bytes EBML cua file webm/matroska
+    WEBM_MAGIC = b"\x1a\x45\xdf\xa3"
+
+    def __init__(
+        self, path: Path, ext: str, spool: Optional[BinaryIO] = None
+    ) -> None:
+        self.path = path
+        self.ext = ext
+        self.spool = spool
+        self.received = 0
+        self.readers = 0
+        self.finished = False
+        self.failed = False
+        self.discarded = False
+
+    @property
+    def available(self) -> bool:
+        """True neu reader co the bat dau doc."""
+        if self.spool is not None:
+            # Cho chunk dau tien de biet container (ext) that su
+            return self.received > 0
+        return self.path.exists()
+
+    def append(self, chunk: bytes) -> None:
+        """Ghi chunk raw vao spool (blocking, goi tren pipeline executor).
+
+        Chunk dau tien cung duoc dung de nhan dang container that su,
+        vi yt-dlp co the fallback sang webm khi khong co m4a.
+        """
+        if not self.received and chunk.startswith(self.WEBM_MAGIC):
+            self.ext = "webm"
+        self.spool.write(chunk)
+        # Flush ngay de reader doc file thay duoc chunk vua ghi
+        self.spool.flush()
+        self.received += len(chunk)
+
+    @property
+    def media_type(self) -> str:
+        """MIME type doan tu extension, mac dinh audio/mp4."""
+        media_type, _ = mimetypes.guess_type(f"audio.{self.ext}")
+        if not media_type or not media_type.startswith(("audio/", "video/")):
+            return "audio/mp4"
+        # Chi co audio nen doi video/* thanh audio/* (VD: video/webm)
+        return media_type.replace("video/", "audio/")
+
+
+class LiveDownloadRegistry:
+    """Danh ba cac download dang chay trong process, theo song_id.
+
+    Writer (yt-dlp progress hook) chay tren thread cua executor, reader
+    chay tren event loop. Cac thao tac chi la gan/doc attribute don le
+    nen an toan voi GIL; reader poll file moi ``POLL_INTERVAL`` giay khi
+    da doc het du lieu hien co.
+    """
+
+    POLL_INTERVAL = 0.25
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, LiveDownload] = {}
+
+    # ── Writer side ───────────────────────────────────────
+
+    def make_hook(self, song_id: str):
+        """Tao yt-dlp progress hook dang ky file khi bat dau ghi.
+
+        Hook dau tien co status "downloading" cho biet file da ton tai
+        va format (ext) da duoc chon, luc do reader moi co the follow.
+        """
+        def _hook(d: Dict[str, Any]) -> None:
+            entry = self._entries.get(song_id)
+            status = d.get("status")
+
+            if status == "downloading" and entry is None:
+                filename = d.get("tmpfilename") or d.get("filename")
+                if filename:
+                    ext = (d.get("info_dict") or {}).get("ext") or "m4a"
+                    self._entries[song_id] = LiveDownload(Path(filename), ext)
+            elif status == "finished" and entry is not None:
+                entry.finished = True
+            elif status == "error" and entry is not None:
+                entry.failed = True
+
+        return _hook
+
+    def open_spool(
+        self, song_id: str, path: Path, ext: str = "m4a"
+    ) -> LiveDownload:
+        """Dang ky download ma du lieu raw duoc pipeline tee vao ``path``.
+
+        Args:
+            song_id: ID bai hat.
+            path: File spool (tao moi, ghi de neu da co).
+            ext: Extension du kien cua format da chon.
+
+        Returns:
+            LiveDownload de writer goi ``append`` tung chunk.
+        """
+        entry = LiveDownload(path, ext, open(path, "wb"))
+        self._entries[song_id] = entry
+        return entry
+
+    def discard_spool(self, entry: LiveDownload) -> None:
+        """Dong va xoa file spool; con reader thi reader cuoi cung xoa.
+
+        Reader da mo file van doc duoc sau khi file bi xoa (POSIX), nhung
+        reader vua lay entry ma chua mo thi chua. Spool sot lai (response
+        bi huy truoc khi chay) duoc reconciler don nhu moi file .tmp.
+        """
+        if entry.spool is None:
+            return
+        entry.spool.close()
+        entry.discarded = True
+        if entry.readers == 0:
+            entry.path.unlink(missing_ok=True)
+
+    def close(self, song_id: str, failed: bool = False) -> None:
+        """Ket thuc theo doi file (pipeline xong hoac that bai).
+
+        Reader dang follow se doc not phan con lai roi dung.
+        """
+        entry = self._entries.pop(song_id, None)
+        if entry is None:
+            return
+        if failed:
+            entry.failed = True
+        entry.finished = True
+
+    # ── Reader side ───────────────────────────────────────
+
+    def get(self, song_id: str) -> Optional[LiveDownload]:
+        """Lay file dang download cua ``song_id`` (None neu khong co)."""
+        return self._entries.get(song_id)
+
+    def follow(
+        self, entry: LiveDownload, chunk_size: int = 262144
+    ) -> AsyncGenerator[bytes, None]:
+        """Doc du lieu theo tung chunk trong luc download con dang chay.
+
+        Khi doc het du lieu hien co thi cho ``POLL_INTERVAL`` roi doc
+        tiep. Chi dung lai khi writer da bao xong *truoc* lan doc rong
+        cuoi cung, de khong bo sot cac byte ghi sau cung.
+
+        Args:
+            entry: Download dang chay.
+            chunk_size: Kich thuoc moi chunk. Mac dinh 256KB.
+
+        Returns:
+            Async generator cac chunk bytes raw. Reader duoc dem ngay khi
+            goi (truoc khi generator chay) de spool khong bi xoa truoc
+            khi reader kip mo file.
+        """
+        entry.readers += 1
+        return self._follow(entry, chunk_size)
+
+    async def _follow(
+        self, entry: LiveDownload, chunk_size: int
+    ) -> AsyncGenerator[bytes, None]:
+        try:
+            async with aiofiles.open(entry.path, "rb") as file:
+                while True:
+                    finished = entry.finished
+                    chunk = await file.read(chunk_size)
+                    if chunk:
+                        yield chunk
+                        continue
+                    if finished or entry.failed:
+                        break
+                    await asyncio.sleep(self.POLL_INTERVAL)
+        finally:
+            entry.readers -= 1
+            if entry.discarded and entry.readers == 0:
+                entry.path.unlink(missing_ok=True)
+
+
+# ── Module-level instances ────────────────────────────────
+live_downloads = LiveDownloadRegistry()
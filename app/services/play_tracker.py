@@ -0,0 +1,114 @@
+"""Ghi nhan thoi diem phat bai hat theo lo (last_played_at).
+
+Module nay chua:
+- PlayTracker: gom cac lan phat trong RAM (moi bai chi giu lan gan
+  nhat) va ghi xuong DB bang mot lenh UPDATE executemany moi chu ky,
+  thay vi mot lenh ghi cho moi Range request cua trinh duyet.
+- Instance ``play_tracker`` dung chung toan ung dung.
+
+Lien quan:
+- Route:   app/routes/song_routes.py (ghi nhan khi phat)
+- Service: evictor.py (flush truoc khi chon bai de xoa)
+- Config:  app/config/config.py (PLAY_TRACKER_FLUSH_SECONDS)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+# ── Third-party imports ───────────────────────────────────
+from sqlalchemy import bindparam
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.utils.executors import run_in_pipeline
+from app.models.song import Song
+
+
+class PlayTracker:
+    """Bo dem last_played_at ghi xuong DB dinh ky.
+
+    Attributes:
+        flush_seconds: Chu ky ghi cac lan phat dang cho xuong DB.
+    """
+
+    def __init__(self, flush_seconds: int = 60) -> None:
+        self.flush_seconds = max(1, flush_seconds)
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ── Lifecycle ─────────────────────────────────────────
+
+    def start(self) -> None:
+        """Khoi chay vong flush nen."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Dung vong flush va ghi not cac lan phat con trong RAM."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    # ── Recording ─────────────────────────────────────────
+
+    def record(self, song_id: str) -> None:
+        """Ghi nhan ``song_id`` vua duoc phat (chi cap nhat RAM)."""
+        with self._lock:
+            self._pending[song_id] = datetime.utcnow()
+
+    async def flush(self) -> int:
+        """Ghi cac lan phat dang cho xuong DB.
+
+        Returns:
+            So bai duoc cap nhat last_played_at.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        try:
+            await run_in_pipeline(self._write, batch)
+        except Exception as e:
+            # Tra lai RAM de lan flush sau thu lai (giu lan phat moi hon)
+            with self._lock:
+                for song_id, played_at in batch.items():
+                    self._pending.setdefault(song_id, played_at)
+            print(f"[PLAYS] Ghi last_played_at that bai: {e}")
+            return 0
+        return len(batch)
+
+    def _write(self, batch: Dict[str, datetime]) -> None:
+        songs = Song.__table__
+        statement = (
+            songs.update()
+            .where(songs.c.id == bindparam("b_id"))
+            # Gan updated_at bang chinh no de onupdate khong chay:
+            # phat nhac khong phai thay doi trang thai xu ly
+            .values(
+                last_played_at=bindparam("b_played_at"),
+                updated_at=songs.c.updated_at,
+            )
+        )
+        with SessionLocal() as db:
+            db.execute(statement, [
+                {"b_id": song_id, "b_played_at": played_at}
+                for song_id, played_at in batch.items()
+            ])
+            db.commit()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+
+# ── Module-level instances ────────────────────────────────
+play_tracker = PlayTracker(flush_seconds=settings.PLAY_TRACKER_FLUSH_SECONDS)
@@ -0,0 +1,289 @@
+"""Tai truoc cac bai co kha nang phat tiep theo vao thu vien local.
+
+Module nay chua:
+- Prefetcher: sau moi lan phat bai tu server, lay watch playlist cua
+  YouTube Music va xep ``depth`` bai tiep theo vao lane bulk, de khi
+  player chuyen bai thi file thuong da COMPLETED.
+- Instance ``prefetcher`` dung chung toan ung dung.
+
+Prefetch la tinh nang tuy chon (``PREFETCH_ENABLED``) va bi gioi han:
+- Ngan sach moi client (user ID hoac IP) va ngan sach toan cuc, tinh
+  theo so bai xep hang trong cua so truot 1 gio.
+- Dung lai khi dung luong trong cua AUDIO_DIRECTORY duoi nguong
+  ``PREFETCH_MIN_FREE_MB``, hoac khi thu vien da cham muc sau eviction
+  (``AUDIO_QUOTA_BYTES * EVICTION_TARGET_RATIO``): bai doan truoc khong
+  bao gio day evictor xoa bai nguoi dung da phat.
+- Bai do prefetch tao duoc danh dau ``prefetched``; chua phat lan nao
+  thi evictor xoa truoc, khong duoc tinh la vua dung.
+- Moi bai chi kich hoat prefetch mot lan trong ``SEED_TTL_SECONDS``
+  (trinh duyet gui nhieu Range request cho cung mot lan phat).
+
+Lien quan:
+- Service: download_queue.py (lane bulk), ytmusic_service.py (watch playlist)
+- Route:   app/routes/song_routes.py (kich hoat sau khi phat)
+- Config:  app/config/config.py (PREFETCH_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import shutil
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.utils.executors import run_in_pipeline
+from app.models.song import ProcessingStatus, Song
+from app.services.download_queue import LANE_BULK, download_queue
+from app.services.evictor import evictor
+from app.services.rate_limiter import rate_limiter
+from app.services.youtube_service import YouTubeService
+from app.services.ytmusic_service import yt_background
+
+
+class Prefetcher:
+    """Xep hang tai truoc cac bai tiep theo trong watch playlist.
+
+    Moi thao tac tren ngan sach chay tren event loop nen khong can lock.
+
+    Attributes:
+        enabled: Bat/tat prefetch.
+        depth: So bai tiep theo can tai truoc sau moi lan phat.
+        client_budget: So bai toi da xep hang cho mot client moi gio.
+        global_budget: So bai toi da xep hang cho ca server moi gio.
+        min_free_bytes: Dung luong trong toi thieu cua thu muc audio.
+    """
+
+    BUDGET_WINDOW_SECONDS = 3600
+    SEED_TTL_SECONDS = 600
+    MAX_TRACKED_SEEDS = 1024
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        depth: int = 3,
+        client_budget: int = 30,
+        global_budget: int = 300,
+        min_free_bytes: int = 1024 * 1024 * 1024,
+    ) -> None:
+        self.enabled = enabled
+        self.depth = max(0, depth)
+        self.client_budget = client_budget
+        self.global_budget = global_budget
+        self.min_free_bytes = min_free_bytes
+
+        self._youtube = YouTubeService()
+        # Thoi diem xep hang cac bai da prefetch (cua so truot)
+        self._global_usage: deque[float] = deque()
+        self._client_usage: dict[str, deque[float]] = {}
+        # song_id -> thoi diem kich hoat prefetch gan nhat
+        self._recent_seeds: OrderedDict[str, float] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    # ── Lifecycle ─────────────────────────────────────────
+
+    def schedule(self, song_id: str, client_key: str) -> None:
+        """Kich hoat prefetch nen sau khi ``song_id`` duoc phat.
+
+        Khong cho ket qua: request phat nhac tra ve ngay.
+
+        Args:
+            song_id: Bai vua duoc phat.
+            client_key: Khoa ngan sach cua client (``user:<id>`` hoac
+                ``ip:<addr>``).
+        """
+        if not self.enabled or self.depth == 0:
+            return
+
+        now = time.monotonic()
+        seeded_at = self._recent_seeds.get(song_id)
+        if seeded_at is not None and now - seeded_at < self.SEED_TTL_SECONDS:
+            return
+        self._recent_seeds[song_id] = now
+        self._recent_seeds.move_to_end(song_id)
+        while len(self._recent_seeds) > self.MAX_TRACKED_SEEDS:
+            self._recent_seeds.popitem(last=False)
+
+        task = asyncio.create_task(self._prefetch(song_id, client_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> None:
+        """Huy cac luot prefetch dang chay (khi shutdown)."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # ── Prefetch ──────────────────────────────────────────
+
+    async def _prefetch(self, song_id: str, client_key: str) -> int:
+        """Lay watch playlist va xep cac bai tiep theo vao lane bulk.
+
+        Returns:
+            So bai duoc xep hang.
+        """
+        try:
+            if self._remaining_budget(client_key) <= 0:
+                return 0
+            if not evictor.has_headroom():
+                print("[PREFETCH] Bo qua: thu vien da gan quota")
+                return 0
+            if not await run_in_pipeline(self._has_free_space):
+                print("[PREFETCH] Bo qua: thu muc audio sap day")
+                return 0
+
+            # Cho toi luot tren event loop; thread cua executor chi gui
+            await rate_limiter.acquire("ytmusic")
+            watch = await run_in_pipeline(
+                yt_background.get_watch_playlist, song_id, None, self.depth + 1
+            )
+            tracks = [
+                track for track in watch.get('tracks') or []
+                if track.get('videoId') and track['videoId'] != song_id
+            ][:self.depth]
+            if not tracks:
+                return 0
+
+            jobs = await run_in_pipeline(self._prepare_songs, tracks)
+
+            queued = 0
+            for next_id, url in jobs:
+                if self._remaining_budget(client_key) <= 0:
+                    break
+                if download_queue.enqueue(next_id, url, lane=LANE_BULK):
+                    self._consume(client_key)
+                    queued += 1
+            if queued:
+                print(f"[PREFETCH] Xep {queued} bai tiep theo sau {song_id}")
+            return queued
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[PREFETCH] Loi khi prefetch sau {song_id}: {e}")
+            return 0
+
+    def _prepare_songs(self, tracks: list[dict]) -> list[tuple[str, str]]:
+        """Tao ban ghi PENDING cho bai chua co va tra ve cac bai can tai.
+
+        Bai da COMPLETED, dang PROCESSING hoac loi vinh vien bi bo qua.
+
+        Returns:
+            Danh sach (song_id, url) theo thu tu trong watch playlist.
+        """
+        ids = [track['videoId'] for track in tracks]
+        jobs = []
+        with SessionLocal() as db:
+            existing = {
+                song.id: song
+                for song in db.query(Song).filter(Song.id.in_(ids))
+            }
+            for track in tracks:
+                song = existing.get(track['videoId'])
+                if song is None:
+                    song = self._song_from_track(track)
+                    db.add(song)
+                elif (song.status in (
+                        ProcessingStatus.COMPLETED, ProcessingStatus.PROCESSING,
+                      ) or song.permanent_failure):
+                    continue
+                jobs.append((song.id, song.original_url))
+            db.commit()
+        return jobs
+
+    def _song_from_track(self, track: dict) -> Song:
+        """Tao Song PENDING tu mot track cua watch playlist."""
+        info = self._youtube.placeholder_video_info(track['videoId'])
+        thumbnails = track.get('thumbnail') or []
+        duration = self._parse_length(track.get('length'))
+
+        # Thieu title/thoi luong -> giu metadata tam, pipeline se dien lai
+        if track.get('title') and duration:
+            artists = ', '.join(
+                artist['name'] for artist in track.get('artists') or []
+                if artist.get('name')
+            )
+            info.update({
+                'title': track['title'],
+                'artist': artists or None,
+                'thumbnail_url': (
+                    self._youtube.best_thumbnail_url(thumbnails)
+                    or info['thumbnail_url']
+                ),
+                'duration': duration,
+                'duration_formatted': self._youtube.format_duration(duration),
+                'keywords': ["Music"],
+            })
+
+        return Song(
+            prefetched=True,
+            id=info['id'],
+            title=info['title'],
+            artist=info['artist'],
+            thumbnail_url=info['thumbnail_url'],
+            duration=info['duration'],
+            duration_formatted=info['duration_formatted'],
+            keywords=','.join(info['keywords']),
+            original_url=info['original_url'],
+            status=ProcessingStatus.PENDING,
+        )
+
+    @staticmethod
+    def _parse_length(length: Optional[str]) -> int:
+        """Chuyen "3:45" / "1:02:03" sang so giay (0 neu khong hop le)."""
+        if not length:
+            return 0
+        seconds = 0
+        try:
+            for part in length.split(':'):
+                seconds = seconds * 60 + int(part)
+        except ValueError:
+            return 0
+        return seconds
+
+    # ── Budgets ───────────────────────────────────────────
+
+    def _has_free_space(self) -> bool:
+        try:
+            usage = shutil.disk_usage(settings.AUDIO_DIRECTORY)
+        except OSError:
+            return False
+        return usage.free >= self.min_free_bytes
+
+    def _expire(self, usage: deque[float], now: float) -> None:
+        while usage and now - usage[0] > self.BUDGET_WINDOW_SECONDS:
+            usage.popleft()
+
+    def _remaining_budget(self, client_key: str) -> int:
+        """So bai con duoc prefetch (min cua ngan sach client va toan cuc)."""
+        now = time.monotonic()
+        self._expire(self._global_usage, now)
+        client_usage = self._client_usage.get(client_key)
+        if client_usage is not None:
+            self._expire(client_usage, now)
+            if not client_usage:
+                del self._client_usage[client_key]
+                client_usage = None
+
+        used = len(client_usage) if client_usage is not None else 0
+        return min(
+            self.client_budget - used,
+            self.global_budget - len(self._global_usage),
+        )
+
+    def _consume(self, client_key: str) -> None:
+        now = time.monotonic()
+        self._global_usage.append(now)
+        self._client_usage.setdefault(client_key, deque()).append(now)
+
+
+# ── Module-level instances ────────────────────────────────
+prefetcher = Prefetcher(
+    enabled=settings.PREFETCH_ENABLED,
+    depth=settings.PREFETCH_DEPTH,
+    client_budget=settings.PREFETCH_CLIENT_TRACKS_PER_HOUR,
+    global_budget=settings.PREFETCH_GLOBAL_TRACKS_PER_HOUR,
+    min_free_bytes=settings.PREFETCH_MIN_FREE_MB * 1024 * 1024,
+)
@@ -0,0 +1,322 @@
+"""Gioi han toc do request ra ngoai toi YouTube (token bucket dung chung).
+
+Module nay chua:
+- TokenBucket: bucket trong RAM, an toan voi nhieu thread.
+- RedisTokenBucket: bucket dung chung giua nhieu worker process qua
+  Redis (tuy chon, bat bang ``RATE_LIMIT_REDIS_URL``).
+- RateLimiter: mot bucket cho moi nhom host (ytmusic, youtube,
+  googlevideo, ytimg), co ``acquire`` (async) va ``acquire_blocking``
+  (trong thread). Request tu route cua nguoi dung (``interactive``)
+  dung bo bucket rieng, nen job nen (pipeline, prefetch) khong an het
+  luot cua nguoi dang cho.
+- RateLimitExceeded: het luot ma phai cho lau hon ``max_wait`` (route
+  tra 429 kem Retry-After thay vi ngu trong threadpool).
+- RateLimitedSession: requests.Session xin token truoc moi request,
+  dung cho ytmusicapi (hoac khong xin, khi caller da xin tren event loop).
+- Instance ``rate_limiter`` dung chung toan ung dung.
+
+Bucket cai dat theo kieu dat cho (GCRA): moi lan acquire tra ve thoi
+diem duoc phep gui, nen nhieu job dong thoi xep hang deu nhau thay vi
+cung ngu ngau nhien roi gui dong loat. Phia async chi ``await
+asyncio.sleep`` nen khong chiem thread nao trong luc cho: job nen xin
+luot bang ``acquire`` truoc khi dua viec sang pipeline executor. Route
+dong bo truyen ``max_wait`` de bao loi thay vi giu thread cua AnyIO lau.
+
+Lien quan:
+- Service: youtube_service.py, ytmusic_service.py (xin token)
+- Config:  app/config/config.py (RATE_LIMIT_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# ── Third-party imports ───────────────────────────────────
+import requests
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+
+try:
+    import redis
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis la dependency tuy chon
+    redis = None
+    redis_asyncio = None
+
+
+# Nhom host -> cac hau to domain thuoc nhom (xet theo thu tu: API
+# music.youtube.com cua ytmusicapi co bucket rieng truoc nhom youtube)
+HOST_CLASSES: Dict[str, tuple[str, ...]] = {
+    "ytmusic": ("music.youtube.com",),
+    "youtube": ("youtube.com", "youtu.be"),
+    "googlevideo": ("googlevideo.com",),
+    "ytimg": ("ytimg.com", "ggpht.com", "googleusercontent.com"),
+}
+
+
+class RateLimitExceeded(Exception):
+    """Phai cho lau hon ``max_wait`` moi toi luot gui (HTTP 429).
+
+    Attributes:
+        host_class: Nhom host het luot.
+        retry_after: So giay nua thi co luot.
+    """
+
+    def __init__(self, host_class: str, retry_after: float) -> None:
+        self.host_class = host_class
+        self.retry_after = retry_after
+        self.message = (
+            f"Qua nhieu request toi {host_class}, thu lai sau "
+            f"{int(retry_after) + 1}s"
+        )
+        super().__init__(self.message)
+
+
+class TokenBucket:
+    """Token bucket trong RAM cua mot process.
+
+    Attributes:
+        name: Ten nhom host.
+        rate: So request moi giay (<= 0 = khong gioi han).
+        burst: So request duoc gui lien tiep khi bucket day.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        # Thoi diem "ly thuyet" request tiep theo den (theo monotonic)
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(
+        self, cost: float = 1.0, max_wait: Optional[float] = None
+    ) -> float:
+        """Dat cho ``cost`` token va tra ve so giay can cho truoc khi gui.
+
+        Neu phai cho lau hon ``max_wait`` thi khong dat cho (caller bao
+        loi), gia tri tra ve van la thoi gian phai cho.
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        interval = 1.0 / self.rate
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now) + cost * interval
+            wait = max(0.0, tat - self.burst * interval - now)
+            if max_wait is None or wait <= max_wait:
+                self._tat = tat
+            return wait
+
+    async def areserve(
+        self, cost: float = 1.0, max_wait: Optional[float] = None
+    ) -> float:
+        """Ban async cua ``reserve`` (cung giao dien voi RedisTokenBucket)."""
+        return self.reserve(cost, max_wait)
+
+
+class RedisTokenBucket(TokenBucket):
+    """Token bucket luu trong Redis, dung chung giua nhieu process.
+
+    Phep dat cho chay trong mot Lua script nen nguyen tu, va dung dong
+    ho cua Redis de cac host lech gio khong anh huong. Khi Redis loi thi
+    fallback ve bucket trong RAM cua process.
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local max_wait = tonumber(ARGV[4])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local interval = 1 / rate
+    local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+    tat = math.max(tat, now) + cost * interval
+    local wait = math.max(0, tat - burst * interval - now)
+    if max_wait >= 0 and wait > max_wait then
+        return tostring(wait)
+    end
+    local ttl = math.ceil(tat - now) + 1
+    redis.call('SET', KEYS[1], tostring(tat), 'EX', ttl)
+    return tostring(wait)
+    """
+
+    KEY_PREFIX = "fastapi-music:ratelimit:"
+
+    def __init__(self, name: str, rate: float, burst: int, url: str) -> None:
+        super().__init__(name, rate, burst)
+        self._key = f"{self.KEY_PREFIX}{name}"
+        self._client = redis.Redis.from_url(url)
+        self._async_client = redis_asyncio.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._async_script = self._async_client.register_script(self.SCRIPT)
+
+    def _args(self, cost: float, max_wait: Optional[float]) -> list:
+        # -1 = cho bao lau cung duoc
+        return [self.rate, self.burst, cost, -1 if max_wait is None else max_wait]
+
+    def reserve(
+        self, cost: float = 1.0, max_wait: Optional[float] = None
+    ) -> float:
+        if self.rate <= 0:
+            return 0.0
+        try:
+            return float(self._script(
+                keys=[self._key], args=self._args(cost, max_wait)
+            ))
+        except redis.RedisError as e:
+            print(f"[RATE] Redis loi, dung bucket cuc bo ({self.name}): {e}")
+            return super().reserve(cost, max_wait)
+
+    async def areserve(
+        self, cost: float = 1.0, max_wait: Optional[float] = None
+    ) -> float:
+        if self.rate <= 0:
+            return 0.0
+        try:
+            wait = await self._async_script(
+                keys=[self._key], args=self._args(cost, max_wait)
+            )
+            return float(wait)
+        except redis.RedisError as e:
+            print(f"[RATE] Redis loi, dung bucket cuc bo ({self.name}): {e}")
+            return super().reserve(cost, max_wait)
+
+
+class RateLimiter:
+    """Tap hop bucket theo nhom host cho moi request ra YouTube.
+
+    Chiu trach nhiem:
+        - Phan loai URL vao nhom host (``classify``).
+        - Cho toi luot gui request: ``acquire`` tren event loop,
+          ``acquire_blocking`` trong thread (ytmusicapi, yt-dlp API).
+        - Tach ngan sach: ``interactive=True`` (route cua nguoi dung)
+          dung bucket ``interactive:<nhom>`` rieng.
+    """
+
+    def __init__(self, redis_url: str = "") -> None:
+        limits = {
+            "ytmusic": (
+                settings.RATE_LIMIT_YTMUSIC_PER_SECOND,
+                settings.RATE_LIMIT_YTMUSIC_BURST,
+            ),
+            "youtube": (
+                settings.RATE_LIMIT_YOUTUBE_PER_SECOND,
+                settings.RATE_LIMIT_YOUTUBE_BURST,
+            ),
+            "googlevideo": (
+                settings.RATE_LIMIT_GOOGLEVIDEO_PER_SECOND,
+                settings.RATE_LIMIT_GOOGLEVIDEO_BURST,
+            ),
+            "ytimg": (
+                settings.RATE_LIMIT_YTIMG_PER_SECOND,
+                settings.RATE_LIMIT_YTIMG_BURST,
+            ),
+        }
+
+        use_redis = bool(redis_url)
+        if use_redis and redis is None:
+            print("[RATE] RATE_LIMIT_REDIS_URL duoc dat nhung chua cai redis, dung bucket cuc bo")
+            use_redis = False
+
+        interactive = (
+            settings.RATE_LIMIT_INTERACTIVE_PER_SECOND,
+            settings.RATE_LIMIT_INTERACTIVE_BURST,
+        )
+        for host_class in list(limits):
+            limits[self._bucket_name(host_class, True)] = interactive
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        for name, (rate, burst) in limits.items():
+            if use_redis:
+                self._buckets[name] = RedisTokenBucket(name, rate, burst, redis_url)
+            else:
+                self._buckets[name] = TokenBucket(name, rate, burst)
+
+    @staticmethod
+    def _bucket_name(host_class: str, interactive: bool) -> str:
+        return f"interactive:{host_class}" if interactive else host_class
+
+    @staticmethod
+    def classify(url: Optional[str]) -> str:
+        """Tra ve nhom host cua ``url`` (mac dinh "youtube")."""
+        host = (urlparse(url or "").hostname or "").lower()
+        for name, suffixes in HOST_CLASSES.items():
+            if any(host == s or host.endswith(f".{s}") for s in suffixes):
+                return name
+        return "youtube"
+
+    async def acquire(
+        self, host_class: str, cost: float = 1.0, interactive: bool = False
+    ) -> None:
+        """Cho toi luot gui request toi ``host_class`` (khong block thread)."""
+        bucket = self._buckets[self._bucket_name(host_class, interactive)]
+        wait = await bucket.areserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(
+        self,
+        host_class: str,
+        cost: float = 1.0,
+        max_wait: Optional[float] = None,
+        interactive: bool = False,
+    ) -> None:
+        """Nhu ``acquire`` nhung ngu trong thread hien tai.
+
+        Chi dung o route ``def`` (threadpool cua AnyIO); pipeline
+        executor khong bao gio ngu cho luot ma dung ``acquire``. Route
+        truyen ``max_wait`` de khong giu thread lau.
+
+        Raises:
+            RateLimitExceeded: Phai cho lau hon ``max_wait``.
+        """
+        bucket = self._buckets[self._bucket_name(host_class, interactive)]
+        wait = bucket.reserve(cost, max_wait)
+        if max_wait is not None and wait > max_wait:
+            raise RateLimitExceeded(host_class, wait)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session xin token theo nhom host truoc moi request.
+
+    Attributes:
+        max_wait: Thoi gian cho toi da moi request (None = cho toi luot);
+            vuot qua thi raise ``RateLimitExceeded``.
+        interactive: Xin token tu ngan sach cua route nguoi dung.
+        metered: False = khong xin token; caller da ``await
+            rate_limiter.acquire`` tren event loop truoc khi goi (thread
+            cua pipeline executor khong bao gio ngu cho luot).
+    """
+
+    def __init__(
+        self,
+        max_wait: Optional[float] = None,
+        interactive: bool = False,
+        metered: bool = True,
+    ) -> None:
+        super().__init__()
+        self.max_wait = max_wait
+        self.interactive = interactive
+        self.metered = metered
+
+    def request(self, method, url, *args, **kwargs):
+        if self.metered:
+            rate_limiter.acquire_blocking(
+                rate_limiter.classify(url),
+                max_wait=self.max_wait,
+                interactive=self.interactive,
+            )
+        return super().request(method, url, *args, **kwargs)
+
+
+# ── Module-level instances ────────────────────────────────
+rate_limiter = RateLimiter(redis_url=settings.RATE_LIMIT_REDIS_URL)
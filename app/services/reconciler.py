@@ -0,0 +1,293 @@
+"""Doi soat trang thai DB voi file tren disk khi khoi dong.
+
+Module nay chua:
+- Reconciler: mot luot doi soat chay nen sau startup:
+    1. Bai PROCESSING da qua han claim (process cu chet giua chung) ->
+       tra ve PENDING va dua lai vao hang doi.
+    2. File trong AUDIO_DIRECTORY (ke ca thu muc shard): nhan file .m4a
+       hoan chinh ma DB chua ghi nhan (job chet sau khi ghi file), xoa
+       file raw/.tmp do dang va file .m4a khong con ban ghi nao tro toi.
+    3. Bai COMPLETED ma file audio khong con tren disk -> tra ve
+       PENDING va xep vao lane bulk de tai lai.
+- Instance ``reconciler`` dung chung toan ung dung.
+
+Moi buoc xu ly theo lo ``batch_size`` ban ghi/file, nghi
+``batch_pause`` giay giua cac lo, va chay I/O tren pipeline executor,
+nen thu vien lon khong lam cham startup hay request dang phuc vu.
+
+Lien quan:
+- Service:    download_queue.py (enqueue lai job)
+- Entrypoint: main.py (start/stop trong lifespan)
+- Config:     app/config/config.py (RECONCILE_*, DOWNLOAD_CLAIM_TTL_SECONDS)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.internal.storage.paths import sharded_relpath
+from app.internal.utils.executors import run_in_pipeline
+from app.internal.utils.mmap_pool import mmap_pool
+from app.models.song import ProcessingStatus, Song
+from app.services.audio_index import audio_index
+from app.services.hot_cache import hot_cache
+from app.services.download_queue import LANE_BULK, download_queue
+
+
+# Ten file audio cua pipeline: {song_id}_{timestamp}[.ext]
+AUDIO_FILE_PATTERN = re.compile(r"^(?P<song_id>.+)_(?P<ts>\d{9,})(?P<ext>\..+)?$")
+
+
+class Reconciler:
+    """Chay mot luot doi soat DB <-> disk trong background.
+
+    Attributes:
+        batch_size: So ban ghi/file xu ly moi lo.
+        batch_pause: So giay nghi giua hai lo.
+    """
+
+    def __init__(self, batch_size: int = 200, batch_pause: float = 0.5) -> None:
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause
+        self.audio_dir = Path(settings.AUDIO_DIRECTORY)
+        self._task: Optional[asyncio.Task] = None
+
+    # ── Lifecycle ─────────────────────────────────────────
+
+    def start(self) -> None:
+        """Khoi chay luot doi soat nen (khong cho no xong)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Huy luot doi soat neu con dang chay."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self) -> dict:
+        """Chay ca ba buoc doi soat va in thong ke.
+
+        Returns:
+            Dict so luong: requeued, adopted, deleted, missing.
+        """
+        stats = {"requeued": 0, "adopted": 0, "deleted": 0, "missing": 0}
+        try:
+            stats["requeued"] = await self._requeue_stale_processing()
+            adopted, deleted = await self._reconcile_files()
+            stats["adopted"], stats["deleted"] = adopted, deleted
+            stats["missing"] = await self._verify_completed()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[RECONCILE] Doi soat that bai: {e}")
+
+        print(
+            f"[RECONCILE] requeued={stats['requeued']} adopted={stats['adopted']} "
+            f"deleted={stats['deleted']} missing={stats['missing']}"
+        )
+        return stats
+
+    # ── Step 1: stale PROCESSING rows ─────────────────────
+
+    async def _requeue_stale_processing(self) -> int:
+        """Tra bai PROCESSING qua han claim ve PENDING va xep hang lai."""
+        rows = await run_in_pipeline(self._reset_stale_processing)
+        for song_id, url in rows:
+            download_queue.enqueue(song_id, url)
+        return len(rows)
+
+    def _reset_stale_processing(self) -> list[tuple[str, str]]:
+        stale_before = datetime.utcnow() - timedelta(
+            seconds=settings.DOWNLOAD_CLAIM_TTL_SECONDS
+        )
+        with SessionLocal() as db:
+            rows = (
+                db.query(Song.id, Song.original_url)
+                .filter(
+                    Song.status == ProcessingStatus.PROCESSING,
+                    Song.updated_at < stale_before,
+                )
+                .all()
+            )
+            if not rows:
+                return []
+
+            # Dieu kien updated_at lap lai trong UPDATE: bai vua duoc
+            # worker khac claim lai thi khong bi dong vao
+            db.query(Song).filter(
+                Song.id.in_([song_id for song_id, _ in rows]),
+                Song.status == ProcessingStatus.PROCESSING,
+                Song.updated_at < stale_before,
+            ).update(
+                {Song.status: ProcessingStatus.PENDING},
+                synchronize_session=False,
+            )
+            db.commit()
+        return [(song_id, url) for song_id, url in rows]
+
+    # ── Step 2: files on disk ─────────────────────────────
+
+    async def _reconcile_files(self) -> tuple[int, int]:
+        """Nhan hoac xoa file audio khong khop voi DB, theo tung lo."""
+        names = await run_in_pipeline(self._list_audio_files)
+        adopted = deleted = 0
+        for start in range(0, len(names), self.batch_size):
+            batch = names[start:start + self.batch_size]
+            a, d = await run_in_pipeline(self._reconcile_file_batch, batch)
+            adopted += a
+            deleted += d
+            await asyncio.sleep(self.batch_pause)
+        return adopted, deleted
+
+    def _list_audio_files(self) -> list[str]:
+        """Duong dan tuong doi (POSIX) cua moi file, ke ca trong thu muc shard."""
+        names = []
+        for root, _, files in os.walk(self.audio_dir):
+            rel_root = Path(root).relative_to(self.audio_dir)
+            names.extend((rel_root / name).as_posix() for name in files)
+        return sorted(names)
+
+    def _reconcile_file_batch(self, names: list[str]) -> tuple[int, int]:
+        # File moi sua gan day co the dang duoc process khac ghi
+        grace_before = time.time() - settings.DOWNLOAD_CLAIM_TTL_SECONDS
+
+        parsed = {}
+        for name in names:
+            match = AUDIO_FILE_PATTERN.match(Path(name).name)
+            if match:
+                parsed[name] = (match.group("song_id"), match.group("ext") or "")
+
+        adopted = deleted = 0
+        with SessionLocal() as db:
+            songs = {
+                song.id: song
+                for song in db.query(Song).filter(
+                    Song.id.in_({song_id for song_id, _ in parsed.values()})
+                )
+            }
+
+            for name, (song_id, ext) in parsed.items():
+                path = self.audio_dir / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime > grace_before:
+                    continue
+
+                song = songs.get(song_id)
+                if song is not None and song.audio_filename == name:
+                    continue
+                # migrate_layout dang chuyen bai: link shard da tao (mang
+                # mtime cu cua file goc) nhung UPDATE filename chua commit
+                if (song is not None and song.audio_filename
+                        and sharded_relpath(song_id, song.audio_filename) == name):
+                    continue
+
+                # File .m4a chi xuat hien sau os.replace -> luon hoan chinh.
+                # Bai PROCESSING dang co worker giu claim nen khong dong vao.
+                if (ext == ".m4a" and song is not None
+                        and song.status in (
+                            ProcessingStatus.PENDING, ProcessingStatus.FAILED,
+                        )
+                        and stat.st_size > 1024):
+                    now = datetime.utcnow()
+                    song.audio_filename = name
+                    song.status = ProcessingStatus.COMPLETED
+                    song.completed_at = now
+                    song.error_message = None
+                    song.next_retry_at = None
+                    song.attempts = 0
+                    audio_index.put(song_id, path, song.title)
+                    adopted += 1
+                    continue
+
+                # File raw/.tmp do dang, ban cu bi thay the, hoac khong
+                # con ban ghi nao tro toi
+                path.unlink(missing_ok=True)
+                # Mapping con mo giu inode -> disk chua duoc giai phong
+                mmap_pool.discard(str(path))
+                deleted += 1
+
+            db.commit()
+        return adopted, deleted
+
+    # ── Step 3: COMPLETED rows without audio ──────────────
+
+    async def _verify_completed(self) -> int:
+        """Tra bai COMPLETED mat file ve PENDING (duyet theo keyset)."""
+        missing = 0
+        last_id = ""
+        while True:
+            last_id, reset = await run_in_pipeline(
+                self._verify_completed_batch, last_id
+            )
+            for song_id, url in reset:
+                download_queue.enqueue(song_id, url, lane=LANE_BULK)
+            missing += len(reset)
+            if last_id is None:
+                return missing
+            await asyncio.sleep(self.batch_pause)
+
+    def _verify_completed_batch(
+        self, after_id: str
+    ) -> tuple[Optional[str], list[tuple[str, str]]]:
+        with SessionLocal() as db:
+            rows = (
+                db.query(Song.id, Song.audio_filename, Song.original_url)
+                .filter(
+                    Song.status == ProcessingStatus.COMPLETED,
+                    Song.id > after_id,
+                )
+                .order_by(Song.id.asc())
+                .limit(self.batch_size)
+                .all()
+            )
+            if not rows:
+                return None, []
+
+            reset = []
+            for song_id, filename, url in rows:
+                path = self.audio_dir / filename if filename else None
+                if path is None or not path.is_file() or path.stat().st_size <= 1024:
+                    reset.append((song_id, url))
+                    if path is not None:
+                        mmap_pool.discard(str(path))
+
+            for song_id, _ in reset:
+                audio_index.discard(song_id)
+                hot_cache.discard(song_id)
+
+            if reset:
+                db.query(Song).filter(
+                    Song.id.in_([song_id for song_id, _ in reset]),
+                    Song.status == ProcessingStatus.COMPLETED,
+                ).update(
+                    {
+                        Song.status: ProcessingStatus.PENDING,
+                        Song.audio_filename: None,
+                        Song.completed_at: None,
+                    },
+                    synchronize_session=False,
+                )
+                db.commit()
+
+        next_id = rows[-1][0] if len(rows) == self.batch_size else None
+        return next_id, reset
+
+
+# ── Module-level instances ────────────────────────────────
+reconciler = Reconciler(
+    batch_size=settings.RECONCILE_BATCH_SIZE,
+    batch_pause=settings.RECONCILE_BATCH_PAUSE_SECONDS,
+)
@@ -0,0 +1,264 @@
+"""Chinh sach retry download va circuit breaker cho YouTube.
+
+Module nay chua:
+- ``is_permanent_error``: phan loai loi vinh vien (video rieng tu, da bi
+  xoa, bi chan ban quyen...) voi loi tam thoi (bi chan bot, 429, mat
+  mang) dua tren thong bao loi cua yt-dlp.
+- RetryPolicy: so lan retry toi da va thoi gian cho (exponential backoff
+  co jitter) truoc lan retry tiep theo.
+- CircuitBreaker: tam dung moi lenh trich xuat khi ti le loi tam thoi
+  tang dot bien (YouTube dang chan), tranh dot request vo ich.
+- CircuitOpenError: exception khi breaker dang mo.
+- Instance ``retry_policy`` va ``circuit_breaker`` dung chung toan ung
+  dung.
+
+Lien quan:
+- Service:    youtube_service.py (ghi nhan ket qua, len lich retry)
+- Service:    download_queue.py (quet bai den han retry, cho breaker)
+- Controller: app/controllers/song_controller.py (503 khi breaker mo)
+- Config:     app/config/config.py (DOWNLOAD_RETRY_*, CIRCUIT_*)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+
+
+# Loi tam thoi duoc kiem tra truoc: YouTube doi khi tra "Video
+# unavailable" kem "try again later" khi dang chan IP
+TRANSIENT_ERROR_PATTERNS = re.compile(
+    r"not a bot|try again later|too many requests|http error 429"
+    r"|http error 403|timed out|timeout|connection|temporarily",
+    re.IGNORECASE,
+)
+
+PERMANENT_ERROR_PATTERNS = re.compile(
+    r"private video|video unavailable|has been removed|been terminated"
+    r"|copyright|confirm your age|not available in your country"
+    r"|members-only|join this channel|premieres in|live event will begin"
+    r"|is not a valid url|unsupported url|incomplete youtube id",
+    re.IGNORECASE,
+)
+
+
+def is_permanent_error(message: Optional[str]) -> bool:
+    """True neu loi khong the khac phuc bang cach thu lai.
+
+    Args:
+        message: Thong bao loi (thuong tu yt-dlp DownloadError).
+
+    Returns:
+        True voi loi vinh vien; loi khong nhan dang duoc coi la tam thoi.
+    """
+    if not message or TRANSIENT_ERROR_PATTERNS.search(message):
+        return False
+    return bool(PERMANENT_ERROR_PATTERNS.search(message))
+
+
+class RetryPolicy:
+    """Tinh lich retry cho bai download that bai.
+
+    Attributes:
+        max_attempts: So lan that bai toi da truoc khi bo cuoc.
+        base_seconds: Thoi gian cho sau lan that bai dau tien.
+        max_seconds: Tran thoi gian cho giua hai lan thu.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_seconds: int = 60,
+        max_seconds: int = 3600,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+
+    def next_retry_at(
+        self, attempts: int, now: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """Thoi diem retry sau lan that bai thu ``attempts``.
+
+        Thoi gian cho tang gap doi moi lan, lay ngau nhien trong nua tren
+        cua khoang (equal jitter) de cac bai loi cung luc khong retry
+        dong loat.
+
+        Returns:
+            Thoi diem retry, hoac None neu da het so lan thu.
+        """
+        if attempts >= self.max_attempts:
+            return None
+
+        delay = min(
+            self.max_seconds, self.base_seconds * 2 ** max(0, attempts - 1)
+        )
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        return (now or datetime.utcnow()) + timedelta(seconds=delay)
+
+
+class CircuitOpenError(Exception):
+    """Circuit breaker dang mo, tam dung moi lenh trich xuat YouTube."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        self.message = (
+            f"YouTube tam thoi bi gian doan, thu lai sau {int(retry_after) + 1}s"
+        )
+        super().__init__(self.message)
+
+
+class CircuitBreaker:
+    """Breaker 3 trang thai (closed -> open -> half-open) theo ti le loi.
+
+    Chi ghi nhan loi tam thoi: loi vinh vien la loi cua tung video,
+    khong phai dau hieu YouTube dang chan. Moi thao tac chay tren event
+    loop nen khong can lock.
+
+    Attributes:
+        window_seconds: Cua so truot tinh ti le loi.
+        min_samples: So ket qua toi thieu trong cua so truoc khi xet mo.
+        failure_ratio: Ti le loi tu muc nay tro len thi mo breaker.
+        open_seconds: Thoi gian mo truoc khi cho mot request thu.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window_seconds: int = 300,
+        min_samples: int = 5,
+        failure_ratio: float = 0.5,
+        open_seconds: int = 300,
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+
+        self._results: deque[tuple[float, bool]] = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Trang thai hien tai (closed/open/half_open)."""
+        if (self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.open_seconds):
+            self._state = self.HALF_OPEN
+            self._probe_started_at = None
+        return self._state
+
+    def retry_after(self) -> float:
+        """So giay con lai truoc khi breaker cho request di qua."""
+        state = self.state
+        if state == self.OPEN:
+            return self.open_seconds - (time.monotonic() - self._opened_at)
+        if state == self.HALF_OPEN and self._probe_started_at is not None:
+            # Dang cho ket qua request thu; het han thi cho thu lai
+            elapsed = time.monotonic() - self._probe_started_at
+            return max(0.0, self.open_seconds - elapsed)
+        return 0.0
+
+    def allow(self) -> bool:
+        """True neu duoc gui request (half-open: chi mot request thu)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self.retry_after() <= 0:
+            self._probe_started_at = time.monotonic()
+            return True
+        return False
+
+    def ready(self) -> bool:
+        """True neu ``allow`` se cho qua (khong chiem luot thu half-open)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        return state == self.HALF_OPEN and self.retry_after() <= 0
+
+    def check(self) -> None:
+        """Raise ``CircuitOpenError`` neu breaker khong cho request di qua."""
+        if not self.allow():
+            raise CircuitOpenError(self.retry_after())
+
+    async def wait_until_allowed(self) -> None:
+        """Cho (khong block thread) toi khi breaker cho request di qua."""
+        while not self.allow():
+            await asyncio.sleep(max(1.0, self.retry_after()))
+
+    async def wait_until_ready(self) -> None:
+        """Nhu ``wait_until_allowed`` nhung khong chiem luot thu.
+
+        Tra ve ngay (khong await) neu breaker dang cho qua, nen caller
+        goi ``allow`` ngay sau do chac chan duoc qua.
+        """
+        while not self.ready():
+            await asyncio.sleep(max(1.0, self.retry_after()))
+
+    def record_success(self) -> None:
+        """Ghi nhan request thanh cong; dong breaker neu dang half-open."""
+        if self.state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._results.clear()
+            print("[CIRCUIT] Dong lai, YouTube hoat dong binh thuong")
+        self._append(True)
+
+    def release(self) -> None:
+        """Tra luot thu half-open ma khong ghi ket qua.
+
+        Dung khi request thu that bai vi loi cuc bo (disk, ffmpeg...),
+        khong cho biet gi ve YouTube: request khac duoc thu ngay.
+        """
+        if self.state == self.HALF_OPEN:
+            self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Ghi nhan loi tam thoi; mo breaker khi ti le loi vuot nguong."""
+        state = self.state
+        self._append(False)
+
+        if state == self.HALF_OPEN:
+            self._open()
+            return
+
+        if state == self.CLOSED and len(self._results) >= self.min_samples:
+            failures = sum(1 for _, ok in self._results if not ok)
+            if failures / len(self._results) >= self.failure_ratio:
+                self._open()
+
+    def _append(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._results.append((now, ok))
+        while self._results and now - self._results[0][0] > self.window_seconds:
+            self._results.popleft()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started_at = None
+        print(f"[CIRCUIT] Mo breaker, tam dung trich xuat {self.open_seconds}s")
+
+
+# ── Module-level instances ────────────────────────────────
+retry_policy = RetryPolicy(
+    max_attempts=settings.DOWNLOAD_RETRY_MAX_ATTEMPTS,
+    base_seconds=settings.DOWNLOAD_RETRY_BASE_SECONDS,
+    max_seconds=settings.DOWNLOAD_RETRY_MAX_SECONDS,
+)
+circuit_breaker = CircuitBreaker(
+    window_seconds=settings.CIRCUIT_WINDOW_SECONDS,
+    min_samples=settings.CIRCUIT_MIN_SAMPLES,
+    failure_ratio=settings.CIRCUIT_FAILURE_RATIO,
+    open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+)
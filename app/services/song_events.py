@@ -0,0 +1,134 @@
+"""Pub/sub trong process cho su kien trang thai xu ly bai hat.
+
+Module nay chua:
+- SongEventBus: cho phep pipeline download publish moi lan chuyen trang
+  thai (processing, tien do, completed, failed) va cho cac client (SSE,
+  long-poll proxy-download) subscribe theo song_id thay vi poll DB.
+- Instance ``song_events`` dung chung toan ung dung.
+
+Bus chi hoat dong trong mot process. Khi job chay o worker process khac,
+nguoi dung van nhan ket qua nho fallback kiem tra DB dinh ky (xem
+``SongController.proxy_download_audio``).
+
+Lien quan:
+- Service:    youtube_service.py, download_progress.py (publish)
+- Controller: app/controllers/song_controller.py (subscribe)
+"""
+
+# ── Standard library imports ──────────────────────────────
+import asyncio
+from typing import Any, Dict, Iterable, Optional
+
+
+# Trang thai ket thuc — subscriber ngung cho khi nhan duoc
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class SongEventBus:
+    """Phan phoi su kien trang thai bai hat toi cac subscriber asyncio.
+
+    Moi subscriber la mot ``asyncio.Queue`` gan voi mot song_id. Publish
+    an toan tu thread khac (VD: yt-dlp progress hook trong executor) nho
+    ``call_soon_threadsafe`` ve event loop da dang ky.
+    """
+
+    QUEUE_MAXSIZE = 100
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ── Subscribe ─────────────────────────────────────────
+
+    def subscribe(self, song_id: str) -> asyncio.Queue:
+        """Dang ky nhan su kien cua ``song_id``.
+
+        Phai goi tu event loop. Nho ``unsubscribe`` trong finally.
+
+        Returns:
+            Queue nhan cac dict su kien.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_MAXSIZE)
+        self._subscribers.setdefault(song_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, song_id: str, queue: asyncio.Queue) -> None:
+        """Huy dang ky mot queue da tao boi ``subscribe``."""
+        queues = self._subscribers.get(song_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(song_id, None)
+
+    async def wait_for(
+        self,
+        queue: asyncio.Queue,
+        statuses: Iterable[str] = TERMINAL_STATUSES,
+        timeout: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Cho toi khi queue nhan su kien co status thuoc ``statuses``.
+
+        Args:
+            queue: Queue da subscribe.
+            statuses: Cac gia tri status can cho.
+            timeout: So giay toi da (None = cho mai).
+
+        Returns:
+            Dict su kien khop, hoac None neu het thoi gian.
+        """
+        wanted = set(statuses)
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while True:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                event = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return None
+            if event.get("status") in wanted:
+                return event
+
+    # ── Publish ───────────────────────────────────────────
+
+    def publish(self, song_id: str, **event: Any) -> None:
+        """Gui su kien toi moi subscriber cua ``song_id``.
+
+        Khong co subscriber thi bo qua ngay (khong ton chi phi).
+
+        Args:
+            song_id: ID bai hat.
+            **event: Noi dung su kien (status, progress, stage...).
+        """
+        if not self._subscribers.get(song_id) or self._loop is None:
+            return
+
+        event["id"] = song_id
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._dispatch(song_id, event)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._dispatch, song_id, event)
+
+    def _dispatch(self, song_id: str, event: Dict[str, Any]) -> None:
+        """Dua su kien vao queue cua tung subscriber (chay tren loop)."""
+        for queue in list(self._subscribers.get(song_id, ())):
+            if queue.full():
+                # Subscriber cham: bo su kien cu nhat, giu su kien moi
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(dict(event))
+
+
+# ── Module-level instances ────────────────────────────────
+song_events = SongEventBus()
@@ -9,18 +9,23 @@ Module này chứa:
 
 Liên quan:
 - Model:  song.py (Song, ProcessingStatus)
+- Service: ytmusic_service.py (provider metadata nhẹ qua ytmusicapi)
 - Config: config.py (settings.AUDIO_DIRECTORY, settings.THUMBNAIL_DIRECTORY)
 """
 
 # ── Standard library imports ──────────────────────────────
 import asyncio
+import errno
 import json
 import os
 import random
 import re
+import shutil
+import sys
+import tempfile
 import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -28,11 +33,26 @@ from typing import Any, Dict, Optional
 import aiofiles
 import requests
 import yt_dlp
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 # ── Internal imports ──────────────────────────────────────
 from app.config.config import settings
+from app.config.database import SessionLocal
 from app.models.song import ProcessingStatus, Song
+from app.services.download_progress import download_progress
+from app.services.song_events import song_events
+from app.services.live_downloads import live_downloads
+from app.services.extraction_cache import extraction_cache
+from app.services.audio_index import audio_index
+from app.services.evictor import evictor
+from app.services.rate_limiter import rate_limiter
+from app.services.ytmusic_service import yt_background
+from app.services.retry_policy import (
+    circuit_breaker, is_permanent_error, retry_policy,
+)
+from app.internal.storage.paths import audio_relpath, thumbnail_relpath
+from app.internal.utils.executors import run_in_control, run_in_pipeline
 
 
 class YouTubeService:
@@ -44,10 +64,17 @@ class YouTubeService:
         - Download thumbnail và lưu lên server.
         - Cập nhật trạng thái xử lý (PROCESSING/COMPLETED/FAILED) vào DB.
 
-    Sử dụng pool User-Agent ngẫu nhiên và delay giữa các request
+    Sử dụng pool User-Agent ngẫu nhiên và ``rate_limiter`` dùng chung
     để giảm nguy cơ bị YouTube rate-limit hoặc detect bot.
     """
 
+    # Tên provider metadata (settings.METADATA_PROVIDERS) -> method
+    METADATA_PROVIDERS = {
+        'ytmusic': '_ytmusic_metadata',
+        'ytdlp': '_ytdlp_metadata',
+    }
+    REQUIRED_METADATA_FIELDS = ('title', 'artist', 'thumbnail_url', 'duration')
+
     def __init__(self) -> None:
         self.audio_dir = Path(settings.AUDIO_DIRECTORY)
         self.thumbnail_dir = Path(settings.THUMBNAIL_DIRECTORY)
@@ -62,6 +89,13 @@ class YouTubeService:
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         ]
 
+        # yt-dlp luôn đứng cuối chuỗi: là provider duy nhất báo lỗi chi
+        # tiết (video riêng tư, đã xoá...) khi các provider nhẹ thất bại
+        self.metadata_providers = [
+            name.strip() for name in settings.METADATA_PROVIDERS.split(',')
+            if name.strip() in self.METADATA_PROVIDERS and name.strip() != 'ytdlp'
+        ] + ['ytdlp']
+
     # ── Utility methods ───────────────────────────────────
 
     def extract_video_id(self, url: str) -> Optional[str]:
@@ -111,31 +145,37 @@ class YouTubeService:
 
     # ── Video info extraction ─────────────────────────────
 
-    async def get_video_info(
-        self, url: str, quick_check: bool = False
+    async def extract_info(
+        self,
+        url: str,
+        quick_check: bool = False,
+        extra_opts: Optional[Dict[str, Any]] = None,
+        check_breaker: bool = True,
     ) -> Dict[str, Any]:
-        """Lấy metadata video từ YouTube mà không download.
+        """Gọi yt-dlp ``extract_info`` (không download) và trả về info dict thô.
 
-        Trích xuất các thông tin: title, artist, thumbnail URL,
-        duration, keywords. Chạy trong thread pool để không block
-        event loop của FastAPI.
+        Mọi lần trích xuất đều đi qua circuit breaker và rate limiter
+        nhóm youtube, chạy trên pipeline executor để không block event
+        loop của FastAPI.
 
         Args:
-            url: URL YouTube cần lấy thông tin.
-            quick_check: Nếu True, giảm timeout và delay cho việc
+            url: URL YouTube (video hoặc playlist).
+            quick_check: Nếu True, giảm timeout và số lần retry cho việc
                 kiểm tra nhanh (VD: validate URL trước khi download).
+            extra_opts: Tuỳ chọn yt-dlp bổ sung (VD: ``extract_flat``).
+            check_breaker: False khi caller tự quản lý breaker (đã giữ
+                lượt, tự ghi nhận kết quả): không kiểm tra, không ghi nhận.
 
         Returns:
-            Dict chứa metadata video với các key:
-                id, title, artist, thumbnail_url, duration,
-                duration_formatted, keywords, original_url.
+            Info dict của yt-dlp (kèm danh sách formats hoặc entries).
 
         Raises:
             yt_dlp.DownloadError: Khi URL không hợp lệ hoặc video
                 không khả dụng.
+            CircuitOpenError: Khi circuit breaker đang tạm dừng trích
+                xuất do YouTube lỗi hàng loạt.
         """
         socket_timeout = 15 if quick_check else 30
-        delay_range = (0.5, 1.5) if quick_check else (1, 3)
 
         ydl_opts = {
             'quiet': True,
@@ -154,36 +194,199 @@ class YouTubeService:
             'retries': 2 if quick_check else 3,
             'nocheckcertificate': True,
         }
+        if extra_opts:
+            ydl_opts.update(extra_opts)
 
         def _extract_info():
-            # Delay ngẫu nhiên trước mỗi request để tránh rate limiting
-            time.sleep(random.uniform(*delay_range))
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 return ydl.extract_info(url, download=False)
 
-        loop = asyncio.get_event_loop()
-        info = await loop.run_in_executor(None, _extract_info)
+        # Breaker mở (YouTube đang chặn) -> dừng ngay, không tốn request
+        if check_breaker:
+            circuit_breaker.check()
+        # Chờ lượt trên event loop (không chiếm thread) để giới hạn tổng
+        # số request tới YouTube giữa mọi job đang chạy
+        await rate_limiter.acquire("youtube")
+        try:
+            info = await run_in_pipeline(_extract_info)
+        except Exception as e:
+            if check_breaker:
+                self.record_upstream_outcome(e)
+            raise
+        if check_breaker:
+            self.record_upstream_outcome(None)
+        return info
+
+    @staticmethod
+    def record_upstream_outcome(error: Optional[Exception]) -> None:
+        """Ghi kết quả một lượt gọi YouTube vào circuit breaker.
+
+        Chỉ gọi cho lỗi/thành công của request tới YouTube (trích xuất,
+        tải), mỗi thao tác đúng một lần. Lỗi vĩnh viễn của riêng video
+        nghĩa là YouTube vẫn trả lời bình thường nên tính là thành công.
+        """
+        if error is not None and not is_permanent_error(str(error)):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+
+    async def get_video_info(
+        self, url: str, quick_check: bool = False, check_breaker: bool = True
+    ) -> Dict[str, Any]:
+        """Lấy metadata video từ YouTube mà không download.
+
+        Trích xuất các thông tin: title, artist, thumbnail URL,
+        duration, keywords.
+
+        Metadata đi qua chuỗi provider ``settings.METADATA_PROVIDERS``:
+        ytmusicapi ``get_song`` (một request nhẹ) trước, yt-dlp
+        ``extract_info`` (tải player JS, chọn format) chỉ khi còn thiếu
+        trường bắt buộc. Formats không được trích xuất ở đây: stage
+        download tự trích xuất khi bắt đầu tải, hoặc dùng lại
+        ``extraction_cache`` nếu provider yt-dlp đã chạy.
+
+        Args:
+            url: URL YouTube cần lấy thông tin.
+            quick_check: Nếu True, giảm timeout và số lần retry của yt-dlp.
+            check_breaker: False khi caller đã giữ lượt của breaker
+                (pipeline download): lượt thử half-open đã được worker
+                lấy, kiểm tra lại sẽ luôn báo breaker đang mở. Khi đó
+                caller tự ghi nhận kết quả, ở đây không ghi gì.
 
+        Returns:
+            Dict chứa metadata video với các key:
+                id, title, artist, thumbnail_url, duration,
+                duration_formatted, keywords, original_url.
+
+        Raises:
+            yt_dlp.DownloadError: Khi URL không hợp lệ hoặc video
+                không khả dụng.
+            CircuitOpenError: Khi circuit breaker đang mở.
+        """
         video_id = self.extract_video_id(url)
+        metadata: Dict[str, Any] = {}
+
+        # Kiểm tra breaker một lần cho cả chuỗi provider: half-open chỉ
+        # có một lượt thử, provider sau kiểm tra lại sẽ tự chặn mình
+        if check_breaker:
+            circuit_breaker.check()
+
+        # Cả chuỗi provider tính là một mẫu của breaker: ytmusicapi lỗi
+        # rồi yt-dlp lỗi tiếp vẫn chỉ là một video lỗi
+        try:
+            for name in self.metadata_providers:
+                provider = getattr(self, self.METADATA_PROVIDERS[name])
+                found = await provider(url, video_id, quick_check)
+                if not found:
+                    continue
+                # Provider sau chỉ bổ sung trường provider trước còn thiếu
+                for key, value in found.items():
+                    if not metadata.get(key):
+                        metadata[key] = value
+                if all(metadata.get(key) for key in self.REQUIRED_METADATA_FIELDS):
+                    break
+        except Exception as e:
+            if check_breaker:
+                self.record_upstream_outcome(e)
+            raise
+        if check_breaker and metadata:
+            self.record_upstream_outcome(None)
+
+        video_id = video_id or metadata.get('id') or str(uuid.uuid4())
+        duration = int(metadata.get('duration') or 0)
+        return {
+            'id': video_id,
+            'title': metadata.get('title') or 'Unknown Title',
+            'artist': metadata.get('artist') or 'Unknown Artist',
+            'thumbnail_url': metadata.get('thumbnail_url') or '',
+            'duration': duration,
+            'duration_formatted': self.format_duration(duration),
+            'keywords': metadata.get('keywords') or ["Music"],
+            'original_url': url,
+        }
+
+    async def _ytmusic_metadata(
+        self, url: str, video_id: Optional[str], quick_check: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Provider ytmusicapi: metadata từ ``get_song`` (không có formats).
+
+        Breaker do ``get_video_info`` kiểm tra và ghi nhận (một lần cho
+        cả chuỗi provider).
+
+        Returns:
+            Metadata (có thể thiếu trường), hoặc None nếu không có video ID,
+            video không phát được hoặc request lỗi — khi đó yt-dlp sẽ
+            trích xuất và trả lỗi chi tiết.
+        """
         if not video_id:
-            video_id = info.get('id', str(uuid.uuid4()))
-
-        # Ưu tiên thumbnail chất lượng cao nhất (sắp xếp theo diện tích pixel)
-        thumbnail_url = info.get('thumbnail')
-        if not thumbnail_url and 'thumbnails' in info:
-            thumbnails = info['thumbnails']
-            sorted_thumbnails = sorted(
-                thumbnails,
-                key=lambda x: ((x.get('width') or 0) * (x.get('height') or 0)),
-                reverse=True
-            )
-            if sorted_thumbnails:
-                thumbnail_url = sorted_thumbnails[0].get('url')
+            return None
+
+        try:
+            # Chờ tới lượt trên event loop; thread của executor chỉ gửi
+            await rate_limiter.acquire("ytmusic")
+            song = await run_in_pipeline(yt_background.get_song, video_id)
+        except Exception as e:
+            print(f"[METADATA] ytmusicapi loi cho {video_id}: {e}")
+            return None
+
+        playability = (song.get('playabilityStatus') or {}).get('status')
+        details = song.get('videoDetails') or {}
+        if playability != 'OK' or not details:
+            return None
+
+        thumbnails = (details.get('thumbnail') or {}).get('thumbnails') or []
+        microformat = (
+            (song.get('microformat') or {}).get('microformatDataRenderer') or {}
+        )
+
+        # Cùng quy tắc với build_video_info: 5 tags đầu + category
+        keywords = list((microformat.get('tags') or [])[:5])
+        if microformat.get('category'):
+            keywords.append(microformat['category'])
+
+        return {
+            'id': details.get('videoId') or video_id,
+            'title': details.get('title'),
+            'artist': details.get('author'),
+            'thumbnail_url': self.best_thumbnail_url(thumbnails),
+            'duration': int(details.get('lengthSeconds') or 0),
+            'keywords': keywords,
+        }
+
+    async def _ytdlp_metadata(
+        self, url: str, video_id: Optional[str], quick_check: bool
+    ) -> Dict[str, Any]:
+        """Provider yt-dlp: trích xuất đầy đủ, lưu info dict vào cache."""
+        # Breaker do get_video_info kiểm tra và ghi nhận
+        info = await self.extract_info(
+            url, quick_check=quick_check, check_breaker=False,
+        )
+        video_id = video_id or info.get('id', str(uuid.uuid4()))
+
+        extraction_cache.put(info.get('id') or video_id, info)
+        return self.build_video_info(info, url, video_id)
+
+    def build_video_info(
+        self, info: Dict[str, Any], url: str, video_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Chuyển info dict của yt-dlp (video hoặc entry flat) sang metadata.
+
+        Args:
+            info: Info dict đầy đủ hoặc entry của playlist flat.
+            url: URL gốc lưu vào ``original_url``.
+            video_id: ID video (mặc định lấy từ ``info``).
+
+        Returns:
+            Dict metadata cùng định dạng với ``get_video_info``.
+        """
+        thumbnail_url = info.get('thumbnail') or self.best_thumbnail_url(
+            info.get('thumbnails') or []
+        )
 
         # Giới hạn 5 tags để tránh lưu quá nhiều dữ liệu không cần thiết
         keywords = []
-        tags = info.get('tags', [])
-        categories = info.get('categories', [])
+        tags = info.get('tags') or []
+        categories = info.get('categories') or []
         if tags:
             keywords.extend(tags[:5])
         if categories:
@@ -191,17 +394,102 @@ class YouTubeService:
         if not keywords:
             keywords = ["Music"]
 
+        duration = int(info.get('duration') or 0)
         return {
-            'id': video_id,
-            'title': info.get('title', 'Unknown Title'),
-            'artist': info.get('uploader', 'Unknown Artist'),
+            'id': video_id or info.get('id'),
+            'title': info.get('title') or 'Unknown Title',
+            'artist': (
+                info.get('uploader') or info.get('channel') or 'Unknown Artist'
+            ),
             'thumbnail_url': thumbnail_url or '',
-            'duration': int(info.get('duration', 0)),
-            'duration_formatted': self.format_duration(int(info.get('duration', 0))),
+            'duration': duration,
+            'duration_formatted': self.format_duration(duration),
             'keywords': keywords,
             'original_url': url,
         }
 
+    @staticmethod
+    def best_thumbnail_url(thumbnails: list) -> Optional[str]:
+        """Thumbnail chất lượng cao nhất (sắp xếp theo diện tích pixel)."""
+        if not thumbnails:
+            return None
+        best = max(
+            thumbnails,
+            key=lambda x: (x.get('width') or 0) * (x.get('height') or 0),
+        )
+        return best.get('url')
+
+    def placeholder_video_info(self, video_id: str) -> Dict[str, Any]:
+        """Metadata tạm cho video chưa trích xuất (import hàng loạt).
+
+        Metadata thật được ghi đè khi pipeline download trích xuất video
+        (xem ``is_placeholder``).
+        """
+        return {
+            'id': video_id,
+            'title': video_id,
+            'artist': None,
+            'thumbnail_url': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+            'duration': 0,
+            'duration_formatted': self.format_duration(0),
+            'keywords': [],
+            'original_url': f"https://www.youtube.com/watch?v={video_id}",
+        }
+
+    @staticmethod
+    def is_placeholder(song_id: str, title: str, duration: int) -> bool:
+        """True nếu bài hát chỉ mang metadata tạm của ``placeholder_video_info``."""
+        return title == song_id and not duration
+
+    # ── Playlist expansion ────────────────────────────────
+
+    # Entry flat của video không còn xem được trong playlist
+    UNAVAILABLE_ENTRY_TITLES = ('[Private video]', '[Deleted video]')
+
+    def extract_playlist_id(self, value: str) -> Optional[str]:
+        """Lấy playlist ID từ URL (tham số ``list``) hoặc trả về nguyên ID."""
+        match = re.search(r'[?&]list=([A-Za-z0-9_-]+)', value)
+        if match:
+            return match.group(1)
+        if re.fullmatch(r'[A-Za-z0-9_-]{10,}', value):
+            return value
+        return None
+
+    async def get_playlist_entries(
+        self, playlist_id: str, limit: int
+    ) -> list[Dict[str, Any]]:
+        """Liệt kê video của playlist bằng một lần trích xuất flat.
+
+        Chế độ ``extract_flat`` chỉ tải trang playlist (không mở từng
+        video), trả về id, title, kênh, thời lượng và thumbnail của mỗi
+        entry.
+
+        Args:
+            playlist_id: YouTube playlist ID.
+            limit: Số video tối đa lấy từ đầu playlist.
+
+        Returns:
+            Danh sách metadata (định dạng ``get_video_info``), bỏ qua video
+            riêng tư hoặc đã bị xoá.
+        """
+        info = await self.extract_info(
+            f"https://www.youtube.com/playlist?list={playlist_id}",
+            extra_opts={'extract_flat': 'in_playlist', 'playlistend': limit},
+        )
+
+        results = []
+        for entry in info.get('entries') or []:
+            if not entry or not entry.get('id'):
+                continue
+            if entry.get('title') in self.UNAVAILABLE_ENTRY_TITLES:
+                continue
+            results.append(self.build_video_info(
+                entry,
+                f"https://www.youtube.com/watch?v={entry['id']}",
+                entry['id'],
+            ))
+        return results
+
     # ── Thumbnail download ────────────────────────────────
 
     async def download_thumbnail_to_server(
@@ -210,15 +498,17 @@ class YouTubeService:
         """Download thumbnail từ URL và lưu vào thư mục server.
 
         Tên file được tạo theo format: {video_id}_{timestamp}.{ext}
-        để đảm bảo không trùng lặp khi cùng video được download lại.
+        để đảm bảo không trùng lặp khi cùng video được download lại,
+        đặt trong thư mục shard của video (xem ``thumbnail_relpath``).
 
         Args:
             thumbnail_url: URL ảnh thumbnail cần download.
             video_id: YouTube video ID, dùng làm prefix tên file.
 
         Returns:
-            Tên file thumbnail đã lưu (VD: "abc123_1713300000.jpg"),
-            hoặc None nếu download thất bại hoặc URL rỗng.
+            Đường dẫn tương đối của thumbnail đã lưu (VD:
+            "3f/a2/abc123_1713300000.jpg"), hoặc None nếu download thất
+            bại hoặc URL rỗng.
         """
         try:
             if not thumbnail_url:
@@ -234,7 +524,7 @@ class YouTubeService:
             else:
                 extension = '.jpg'
 
-            filename = f"{video_id}_{timestamp}{extension}"
+            filename = thumbnail_relpath(video_id, timestamp, extension)
             thumbnail_path = self.thumbnail_dir / filename
 
             def _download_thumbnail():
@@ -251,14 +541,15 @@ class YouTubeService:
                 )
                 response.raise_for_status()
 
+                thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
                 with open(thumbnail_path, 'wb') as f:
                     f.write(response.content)
 
                 # Kiểm tra file tồn tại và có dung lượng hợp lệ
                 return thumbnail_path.exists() and thumbnail_path.stat().st_size > 0
 
-            loop = asyncio.get_event_loop()
-            success = await loop.run_in_executor(None, _download_thumbnail)
+            await rate_limiter.acquire(rate_limiter.classify(thumbnail_url))
+            success = await run_in_pipeline(_download_thumbnail)
 
             if success:
                 return filename
@@ -268,150 +559,723 @@ class YouTubeService:
             print(f"[ERROR] Download thumbnail that bai: {e}")
             return None
 
-    # ── Audio download & processing ───────────────────────
+    # ── Single-flight claim ───────────────────────────────
+
+    def claim_song(self, db: Session, song_id: str) -> Optional[str]:
+        """Giành quyền download một bài hát bằng UPDATE nguyên tử.
 
-    async def download_audio_and_thumbnail(
-        self, song_id: str, url: str, db: Session
+        Chỉ một worker (trong cùng process hoặc giữa nhiều process) có
+        thể chuyển bài từ PENDING/FAILED/EVICTED sang PROCESSING. Bài PROCESSING
+        quá ``DOWNLOAD_CLAIM_TTL_SECONDS`` không cập nhật được coi là
+        worker cũ đã chết và có thể được claim lại. Bài FAILED chỉ được
+        claim khi đã tới ``next_retry_at`` (giữ backoff của từng bài);
+        bài lỗi vĩnh viễn (``permanent_failure``) không bao giờ được claim.
+
+        Mỗi lần claim ghi một ``claim_token`` mới: worker cũ (claim hết
+        hạn, bị claim lại) không còn ghi đè được kết quả của chủ mới.
+
+        Args:
+            db: SQLAlchemy Session.
+            song_id: ID bài hát cần claim.
+
+        Returns:
+            Claim token nếu claim thành công, None nếu bài đang được
+            worker khác xử lý, đã COMPLETED hoặc không tồn tại.
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        stale_before = now - timedelta(
+            seconds=settings.DOWNLOAD_CLAIM_TTL_SECONDS
+        )
+
+        claimed = db.query(Song).filter(
+            Song.id == song_id,
+            or_(
+                Song.status.in_(
+                    (ProcessingStatus.PENDING, ProcessingStatus.EVICTED)
+                ),
+                and_(
+                    Song.status == ProcessingStatus.FAILED,
+                    Song.permanent_failure.is_(False),
+                    or_(
+                        Song.next_retry_at.is_(None),
+                        Song.next_retry_at <= now,
+                    ),
+                ),
+                and_(
+                    Song.status == ProcessingStatus.PROCESSING,
+                    Song.updated_at < stale_before,
+                ),
+            ),
+        ).update(
+            {
+                Song.status: ProcessingStatus.PROCESSING,
+                Song.error_message: None,
+                Song.updated_at: now,
+                Song.claim_token: token,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        return token if claimed == 1 else None
+
+    def _claim_for_download(
+        self, song_id: str
+    ) -> Optional[tuple[str, str, int, str]]:
+        """Claim bài hát và đọc metadata cần cho pipeline download.
+
+        Chạy trong executor (truy vấn DB đồng bộ).
+
+        Returns:
+            Tuple (token, title, duration, thumbnail_url), hoặc None nếu
+            không claim được.
+        """
+        with SessionLocal() as db:
+            token = self.claim_song(db, song_id)
+            if token is None:
+                return None
+            title, duration, thumbnail_url = db.query(
+                Song.title, Song.duration, Song.thumbnail_url
+            ).filter(Song.id == song_id).one()
+        return token, title, duration, thumbnail_url
+
+    def _owned(self, song_id: str, token: str):
+        """Điều kiện WHERE: bài vẫn PROCESSING và claim còn thuộc ``token``."""
+        return and_(
+            Song.id == song_id,
+            Song.status == ProcessingStatus.PROCESSING,
+            Song.claim_token == token,
+        )
+
+    def touch_song(self, song_id: str, token: str) -> bool:
+        """Làm mới ``updated_at`` của bài đang PROCESSING (heartbeat claim).
+
+        Args:
+            song_id: ID bài hát đang được worker này xử lý.
+            token: Claim token của worker.
+
+        Returns:
+            True nếu worker vẫn giữ claim.
+        """
+        with SessionLocal() as db:
+            touched = db.query(Song).filter(
+                self._owned(song_id, token)
+            ).update(
+                {Song.updated_at: datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+        return touched == 1
+
+    async def _heartbeat_loop(self, song_id: str, token: str) -> None:
+        """Gọi ``touch_song`` định kỳ cho tới khi bị huỷ.
+
+        Chu kỳ bằng 1/3 ``DOWNLOAD_CLAIM_TTL_SECONDS`` để một lần ghi lỗi
+        tạm thời không làm claim hết hạn.
+        """
+        interval = max(1, settings.DOWNLOAD_CLAIM_TTL_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Control executor: không xếp hàng sau yt-dlp đang chạy
+                await run_in_control(self.touch_song, song_id, token)
+            except Exception as e:
+                print(f"[ERROR] Heartbeat that bai cho {song_id}: {e}")
+
+    def _complete_song(
+        self,
+        song_id: str,
+        token: str,
+        audio_filename: str,
+        thumbnail_filename: Optional[str],
+        metadata: Optional[Dict[str, Any]] = None,
     ) -> bool:
-        """Download audio và thumbnail trong background, cập nhật DB.
+        """Ghi kết quả download và chuyển bài sang COMPLETED.
 
-        Flow xử lý:
-            1. Cập nhật trạng thái bài hát sang PROCESSING.
-            2. Download audio raw bằng yt-dlp (chạy trong thread pool).
-            3. Convert sang .m4a bằng ffmpeg subprocess.
-            4. Nếu ffmpeg fail, fallback rename file raw thành .m4a.
-            5. Download thumbnail.
-            6. Cập nhật DB: audio_filename, thumbnail_filename,
-               status = COMPLETED.
-            7. Nếu có lỗi: status = FAILED + ghi error_message.
+        ``metadata`` (từ ``get_video_info``) thay thế metadata tạm của
+        bài tạo bởi bulk-info.
+
+        Returns:
+            False nếu claim ``token`` đã mất (không ghi gì).
+        """
+        now = datetime.utcnow()
+        values = {
+            Song.audio_filename: audio_filename,
+            Song.thumbnail_filename: thumbnail_filename,
+            Song.status: ProcessingStatus.COMPLETED,
+            Song.completed_at: now,
+            Song.updated_at: now,
+            Song.attempts: 0,
+            Song.next_retry_at: None,
+            Song.claim_token: None,
+        }
+        if metadata:
+            values.update({
+                Song.title: metadata['title'],
+                Song.artist: metadata['artist'],
+                Song.thumbnail_url: metadata['thumbnail_url'],
+                Song.duration: metadata['duration'],
+                Song.duration_formatted: metadata['duration_formatted'],
+                Song.keywords: ','.join(metadata['keywords']),
+            })
+        with SessionLocal() as db:
+            updated = db.query(Song).filter(
+                self._owned(song_id, token)
+            ).update(values, synchronize_session=False)
+            db.commit()
+        return updated == 1
+
+    def _fail_song(
+        self, song_id: str, token: str, error_message: str
+    ) -> tuple[bool, Optional[datetime]]:
+        """Chuyển bài sang FAILED kèm thông báo lỗi và lên lịch retry.
+
+        Lỗi vĩnh viễn hoặc đã hết số lần thử thì đánh dấu
+        ``permanent_failure``; ngược lại tăng ``attempts`` và đặt
+        ``next_retry_at`` theo ``retry_policy``.
+
+        Returns:
+            Tuple (updated, next_retry_at): False nếu claim ``token`` đã
+            mất (không ghi gì); thời điểm retry tự động, hoặc None nếu
+            không retry nữa.
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            attempts = db.query(Song.attempts).filter(
+                self._owned(song_id, token)
+            ).scalar()
+            if attempts is None:
+                return False, None
+            attempts += 1
+
+            next_retry_at = None
+            if not is_permanent_error(error_message):
+                next_retry_at = retry_policy.next_retry_at(attempts, now)
+
+            updated = db.query(Song).filter(
+                self._owned(song_id, token)
+            ).update(
+                {
+                    Song.status: ProcessingStatus.FAILED,
+                    Song.error_message: error_message,
+                    Song.attempts: attempts,
+                    Song.next_retry_at: next_retry_at,
+                    Song.permanent_failure: next_retry_at is None,
+                    Song.updated_at: now,
+                    Song.claim_token: None,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        if updated != 1:
+            return False, None
+        return True, next_retry_at
+
+    # ── Audio download strategies ─────────────────────────
+
+    # Ưu tiên m4a: raw stream phát được ngay trên mọi trình duyệt/iOS khi
+    # proxy-download stream song song, và ffmpeg chỉ cần copy codec
+    AUDIO_FORMAT = 'bestaudio[ext=m4a]/bestaudio/best'
+    PIPE_CHUNK_SIZE = 65536
+
+    async def _download_audio_piped(
+        self, song_id: str, url: str, timestamp: int
+    ) -> Optional[str]:
+        """Download audio bằng pipeline yt-dlp -> ffmpeg (asyncio subprocess).
+
+        yt-dlp ghi audio ra stdout, event loop bơm từng chunk vào stdin của
+        ffmpeg (không chiếm thread nào trong lúc chờ I/O); ffmpeg remux
+        (copy codec) thẳng ra file .m4a faststart.
+        Dữ liệu raw đồng thời được tee vào file spool ``.raw.tmp`` cho tee
+        mode của proxy-download (reader đọc theo tốc độ riêng, RAM không
+        giữ bản sao) và làm fallback khi ffmpeg lỗi giữa chừng; spool bị
+        xoá khi pipeline xong.
 
         Args:
-            song_id: ID bài hát trong database.
+            song_id: ID bài hát.
             url: URL YouTube cần download.
-            db: SQLAlchemy Session để cập nhật trạng thái.
+            timestamp: Hậu tố tên file.
 
         Returns:
-            True nếu download và xử lý thành công, False nếu thất bại.
+            Đường dẫn tương đối (thư mục shard) của file .m4a đã lưu,
+            hoặc None nếu không tải được gì.
+
+        Raises:
+            Exception: Khi yt-dlp thoát lỗi.
         """
+        relpath = audio_relpath(song_id, timestamp)
+        final_file = self.audio_dir / relpath
+        final_file.parent.mkdir(parents=True, exist_ok=True)
+        # ffmpeg ghi vào file tạm, chỉ đổi tên khi xong -> file .m4a trên
+        # disk luôn là file hoàn chỉnh
+        tmp_file = final_file.with_name(f"{final_file.name}.tmp")
+
+        # Dùng lại info dict từ get_video_info nếu còn hạn: yt-dlp chỉ
+        # chọn format và tải, không trích xuất trang video lần nữa
+        cached_info = extraction_cache.get(song_id)
+
+        entry, ytdlp_error, ffmpeg_ok = await self._pipe_to_ffmpeg(
+            song_id, url, cached_info, tmp_file,
+            final_file.with_name(f"{final_file.name}.raw.tmp"),
+        )
+
+        if ytdlp_error and cached_info is not None:
+            # URL format trong cache có thể đã bị thu hồi -> trích xuất lại
+            extraction_cache.discard(song_id)
+            live_downloads.close(song_id, failed=True)
+            live_downloads.discard_spool(entry)
+            # Spool mới tên riêng: reader cuối cùng của spool cũ sẽ xoá nó
+            entry, ytdlp_error, ffmpeg_ok = await self._pipe_to_ffmpeg(
+                song_id, url, None, tmp_file,
+                final_file.with_name(f"{final_file.name}.retry.raw.tmp"),
+            )
+
+        # Reader mới sẽ chờ bản .m4a hoàn chỉnh, reader đang follow vẫn
+        # đọc nốt file spool
+        live_downloads.close(song_id, failed=bool(ytdlp_error))
+
         try:
-            song = db.query(Song).filter(Song.id == song_id).first()
-            if not song:
-                return False
+            if ytdlp_error:
+                tmp_file.unlink(missing_ok=True)
+                raise Exception(f"yt-dlp that bai: {ytdlp_error}")
 
-            song.status = ProcessingStatus.PROCESSING
-            db.commit()
+            if (ffmpeg_ok and tmp_file.exists()
+                    and tmp_file.stat().st_size > 1024):
+                os.replace(tmp_file, final_file)
+                return relpath
 
-            timestamp = int(time.time())
+            tmp_file.unlink(missing_ok=True)
 
-            def _download_audio():
-                # Không dùng FFmpegExtractAudio postprocessor vì dễ fail
-                # Thay vào đó convert thủ công bằng ffmpeg subprocess
-                output_path = self.audio_dir / f"{song_id}_{timestamp}"
-
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'outtmpl': str(output_path),
-                    'quiet': True,
-                    'no_warnings': True,
-                    'user_agent': random.choice(self.user_agents),
-                    'http_headers': {
-                        'User-Agent': random.choice(self.user_agents),
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-us,en;q=0.5',
-                        'Accept-Encoding': 'gzip,deflate',
-                        'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.7',
-                        'Keep-Alive': '300',
-                        'Connection': 'keep-alive',
-                    },
-                    'socket_timeout': 60,
-                    'retries': 3,
-                    'nocheckcertificate': True,
-                }
+            # Convert fail — giu bytes raw voi extension .m4a
+            # Browser vẫn phát được AAC raw với extension .m4a
+            if entry.received > 1024:
+                print(f"[ERROR] FFmpeg convert that bai cho {song_id}, dung raw stream")
+                # Hard link: reader đang đọc spool không bị ảnh hưởng
+                os.link(entry.path, final_file)
+                return relpath
+
+            return None
+        finally:
+            live_downloads.discard_spool(entry)
+
+    async def _pipe_to_ffmpeg(
+        self,
+        song_id: str,
+        url: str,
+        cached_info: Optional[Dict[str, Any]],
+        output_file: Path,
+        spool_file: Path,
+    ):
+        """Chạy yt-dlp (stdout) và ffmpeg (stdin) rồi bơm dữ liệu giữa hai process.
+
+        Args:
+            song_id: ID bài hát (progress store, live registry).
+            url: URL YouTube, chỉ dùng khi không có ``cached_info``.
+            cached_info: Info dict đã trích xuất (nạp qua --load-info-json).
+            output_file: File ffmpeg ghi ra.
+            spool_file: File tee dữ liệu raw (tee mode, fallback).
+
+        Returns:
+            Tuple (live_entry, ytdlp_error, ffmpeg_ok): entry spool raw
+            đã tải, thông báo lỗi yt-dlp (None nếu thành công) và ffmpeg
+            có remux thành công hay không.
+        """
+        user_agent = random.choice(self.user_agents)
+        ytdlp_cmd = [
+            sys.executable, '-m', 'yt_dlp',
+            '-f', self.AUDIO_FORMAT,
+            '-o', '-',
+            '--quiet', '--no-warnings', '--no-part',
+            '--user-agent', user_agent,
+            '--socket-timeout', '60',
+            '--retries', '3',
+            '--no-check-certificate',
+        ]
+
+        info_file = None
+        if cached_info is not None:
+            with tempfile.NamedTemporaryFile(
+                'w', suffix='.info.json', delete=False, encoding='utf-8'
+            ) as f:
+                json.dump(yt_dlp.YoutubeDL.sanitize_info(cached_info), f)
+                info_file = f.name
+            ytdlp_cmd += ['--load-info-json', info_file]
+        else:
+            ytdlp_cmd += ['--', url]
+
+        ffmpeg_cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-i', 'pipe:0',
+            '-vn', '-c', 'copy',
+            '-movflags', '+faststart',
+            '-f', 'mp4', '-y', str(output_file),
+        ]
+
+        # Không có info cache -> yt-dlp trích xuất lại trang video trước
+        if cached_info is None:
+            await rate_limiter.acquire("youtube")
+        await rate_limiter.acquire("googlevideo")
+
+        total_bytes = self._estimate_audio_size(cached_info)
+
+        ytdlp = await asyncio.create_subprocess_exec(
+            *ytdlp_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        ffmpeg = await asyncio.create_subprocess_exec(
+            *ffmpeg_cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        # Đọc stderr song song để process không bị treo khi pipe stderr đầy
+        ytdlp_stderr_task = asyncio.create_task(ytdlp.stderr.read())
+        ffmpeg_stderr_task = asyncio.create_task(ffmpeg.stderr.read())
+        ffmpeg_ok = True
+        entry = live_downloads.open_spool(song_id, spool_file)
+
+        try:
+            while chunk := await ytdlp.stdout.read(self.PIPE_CHUNK_SIZE):
+                await run_in_control(entry.append, chunk)
+                download_progress.update_download(
+                    song_id, entry.received, total_bytes
+                )
+                if ffmpeg_ok:
+                    try:
+                        ffmpeg.stdin.write(chunk)
+                        await ffmpeg.stdin.drain()
+                    except (BrokenPipeError, ConnectionResetError):
+                        # ffmpeg chết giữa chừng -> vẫn đọc hết yt-dlp để fallback
+                        ffmpeg_ok = False
+
+            download_progress.set_stage(song_id, "converting")
+            try:
+                ffmpeg.stdin.close()
+                await ffmpeg.stdin.wait_closed()
+            except (BrokenPipeError, ConnectionResetError):
+                ffmpeg_ok = False
+
+            await asyncio.wait_for(ytdlp.wait(), timeout=60)
+            await asyncio.wait_for(ffmpeg.wait(), timeout=120)
+            ytdlp_stderr = await ytdlp_stderr_task
+            ffmpeg_stderr = await ffmpeg_stderr_task
+        except BaseException:
+            live_downloads.close(song_id, failed=True)
+            live_downloads.discard_spool(entry)
+            raise
+        finally:
+            # Bị huỷ (shutdown) hoặc timeout -> không để lại process mồ côi
+            for process in (ytdlp, ffmpeg):
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+            if info_file:
+                os.unlink(info_file)
+
+        ytdlp_error = None
+        if ytdlp.returncode != 0 or not entry.received:
+            ytdlp_error = (
+                ytdlp_stderr.decode(errors='replace').strip()[-500:]
+                or f"exit code {ytdlp.returncode}"
+            )
+
+        if ffmpeg.returncode != 0:
+            ffmpeg_ok = False
+            print(
+                f"[ERROR] FFmpeg convert that bai: "
+                f"{ffmpeg_stderr.decode(errors='replace').strip()[-500:]}"
+            )
+
+        return entry, ytdlp_error, ffmpeg_ok
+
+    def _estimate_audio_size(
+        self, info: Optional[Dict[str, Any]]
+    ) -> Optional[int]:
+        """Ước lượng dung lượng format audio yt-dlp sẽ chọn (cho progress)."""
+        if not info:
+            return None
 
-                # Delay truoc khi download de tranh rate limiting
-                time.sleep(random.uniform(1, 3))
+        audio_formats = [
+            f for f in info.get('formats') or []
+            if f.get('vcodec') == 'none'
+            and f.get('acodec') not in (None, 'none')
+        ]
+        preferred = [
+            f for f in audio_formats if f.get('ext') == 'm4a'
+        ] or audio_formats
+        if not preferred:
+            return None
 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
+        best = max(preferred, key=lambda f: f.get('abr') or f.get('tbr') or 0)
+        size = best.get('filesize') or best.get('filesize_approx')
+        return int(size) if size else None
+
+    async def _download_audio_unpiped(
+        self, song_id: str, url: str, timestamp: int
+    ) -> Optional[str]:
+        """Download audio raw bằng yt-dlp Python API (máy không có ffmpeg).
 
-                # Tim file raw da download (yt-dlp tu them extension)
-                raw_file = None
-                for file in self.audio_dir.glob(f"{song_id}_{timestamp}*"):
-                    # Chi chap nhan file > 1KB de loai file loi/rong
-                    if file.is_file() and file.stat().st_size > 1024:
-                        raw_file = file
-                        break
+        Xin lượt rate limit trên event loop rồi mới chạy
+        ``_download_audio_to_file`` trên pipeline executor, để thread của
+        executor không ngủ chờ lượt. Info dict trong cache hết hạn (URL
+        format bị thu hồi) thì xin thêm lượt youtube và trích xuất lại.
 
-                if not raw_file:
-                    return None
+        Returns:
+            Đường dẫn tương đối của file .m4a, hoặc None nếu không tải được.
+        """
+        cached_info = extraction_cache.get(song_id)
+        if cached_info is not None:
+            await rate_limiter.acquire("googlevideo")
+            try:
+                return await run_in_pipeline(
+                    self._download_audio_to_file,
+                    song_id, url, timestamp, cached_info,
+                )
+            except yt_dlp.utils.DownloadError:
+                extraction_cache.discard(song_id)
+
+        await rate_limiter.acquire("youtube")
+        await rate_limiter.acquire("googlevideo")
+        return await run_in_pipeline(
+            self._download_audio_to_file, song_id, url, timestamp, None,
+        )
+
+    def _download_audio_to_file(
+        self,
+        song_id: str,
+        url: str,
+        timestamp: int,
+        cached_info: Optional[Dict[str, Any]],
+    ) -> Optional[str]:
+        """Download audio raw ra file rồi đổi tên thành .m4a (không có ffmpeg).
 
-                # Convert sang .m4a bang ffmpeg (copy codec, khong re-encode)
-                final_file = self.audio_dir / f"{song_id}_{timestamp}.m4a"
+        Chạy trên pipeline executor; caller đã xin lượt rate limit. Browser
+        vẫn phát được AAC raw với extension .m4a nên không cần remux.
 
+        Args:
+            song_id: ID bài hát.
+            url: URL YouTube cần download.
+            timestamp: Hậu tố tên file.
+            cached_info: Info dict đã trích xuất (None = trích xuất ``url``).
+
+        Returns:
+            Đường dẫn tương đối (thư mục shard) của file .m4a đã lưu,
+            hoặc None nếu không tìm thấy file raw.
+
+        Raises:
+            yt_dlp.utils.DownloadError: Tải từ ``cached_info`` thất bại
+                (phần đã tải bị xoá, caller trích xuất lại).
+        """
+        relpath = audio_relpath(song_id, timestamp, suffix="")
+        output_path = self.audio_dir / relpath
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        ydl_opts = {
+            'format': self.AUDIO_FORMAT,
+            'outtmpl': str(output_path),
+            # Ghi thẳng vào file đích (không .part) để reader
+            # follow được file trong lúc đang lớn
+            'nopart': True,
+            'quiet': True,
+            'no_warnings': True,
+            'user_agent': random.choice(self.user_agents),
+            'http_headers': {
+                'User-Agent': random.choice(self.user_agents),
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-us,en;q=0.5',
+                'Accept-Encoding': 'gzip,deflate',
+                'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.7',
+                'Keep-Alive': '300',
+                'Connection': 'keep-alive',
+            },
+            'socket_timeout': 60,
+            'retries': 3,
+            'nocheckcertificate': True,
+            # Ghi bytes đã tải vào progress store cho /status và
+            # đăng ký file đang lớn cho tee mode của proxy-download
+            'progress_hooks': [
+                download_progress.make_hook(song_id),
+                live_downloads.make_hook(song_id),
+            ],
+        }
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if cached_info is not None:
+                # Dùng lại info dict từ get_video_info: yt-dlp chỉ chọn
+                # format và tải, không trích xuất trang video lần nữa
                 try:
-                    import subprocess
-                    result = subprocess.run(
-                        ['ffmpeg', '-i', str(raw_file),
-                         '-c', 'copy', '-y', str(final_file)],
-                        capture_output=True, timeout=120
-                    )
-
-                    if (result.returncode == 0
-                            and final_file.exists()
-                            and final_file.stat().st_size > 1024):
-                        # Convert thanh cong — xoa raw file neu khac final file
-                        if raw_file != final_file and raw_file.exists():
-                            raw_file.unlink()
-                        return final_file.name
-                    else:
-                        # Convert fail — rename raw file thanh .m4a
-                        # Browser van phat duoc AAC raw voi extension .m4a
-                        if raw_file.suffix.lower() != '.m4a':
-                            renamed = raw_file.with_suffix('.m4a')
-                            if renamed.exists():
-                                renamed.unlink()
-                            raw_file.rename(renamed)
-                            return renamed.name
-                        return raw_file.name
-
-                except Exception as e:
-                    print(f"[ERROR] FFmpeg convert that bai: {e}")
-                    # Fallback: dung raw file voi extension .m4a
-                    if raw_file and raw_file.exists():
-                        if raw_file.suffix.lower() != '.m4a':
-                            renamed = raw_file.with_suffix('.m4a')
-                            if renamed.exists():
-                                renamed.unlink()
-                            raw_file.rename(renamed)
-                            return renamed.name
-                        return raw_file.name
+                    ydl.process_ie_result(cached_info, download=True)
+                except yt_dlp.utils.DownloadError:
+                    # URL format có thể đã bị thu hồi -> xoá phần đã
+                    # tải (nopart), caller trích xuất lại từ đầu
+                    live_downloads.close(song_id, failed=True)
+                    for partial in output_path.parent.glob(f"{output_path.name}*"):
+                        partial.unlink(missing_ok=True)
+                    raise
+            else:
+                ydl.download([url])
 
-                return None
+        live_downloads.close(song_id)
 
-            loop = asyncio.get_event_loop()
-            downloaded_audio_filename = await loop.run_in_executor(
-                None, _download_audio
-            )
+        # Tìm file raw đã download, chỉ chấp nhận file > 1KB để loại file lỗi/rỗng
+        if not output_path.is_file() or output_path.stat().st_size <= 1024:
+            return None
+
+        renamed = output_path.with_name(f"{output_path.name}.m4a")
+        os.replace(output_path, renamed)
+        return f"{relpath}.m4a"
+
+    # ── Audio download & processing ───────────────────────
+
+    async def download_audio_and_thumbnail(self, song_id: str, url: str) -> bool:
+        """Download audio và thumbnail trong background, cập nhật DB.
+
+        Pipeline không giữ DB session trong lúc download (có thể kéo dài
+        vài phút): mỗi lần chuyển trạng thái mở một ``SessionLocal``
+        ngắn rồi đóng ngay, nên connection pool không bị chiếm bởi các
+        job đang chạy. Mỗi lần chuyển trạng thái đều publish sự kiện lên
+        ``song_events`` để client SSE và proxy-download không phải poll DB.
+
+        Flow xử lý:
+            1. Claim bài hát (PENDING/FAILED -> PROCESSING) bằng UPDATE
+               nguyên tử; nếu worker khác đang xử lý thì bỏ qua.
+            2. Pipe output yt-dlp thẳng vào stdin ffmpeg, ffmpeg ghi file
+               .m4a (faststart) cuối cùng — không có file raw trung gian.
+               Trong lúc tải, heartbeat định kỳ làm mới ``updated_at``
+               để claim không bị coi là hết hạn.
+            3. Nếu ffmpeg fail giữa chừng, ghi bytes raw thành .m4a; nếu
+               máy không có ffmpeg, tải file raw rồi rename thành .m4a.
+            4. Download thumbnail.
+            5. Cập nhật DB: audio_filename, thumbnail_filename,
+               status = COMPLETED.
+            6. Nếu có lỗi: status = FAILED + ghi error_message, phân loại
+               lỗi vĩnh viễn/tạm thời và lên lịch retry (backoff có
+               jitter).
+
+        Circuit breaker nhận đúng một mẫu cho mỗi job: kết quả của bước
+        gọi YouTube (trích xuất metadata + tải audio). Lỗi cục bộ sau đó
+        (ffmpeg, disk, DB) không được tính là YouTube đang chặn.
+
+        Args:
+            song_id: ID bài hát trong database.
+            url: URL YouTube cần download.
+
+        Returns:
+            True nếu download và xử lý thành công, False nếu thất bại
+            hoặc bài hát đã được worker khác claim.
+        """
+        # Control executor: UPDATE claim + SELECT không chặn event loop
+        claimed = await run_in_control(self._claim_for_download, song_id)
+        if claimed is None:
+            return False
+        token, title, duration, thumbnail_url = claimed
+
+        download_progress.start(song_id)
+        song_events.publish(
+            song_id, status=ProcessingStatus.PROCESSING.value,
+            progress=0.0, stage="queued",
+        )
+        heartbeat = asyncio.create_task(self._heartbeat_loop(song_id, token))
+        # True trong lúc đang gọi YouTube: lỗi ở đây mới ghi vào breaker
+        upstream_stage = True
+
+        try:
+            timestamp = int(time.time())
+
+            # Bài tạo từ bulk-info chỉ có metadata tạm -> trích xuất thật
+            # (info dict vào extraction_cache, stage download dùng lại)
+            metadata = None
+            if self.is_placeholder(song_id, title, duration):
+                # Worker đã giữ lượt breaker (download_queue) -> không
+                # kiểm tra lại, tránh tự chặn chính mình khi half-open
+                metadata = await self.get_video_info(url, check_breaker=False)
+                thumbnail_url = metadata['thumbnail_url'] or thumbnail_url
+
+            # Có ffmpeg -> pipe yt-dlp thẳng vào ffmpeg (không file raw);
+            # không có -> tải file raw và đổi tên thành .m4a như trước
+            if shutil.which('ffmpeg'):
+                downloaded_audio_filename = await self._download_audio_piped(
+                    song_id, url, timestamp
+                )
+            else:
+                downloaded_audio_filename = await self._download_audio_unpiped(
+                    song_id, url, timestamp
+                )
+
+            # YouTube đã trả audio xong: một mẫu thành công cho breaker
+            upstream_stage = False
+            self.record_upstream_outcome(None)
 
             if not downloaded_audio_filename:
                 raise Exception("Audio download that bai")
 
+            download_progress.set_stage(song_id, "thumbnail")
             thumbnail_filename = await self.download_thumbnail_to_server(
-                song.thumbnail_url, song_id
+                thumbnail_url, song_id
             )
 
-            # Cap nhat ket qua vao database
-            song.audio_filename = downloaded_audio_filename
-            song.thumbnail_filename = thumbnail_filename
-            song.status = ProcessingStatus.COMPLETED
-            song.completed_at = datetime.utcnow()
-            db.commit()
+            completed = await run_in_control(
+                self._complete_song, song_id, token,
+                downloaded_audio_filename, thumbnail_filename, metadata,
+            )
+            if not completed:
+                # Claim hết hạn và đã thuộc worker khác -> bỏ các file vừa
+                # tải (audio + thumbnail), chủ mới tự ghi kết quả của mình
+                print(f"[QUEUE] Mat claim {song_id}, bo ket qua download")
+                (self.audio_dir / downloaded_audio_filename).unlink(missing_ok=True)
+                if thumbnail_filename:
+                    (self.thumbnail_dir / thumbnail_filename).unlink(missing_ok=True)
+                return False
+            # Request phát tiếp theo tra cứu file trong RAM, không glob
+            audio_index.put(
+                song_id,
+                self.audio_dir / downloaded_audio_filename,
+                metadata['title'] if metadata else title,
+            )
 
+            # File mới có thể đẩy thư viện vượt quota
+            evictor.record_added(
+                self.audio_dir / downloaded_audio_filename,
+                self.thumbnail_dir / thumbnail_filename
+                if thumbnail_filename else None,
+            )
+            song_events.publish(
+                song_id, status=ProcessingStatus.COMPLETED.value,
+                progress=1.0, audio_filename=downloaded_audio_filename,
+            )
             return True
 
         except Exception as e:
-            if song:
-                song.status = ProcessingStatus.FAILED
-                song.error_message = str(e)
-                db.commit()
+            disk_full = (
+                (isinstance(e, OSError) and e.errno == errno.ENOSPC)
+                or "No space left on device" in str(e)
+            )
+            if disk_full:
+                # Disk đầy -> giải phóng ngay, lần retry sau có chỗ ghi
+                evictor.kick(rescan=True)
+            if upstream_stage and (disk_full or isinstance(e, OSError)):
+                # Lỗi cục bộ (disk, link...) không nói gì về YouTube:
+                # trả lượt thử half-open, không ghi mẫu
+                circuit_breaker.release()
+            elif upstream_stage:
+                # Lỗi của yt-dlp/ytmusicapi; lỗi vĩnh viễn của riêng video
+                # vẫn kết thúc lượt thử half-open (tính là thành công)
+                self.record_upstream_outcome(e)
+            failed, next_retry_at = await run_in_control(
+                self._fail_song, song_id, token, str(e)
+            )
+            if not failed:
+                print(f"[QUEUE] Mat claim {song_id}, bo qua loi: {e}")
+                return False
+            song_events.publish(
+                song_id, status=ProcessingStatus.FAILED.value,
+                error_message=str(e),
+                next_retry_at=next_retry_at.isoformat() if next_retry_at else None,
+            )
             return False
+
+        finally:
+            heartbeat.cancel()
+            download_progress.finish(song_id)
+            live_downloads.close(song_id, failed=True)
@@ -18,10 +18,24 @@ import concurrent.futures
 from fastapi.responses import StreamingResponse
 from ytmusicapi import YTMusic
 
+# ── Internal imports ──────────────────────────────────────
+from app.config.config import settings
+from app.services.rate_limiter import (
+    RateLimitedSession, RateLimitExceeded, rate_limiter,
+)
+
 
 # ── Module-level instances ────────────────────────────────
-# Khởi tạo YTMusic không cần auth — chỉ dùng cho public API
-yt = YTMusic()
+# Khởi tạo YTMusic không cần auth — chỉ dùng cho public API.
+# Route đồng bộ xin token từ ngân sách interactive riêng, chờ tối đa
+# RATE_LIMIT_MAX_WAIT_SECONDS rồi báo 429.
+yt = YTMusic(requests_session=RateLimitedSession(
+    max_wait=settings.RATE_LIMIT_MAX_WAIT_SECONDS, interactive=True,
+))
+# Pipeline/prefetch: caller phải ``await rate_limiter.acquire("ytmusic")``
+# trên event loop trước khi chạy lệnh trên pipeline executor — session
+# không xin token để thread của executor không bao giờ ngủ chờ lượt.
+yt_background = YTMusic(requests_session=RateLimitedSession(metered=False))
 
 
 class YTMusicService:
@@ -55,6 +69,17 @@ class YTMusicService:
         """
         youtube_url = f"https://www.youtube.com/watch?v={song_id}"
 
+        # yt-dlp trich xuat trang video roi tai tu googlevideo. Xin luot
+        # (ngan sach interactive, khong chung voi job nen) truoc khi tra
+        # response de het luot thi bao 429 duoc.
+        max_wait = settings.RATE_LIMIT_MAX_WAIT_SECONDS
+        rate_limiter.acquire_blocking(
+            "youtube", max_wait=max_wait, interactive=True,
+        )
+        rate_limiter.acquire_blocking(
+            "googlevideo", max_wait=max_wait, interactive=True,
+        )
+
         def iterfile():
             """Generator yield audio chunks tu yt-dlp stdout."""
             process = subprocess.Popen(
@@ -103,6 +128,8 @@ class YTMusicService:
         """
         try:
             results = yt.search(query=query, filter=filter, limit=limit)
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             # Fallback: YouTube Music thỉnh thoảng trả về giao diện mới (Top result card)
             # làm ytmusicapi bị lỗi KeyError: 'header'. Ta fallback bằng cách fetch song, artist, album đồng thời.
@@ -245,6 +272,8 @@ class YTMusicService:
             if not results:
                 return [{"error": "Khong co du lieu"}]
             return results
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             return [{"error": str(e)}]
 
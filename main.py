@@ -23,11 +23,22 @@ from fastapi.staticfiles import StaticFiles
 from app.routes.router import api_router
 from app.config.config import settings
 from app.config.database import create_tables, get_database_info
+from app.services.download_queue import download_queue
+from app.services.reconciler import reconciler
+from app.services.prefetcher import prefetcher
+from app.services.play_tracker import play_tracker
+from app.services.evictor import evictor
+from app.services.audio_index import audio_index
+from app.internal.utils.executors import (
+    configure_threadpool,
+    shutdown_executors,
+)
 
 # Import model de SQLAlchemy dang ky metadata truoc create_tables()
 from app.models.user import User  # noqa: F401
 from app.models.song import Song  # noqa: F401
 from app.models.playlist import Playlist, PlaylistSong  # noqa: F401
+from app.models.download_batch import DownloadBatch, DownloadBatchItem  # noqa: F401
 
 
 # ── Lifespan ──────────────────────────────────────────────
@@ -37,12 +48,22 @@ async def lifespan(app: FastAPI):
     """Quan ly lifecycle cua ung dung (startup va shutdown).
 
     Startup:
+        - Dat kich thuoc threadpool cho route dong bo.
         - Tao cac bang database neu chua ton tai.
         - In thong tin ket noi database ra console.
+        - Khoi dong worker pool download va nap lai bai PENDING.
+        - Chay nen luot doi soat DB <-> disk (khong cho no xong).
+        - Chay nen vong ghi last_played_at va vong kiem tra quota disk.
 
     Shutdown:
-        - Hien tai chua co logic cleanup.
+        - Huy luot doi soat va cac luot prefetch con dang chay.
+        - Dung vong kiem tra quota, ghi not last_played_at con trong RAM.
+        - Dung worker pool download (job dang do van PENDING/PROCESSING
+          trong DB va duoc khoi phuc o lan startup sau).
+        - Dong executor rieng cua pipeline download.
     """
+    configure_threadpool()
+
     try:
         create_tables()
         db_info = get_database_info()
@@ -53,8 +74,34 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Database connection failed: {e}")
 
+    # Moi service khoi dong rieng: mot service loi khong keo theo cac
+    # service con lai
+    try:
+        await download_queue.start()
+    except Exception as e:
+        print(f"Download queue failed to start: {e}")
+
+    for name, start in (
+        ("Reconciler", reconciler.start),
+        ("Play tracker", play_tracker.start),
+        ("Evictor", evictor.start),
+        ("Audio index", audio_index.start),
+    ):
+        try:
+            start()
+        except Exception as e:
+            print(f"{name} failed to start: {e}")
+
     yield
 
+    await audio_index.stop()
+    await reconciler.stop()
+    await prefetcher.stop()
+    await evictor.stop()
+    await play_tracker.stop()
+    await download_queue.stop()
+    shutdown_executors()
+
 
 # ── App instance ──────────────────────────────────────────
 
@@ -0,0 +1,230 @@
+"""Test xu ly Range/If-Range/304 cua app/internal/rfc/http_range.
+
+Chay: ``python -m pytest -q tests/test_http_range.py`` (tu thu muc goc).
+"""
+
+# ── Third-party imports ───────────────────────────────────
+import pytest
+
+# ── Internal imports ──────────────────────────────────────
+from app.internal.rfc.http_range.http_range import (
+    MAX_RANGES,
+    ByteRange,
+    RangeNotSatisfiable,
+    coalesce,
+    http_date,
+    is_not_modified,
+    make_etag,
+    parse_range,
+    plan_range,
+)
+
+SIZE = 10_000
+MTIME = 1_700_000_000.25
+ETAG = make_etag("song", SIZE, MTIME)
+
+
+# ── parse_range ───────────────────────────────────────────
+
+def test_parse_closed_range():
+    assert parse_range("bytes=0-99", SIZE) == [ByteRange(0, 99)]
+
+
+def test_parse_open_ended_range():
+    assert parse_range("bytes=500-", SIZE) == [ByteRange(500, SIZE - 1)]
+
+
+def test_parse_suffix_range():
+    assert parse_range("bytes=-100", SIZE) == [ByteRange(SIZE - 100, SIZE - 1)]
+
+
+def test_parse_suffix_longer_than_file():
+    assert parse_range("bytes=-20000", SIZE) == [ByteRange(0, SIZE - 1)]
+
+
+def test_parse_end_clamped_to_file():
+    assert parse_range("bytes=9000-20000", SIZE) == [ByteRange(9000, SIZE - 1)]
+
+
+def test_parse_multiple_ranges_keep_order():
+    assert parse_range("bytes=500-599, 0-99", SIZE) == [
+        ByteRange(500, 599), ByteRange(0, 99),
+    ]
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",      # khong phai don vi bytes
+    "bytes",           # thieu "="
+    "bytes=",          # khong co range nao
+    "bytes=100-50",    # end < start
+    "bytes=abc-",      # khong phai so
+    "bytes=²-",        # str.isdigit nhan "²" nhung int() thi khong
+    "bytes=-",         # suffix rong
+])
+def test_parse_invalid_header_is_ignored(header):
+    assert parse_range(header, SIZE) is None
+
+
+def test_parse_unsatisfiable_raises_416():
+    with pytest.raises(RangeNotSatisfiable) as exc:
+        parse_range(f"bytes={SIZE}-", SIZE)
+    assert exc.value.size == SIZE
+
+
+def test_parse_zero_suffix_is_unsatisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=-0", SIZE)
+
+
+# ── coalesce ──────────────────────────────────────────────
+
+def test_coalesce_overlapping_and_adjacent():
+    assert coalesce([ByteRange(0, 99), ByteRange(50, 149), ByteRange(150, 199)]) == [
+        ByteRange(0, 199),
+    ]
+
+
+def test_coalesce_small_gap_merges():
+    assert coalesce([ByteRange(200, 299), ByteRange(0, 99)], gap=100) == [
+        ByteRange(0, 299),
+    ]
+
+
+def test_coalesce_large_gap_kept_apart():
+    assert coalesce([ByteRange(1000, 1099), ByteRange(0, 99)], gap=80) == [
+        ByteRange(0, 99), ByteRange(1000, 1099),
+    ]
+
+
+# ── plan_range ────────────────────────────────────────────
+
+def _plan(headers):
+    return plan_range(headers, SIZE, "audio/mp4", ETAG, MTIME)
+
+
+def test_plan_without_range_returns_whole_file():
+    plan = _plan({})
+    assert plan.status_code == 200
+    assert plan.headers["Content-Length"] == str(SIZE)
+    assert plan.segments == [ByteRange(0, SIZE - 1)]
+
+
+def test_plan_single_range():
+    plan = _plan({"range": "bytes=-100"})
+    assert plan.status_code == 206
+    assert plan.headers["Content-Range"] == f"bytes {SIZE - 100}-{SIZE - 1}/{SIZE}"
+    assert plan.headers["Content-Length"] == "100"
+    assert plan.segments == [ByteRange(SIZE - 100, SIZE - 1)]
+
+
+def test_plan_coalesced_ranges_become_single_part():
+    plan = _plan({"range": "bytes=0-99,100-199"})
+    assert plan.status_code == 206
+    assert plan.segments == [ByteRange(0, 199)]
+
+
+def test_plan_multipart():
+    plan = _plan({"range": "bytes=0-99,5000-5099"})
+    assert plan.status_code == 206
+    content_type = plan.headers["Content-Type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=")[1]
+
+    ranges = [s for s in plan.segments if isinstance(s, ByteRange)]
+    assert ranges == [ByteRange(0, 99), ByteRange(5000, 5099)]
+    body_length = sum(
+        len(s) if isinstance(s, bytes) else s.end - s.start + 1
+        for s in plan.segments
+    )
+    assert plan.headers["Content-Length"] == str(body_length)
+    assert plan.segments[0].startswith(f"--{boundary}\r\n".encode())
+    assert b"Content-Range: bytes 5000-5099/10000" in plan.segments[2]
+    assert plan.segments[-1] == f"\r\n--{boundary}--\r\n".encode()
+
+
+def test_plan_unsatisfiable_raises_416():
+    with pytest.raises(RangeNotSatisfiable):
+        _plan({"range": f"bytes={SIZE + 1}-"})
+
+
+def test_plan_too_many_ranges_returns_whole_file():
+    # Moi range cach nhau xa hon COALESCE_GAP -> khong gop duoc
+    spec = ",".join(f"{i * 500}-{i * 500 + 9}" for i in range(MAX_RANGES + 1))
+    plan = _plan({"range": f"bytes={spec}"})
+    assert plan.status_code == 200
+    assert plan.segments == [ByteRange(0, SIZE - 1)]
+
+
+def test_plan_max_ranges_still_served():
+    spec = ",".join(f"{i * 500}-{i * 500 + 9}" for i in range(MAX_RANGES))
+    plan = _plan({"range": f"bytes={spec}"})
+    assert plan.status_code == 206
+
+
+def test_plan_if_range_matching_etag():
+    plan = _plan({"range": "bytes=0-99", "if-range": ETAG})
+    assert plan.status_code == 206
+
+
+def test_plan_if_range_stale_etag_returns_whole_file():
+    plan = _plan({"range": "bytes=0-99", "if-range": '"other"'})
+    assert plan.status_code == 200
+
+
+def test_plan_if_range_weak_etag_never_matches():
+    plan = _plan({"range": "bytes=0-99", "if-range": f"W/{ETAG}"})
+    assert plan.status_code == 200
+
+
+def test_plan_if_range_matching_date():
+    plan = _plan({"range": "bytes=0-99", "if-range": http_date(MTIME)})
+    assert plan.status_code == 206
+
+
+def test_plan_if_range_older_date_returns_whole_file():
+    plan = _plan({"range": "bytes=0-99", "if-range": http_date(MTIME - 60)})
+    assert plan.status_code == 200
+
+
+def test_plan_if_range_invalid_date_returns_whole_file():
+    plan = _plan({"range": "bytes=0-99", "if-range": "yesterday"})
+    assert plan.status_code == 200
+
+
+# ── is_not_modified ───────────────────────────────────────
+
+def test_not_modified_matching_etag():
+    assert is_not_modified({"if-none-match": ETAG}, ETAG, MTIME)
+
+
+def test_not_modified_weak_comparison():
+    assert is_not_modified({"if-none-match": f'"x", W/{ETAG}'}, ETAG, MTIME)
+
+
+def test_not_modified_star():
+    assert is_not_modified({"if-none-match": "*"}, ETAG, MTIME)
+
+
+def test_modified_when_etag_differs():
+    assert not is_not_modified({"if-none-match": '"other"'}, ETAG, MTIME)
+
+
+def test_not_modified_since_same_second():
+    assert is_not_modified({"if-modified-since": http_date(MTIME)}, ETAG, MTIME)
+
+
+def test_modified_since_older_date():
+    headers = {"if-modified-since": http_date(MTIME - 60)}
+    assert not is_not_modified(headers, ETAG, MTIME)
+
+
+def test_if_none_match_takes_precedence_over_date():
+    headers = {
+        "if-none-match": '"other"',
+        "if-modified-since": http_date(MTIME),
+    }
+    assert not is_not_modified(headers, ETAG, MTIME)
+
+
+def test_invalid_if_modified_since_is_ignored():
+    assert not is_not_modified({"if-modified-since": "garbage"}, ETAG, MTIME)